@@ -56,12 +56,22 @@ def get_addons():
         'engine.mssql = htsql_mssql.core:EngineMSSQLAddon',
         'tweak = htsql.tweak:TweakAddon',
         'tweak.autolimit = htsql.tweak.autolimit:TweakAutolimitAddon',
+        'tweak.arrow = htsql.tweak.arrow:TweakArrowAddon',
+        'tweak.batch = htsql.tweak.batch:TweakBatchAddon',
+        'tweak.batch.pgsql = htsql_pgsql.tweak.batch:TweakBatchPGSQLAddon',
+        'tweak.batch.sqlite'
+            ' = htsql_sqlite.tweak.batch:TweakBatchSQLiteAddon',
+        'tweak.batch.mysql = htsql_mysql.tweak.batch:TweakBatchMySQLAddon',
+        'tweak.batch.oracle'
+            ' = htsql_oracle.tweak.batch:TweakBatchOracleAddon',
+        'tweak.cache = htsql.tweak.cache:TweakCacheAddon',
         'tweak.cors = htsql.tweak.cors:TweakCORSAddon',
         'tweak.csrf = htsql.tweak.csrf:TweakCSRFAddon',
         'tweak.django = htsql.tweak.django:TweakDjangoAddon',
         'tweak.etl = htsql.tweak.etl:TweakETLAddon',
         'tweak.filedb = htsql.tweak.filedb:TweakFileDBAddon',
         'tweak.gateway = htsql.tweak.gateway:TweakGatewayAddon',
+        'tweak.gzip = htsql.tweak.gzip:TweakGZipAddon',
         'tweak.hello = htsql.tweak.hello:TweakHelloAddon',
         'tweak.inet = htsql.tweak.inet:TweakINetAddon',
         'tweak.inet.pgsql = htsql_pgsql.tweak.inet:TweakINetPGSQLAddon',
@@ -69,6 +79,7 @@ def get_addons():
         'tweak.meta.slave = htsql.tweak.meta.slave:TweakMetaSlaveAddon',
         'tweak.override = htsql.tweak.override:TweakOverrideAddon',
         'tweak.pool = htsql.tweak.pool:TweakPoolAddon',
+        'tweak.reload = htsql.tweak.reload:TweakReloadAddon',
         'tweak.resource = htsql.tweak.resource:TweakResourceAddon',
         'tweak.shell = htsql.tweak.shell:TweakShellAddon',
         'tweak.shell.default = htsql.tweak.shell.default:TweakShellDefaultAddon',
@@ -78,6 +89,14 @@ def get_addons():
         'tweak.timeout = htsql.tweak.timeout:TweakTimeoutAddon',
         'tweak.timeout.pgsql'
             ' = htsql_pgsql.tweak.timeout:TweakTimeoutPGSQLAddon',
+        'tweak.timeout.sqlite'
+            ' = htsql_sqlite.tweak.timeout:TweakTimeoutSQLiteAddon',
+        'tweak.timeout.mysql'
+            ' = htsql_mysql.tweak.timeout:TweakTimeoutMySQLAddon',
+        'tweak.timeout.oracle'
+            ' = htsql_oracle.tweak.timeout:TweakTimeoutOracleAddon',
+        'tweak.timeout.mssql'
+            ' = htsql_mssql.tweak.timeout:TweakTimeoutMSSQLAddon',
     ]
 
 
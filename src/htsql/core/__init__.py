@@ -3,15 +3,16 @@
 #
 
 
-from . import (adapter, addon, application, cache, cmd, connect, context,
-        domain, entity, error, introspect, split_sql, syn, tr, util, validator,
-        wsgi)
+from . import (adapter, addon, application, asgi, cache, cmd, connect,
+        context, domain, entity, error, introspect, split_sql, syn, tr, util,
+        validator, wsgi)
 from .validator import DBVal, StrVal, BoolVal, UIntVal
 from .addon import Addon, Parameter, Variable, addon_registry
 from .connect import connect
 from .error import Error
 from .introspect import introspect
 from .cache import GeneralCache
+import threading
 
 
 class HTSQLAddon(Addon):
@@ -43,6 +44,20 @@ class HTSQLAddon(Addon):
     The parameter `query_cache_size` specifies the number of cached
     query plans.  The default value is 1024.
 
+    The parameter `response_buffer_size` specifies the size of buffers
+    into which the HTTP response is collected before it is sent to
+    the client.  The default value is 65536 bytes.
+
+    The parameter `fold_segments`, if set to `True`, makes HTSQL
+    fetch nested segments within the statement of the enclosing
+    segment using JSON aggregates.  It is supported by SQLite and
+    PostgreSQL backends and ignored by other backends.
+
+    The parameter `key_set_size` specifies the maximum number of
+    parent rows for which nested segments are fetched by the keys of
+    the parent rows.  The default value is 100; set it to `0` to
+    disable this strategy.
+
     The parameter `debug`, if set to `True`, enables debug output.
     """
 
@@ -55,6 +70,14 @@ class HTSQLAddon(Addon):
             Parameter('query_cache_size', UIntVal(), default=1024,
                       value_name="""size""",
                       hint="""max size of the query cache"""),
+            Parameter('response_buffer_size', UIntVal(), default=65536,
+                      value_name="""size""",
+                      hint="""size of response buffers"""),
+            Parameter('fold_segments', BoolVal(), default=False,
+                      hint="""fetch nested segments in one query"""),
+            Parameter('key_set_size', UIntVal(), default=100,
+                      value_name="""size""",
+                      hint="""max parent keys passed to nested segments"""),
             Parameter('debug', BoolVal(), default=False,
                       hint="""dump debug information""")
     ]
@@ -63,6 +86,8 @@ class HTSQLAddon(Addon):
             Variable('connection'),
             Variable('can_read', True),
             Variable('can_write', True),
+            Variable('cache'),
+            Variable('streams'),
     ]
 
     packages = ['.', '.cmd', '.fmt', '.tr', '.tr.fn', '.syn']
@@ -72,6 +97,7 @@ class HTSQLAddon(Addon):
     def __init__(self, app, attributes):
         super(HTSQLAddon, self).__init__(app, attributes)
         self.cache = GeneralCache()
+        self.reload_lock = threading.Lock()
 
     def validate(self):
         if self.db is None:
@@ -17,7 +17,12 @@ from .adapter import ComponentRegistry
 from .util import maybe, oneof, listof, dictof, tupleof
 from .wsgi import wsgi
 from .cmd.command import UniversalCmd
-from .cmd.act import produce
+from .cmd.act import produce, analyze
+from .cache import GeneralCache
+from .introspect import introspect
+from .classify import PrepareCatalog
+from .entity import find_entities
+from .tr.translate import transfer_plans
 
 
 class EnvironmentGuard:
@@ -190,6 +195,9 @@ class Application:
         Activates the application in the current thread.
         """
         env = Environment(**self.variables)
+        if context.active_app is self:
+            # Stay with the catalog generation of the enclosing request.
+            env.cache = context.active_env.cache
         context.push(self, env)
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
@@ -209,4 +217,55 @@ class Application:
         with self:
             return produce(command, environment, **parameters)
 
+    def analyze(self, command, environment=None, **parameters):
+        """
+        Translates a query to SQL without executing it.
+
+        Returns :class:`htsql.core.tr.translate.SQLPlan` with the SQL
+        statements and the domains of their parameters and output
+        columns.
+        """
+        with self:
+            return analyze(command, environment, **parameters)
+
+    def reload(self):
+        """
+        Introspects the database and swaps in the new catalog.
+
+        The new catalog and its classification are prepared aside while
+        the application keeps serving requests; then they replace the
+        current ones for new requests.  Requests that are already running
+        finish with the catalog they started with.  Cached query plans
+        are preserved for queries that use only tables whose definition
+        has not changed.
+
+        Returns ``True`` if the catalog has changed.
+        """
+        with self.htsql.reload_lock, self:
+            old_cache = self.htsql.cache
+            new_cache = GeneralCache()
+            with context.env(cache=old_cache):
+                old_catalog = introspect()
+            with context.env(cache=new_cache):
+                new_catalog = introspect()
+                entities = set()
+                for schema in new_catalog:
+                    entities.add(schema)
+                    for table in schema:
+                        entities.add(table)
+                        entities.update(table.columns)
+                        entities.update(table.unique_keys)
+                        entities.update(table.foreign_keys)
+                old_tables = set(table for schema in old_catalog
+                                       for table in schema)
+                new_tables = set(table for schema in new_catalog
+                                       for table in schema)
+                if old_tables == new_tables:
+                    return False
+                PrepareCatalog.__invoke__()
+                transfer_plans(old_cache, new_cache,
+                               (lambda key: find_entities(key) <= entities))
+            self.htsql.cache = new_cache
+            return True
+
 
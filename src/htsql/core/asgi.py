@@ -0,0 +1,160 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+"""
+:mod:`htsql.core.asgi`
+======================
+
+This module provides an ASGI interface to an HTSQL application.
+"""
+
+
+import asyncio
+import concurrent.futures
+import contextvars
+import io
+import sys
+
+
+class ASGI:
+    """
+    Serves an HTSQL application over ASGI.
+
+    Requests are processed by the WSGI interface of the application.
+    Translation and execution of queries run in a bounded pool of
+    worker threads, one step at a time, while the event loop receives
+    requests and sends responses.  A worker thread is released as soon
+    as the next chunk of the response is produced, so slow clients do
+    not hold threads; the next chunk is not produced until the server
+    accepts the previous one.
+
+    `app` (:class:`htsql.core.application.Application`)
+        The HTSQL application.
+
+    `workers` (an integer)
+        The maximum number of threads processing requests.
+
+    Usage::
+
+        from htsql import HTSQL
+        from htsql.core.asgi import ASGI
+
+        application = ASGI(HTSQL(DB))
+    """
+
+    def __init__(self, app, workers=16):
+        assert isinstance(workers, int) and workers > 0
+        self.app = app
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError("unsupported ASGI scope: %r" % scope['type'])
+        data = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            data.append(message.get('body', b""))
+            if not message.get('more_body', False):
+                break
+        environ = make_environ(scope, b"".join(data))
+        # All the steps of the request share the same context, which
+        # is inherited from the task serving the request.
+        loop = asyncio.get_running_loop()
+        state = contextvars.copy_context()
+        def call(function, *args):
+            return loop.run_in_executor(self.executor,
+                                        state.run, function, *args)
+        response = []
+        def start_response(status, headers, exc_info=None):
+            response[:] = [status, headers]
+        body = await call(self.app, environ, start_response)
+        try:
+            chunks = iter(body)
+            chunk = await call(next, chunks, None)
+            status, headers = response
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split(None, 1)[0]),
+                'headers': [(name.lower().encode('latin-1'),
+                             value.encode('latin-1'))
+                            for name, value in headers],
+            })
+            while chunk is not None:
+                if chunk:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+                chunk = await call(next, chunks, None)
+            await send({
+                'type': 'http.response.body',
+                'body': b"",
+                'more_body': False,
+            })
+        finally:
+            if hasattr(body, 'close'):
+                await call(body.close)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def make_environ(scope, body):
+    """
+    Converts an ASGI HTTP scope to a WSGI environment.
+    """
+    # WSGI keeps the path and the headers as bytes decoded with Latin-1.
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', "")
+                            .encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b"").decode('latin-1'),
+        'SERVER_PROTOCOL': "HTTP/%s" % scope.get('http_version', "1.1"),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    server = scope.get('server')
+    if server is not None:
+        environ['SERVER_NAME'] = server[0]
+        environ['SERVER_PORT'] = str(server[1])
+    else:
+        environ['SERVER_NAME'] = 'localhost'
+        environ['SERVER_PORT'] = '80'
+    client = scope.get('client')
+    if client is not None:
+        environ['REMOTE_ADDR'] = client[0]
+        environ['REMOTE_PORT'] = str(client[1])
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        if name != 'CONTENT_TYPE':
+            name = 'HTTP_'+name
+        if name in environ:
+            value = environ[name]+","+value
+        environ[name] = value
+    return environ
+
+
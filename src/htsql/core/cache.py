@@ -30,10 +30,86 @@ class GeneralCache:
             self.values[key] = value
 
 
+class CacheItem:
+
+    __slots__ = ('prev', 'next', 'key', 'value')
+
+    def __init__(self, prev, next, key, value):
+        self.prev = prev
+        self.next = next
+        self.key = key
+        self.value = value
+
+
+class LRUCache:
+
+    __slots__ = ('head', 'tail', 'items', 'size')
+
+    def __init__(self, size):
+        self.head = None
+        self.tail = None
+        self.items = {}
+        self.size = size
+
+    def __getitem__(self, key):
+        item = self.items[key]
+        if item.prev is not None:
+            item.prev.next = item.next
+            if item.next is not None:
+                item.next.prev = item.prev
+            else:
+                self.tail = item.prev
+            item.prev = None
+            item.next = self.head
+            self.head.prev = item
+            self.head = item
+        return item.value
+
+    def __setitem__(self, key, value):
+        try:
+            self.items[key].value = value
+        except KeyError:
+            item = CacheItem(None, self.head, key, value)
+            if self.head is not None:
+                self.head.prev = item
+            else:
+                self.tail = item
+            self.head = item
+            self.items[key] = item
+            if len(self.items) > self.size:
+                del self.items[self.tail.key]
+                self.tail.prev.next = None
+                self.tail = self.tail.prev
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        # From the least to the most recently used key.
+        item = self.tail
+        while item is not None:
+            yield item.key
+            item = item.prev
+
+    def peek(self, key):
+        # Gets the value without updating the usage order.
+        return self.items[key].value
+
+
+def current_cache():
+    # Returns the cache of the catalog generation serving the active
+    # request; the generation is fixed on first use so that the request
+    # is not affected when the application reloads the catalog.
+    env = context.env
+    if env.cache is None:
+        env.cache = context.app.htsql.cache
+    return env.cache
+
+
 def once(service):
     @functools.wraps(service)
     def wrapper(*args, **kwds):
-        cache = context.app.htsql.cache
+        cache = current_cache()
         key = (service.__module__, service.__name__) + args
         try:
             return cache.values[key]
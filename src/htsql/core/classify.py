@@ -4,13 +4,13 @@
 
 
 from .util import to_name
-from .context import context
-from .cache import once
-from .adapter import Adapter, adapt
+from .cache import once, current_cache
+from .adapter import Adapter, Utility, adapt
 from .model import (Node, Arc, Label, HomeNode, TableNode, TableArc, ChainArc,
-                    ColumnArc, SyntaxArc, AmbiguousArc)
+                    ColumnArc, SyntaxArc, InvalidArc, AmbiguousArc)
 from .entity import DirectJoin, ReverseJoin
 from .introspect import introspect
+import types
 
 
 normalize = to_name
@@ -359,10 +359,46 @@ def classify(node):
     return Classify.__invoke__(node)
 
 
+class LabelIndex:
+    """
+    Labels of a node indexed for name resolution.
+
+    `by_signature`: mapping ``(name, arity)`` -> :class:`Label`
+        Labels by name and number of parameters.
+
+    `by_arc`: mapping :class:`Arc` -> :class:`Arc`
+        Arcs of all labels; an arc equal to the key, but with
+        the attributes filled by classification.
+
+    `signatures`: ``frozenset`` of ``(name, arity)``
+        Signatures of all valid labels.
+    """
+
+    __slots__ = ('by_signature', 'by_arc', 'signatures')
+
+    def __init__(self, labels):
+        by_signature = {}
+        by_arc = {}
+        for label in labels:
+            by_signature[label.name, label.arity] = label
+            by_arc.setdefault(label.arc, label.arc)
+        self.by_signature = types.MappingProxyType(by_signature)
+        self.by_arc = types.MappingProxyType(by_arc)
+        self.signatures = frozenset(
+                (label.name, label.arity) for label in labels
+                if not isinstance(label.arc, InvalidArc))
+
+
+@once
+def index_labels(node):
+    assert isinstance(node, Node)
+    return LabelIndex(classify(node))
+
+
 @once
 def relabel(arc):
     assert isinstance(arc, Arc)
-    cache = context.app.htsql.cache
+    cache = current_cache()
     labels = classify(arc.origin)
     seen = set()
     labels_by_arc = {}
@@ -390,3 +426,20 @@ def localize(node):
     return Localize.__invoke__(node)
 
 
+class PrepareCatalog(Utility):
+    """
+    Prepares a new catalog generation before it is put to use.
+
+    The utility runs when the application reloads the catalog, with
+    the new generation active, so that requests served after the swap
+    find the structures derived from the catalog already built.  The
+    default implementation classifies the root node and every table
+    node; addons may extend it to build their own structures.
+    """
+
+    def __call__(self):
+        for label in classify(HomeNode()):
+            if isinstance(label.arc, TableArc):
+                classify(TableNode(label.arc.table))
+
+
@@ -11,7 +11,7 @@ from .summon import recognize
 from .embed import embed
 from ..syn.parse import parse
 from ..syn.syntax import Syntax
-from ..fmt.emit import emit, emit_headers
+from ..fmt.emit import emit, emit_headers, emit_batch
 from ..fmt.accept import accept
 
 
@@ -88,7 +88,7 @@ class RenderFormat(Act):
 
     def __call__(self):
         format = self.command.format
-        product = produce(self.command.feed)
+        product = produce_for(format, self.command.feed)
         status = "200 OK"
         headers = emit_headers(format, product)
         body = emit(format, product)
@@ -105,7 +105,7 @@ class RenderProducer(Act):
 
     def __call__(self):
         format = accept(self.action.environ)
-        product = produce(self.command)
+        product = produce_for(format, self.command)
         status = "200 OK"
         headers = emit_headers(format, product)
         body = emit(format, product)
@@ -127,6 +127,15 @@ def produce(command, environment=None, **parameters):
     return act(command, action)
 
 
+def produce_for(format, command):
+    # Produces data for the given output format.
+    batch = emit_batch(format)
+    if batch is None:
+        return produce(command)
+    action = ProduceAction(embed(None), batch=batch)
+    return act(command, action)
+
+
 def safe_produce(command, cut, offset=None, environment=None, **parameters):
     environment = embed(environment, **parameters)
     action = SafeProduceAction(environment, cut, offset)
@@ -8,7 +8,7 @@ from .command import FetchCmd, SkipCmd, SQLCmd
 from .act import (analyze, Act, ProduceAction, SafeProduceAction,
                   AnalyzeAction, RenderAction)
 from ..domain import Product
-from ..tr.translate import translate
+from ..tr.translate import translate, translate_sql
 from ..tr.decorate import decorate_void
 
 
@@ -34,8 +34,8 @@ class AnalyzeFetch(Act):
     adapt(FetchCmd, AnalyzeAction)
 
     def __call__(self):
-        pipe = translate(self.command.syntax, self.action.environment)
-        return pipe
+        plan = translate_sql(self.command.syntax, self.action.environment)
+        return plan
 
 
 class ProduceSkip(Act):
@@ -52,12 +52,12 @@ class RenderSQL(Act):
     adapt(SQLCmd, RenderAction)
 
     def __call__(self):
-        pipe = analyze(self.command.feed)
+        plan = analyze(self.command.feed)
         status = '200 OK'
         headers = [('Content-Type', 'text/plain; charset=UTF-8')]
         body = []
-        if 'sql' in pipe.properties:
-            body.append(pipe.properties['sql'].encode('utf-8'))
+        if plan.sql:
+            body.append(plan.sql.encode('utf-8'))
         return (status, headers, body)
 
 
@@ -10,7 +10,7 @@ from ..syn.syntax import (Syntax, SkipSyntax, FunctionSyntax, PipeSyntax,
         ApplySyntax, CollectSyntax)
 from ..syn.parse import parse
 from ..fmt.format import (TextFormat, HTMLFormat, RawFormat, JSONFormat,
-        CSVFormat, TSVFormat, XMLFormat)
+        NDJSONFormat, CSVFormat, TSVFormat, XMLFormat)
 from .command import SkipCmd, FetchCmd, FormatCmd, SQLCmd, DefaultCmd
 
 
@@ -136,6 +136,12 @@ class SummonJSON(SummonFormat):
     format = JSONFormat
 
 
+class SummonNDJSON(SummonFormat):
+
+    call('ndjson')
+    format = NDJSONFormat
+
+
 class SummonCSV(SummonFormat):
 
     call('csv')
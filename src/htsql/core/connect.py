@@ -121,6 +121,16 @@ class ConnectionProxy:
         with self.guard:
             return self.connection.close()
 
+    def cancel(self):
+        """
+        Cancel the statement being executed over the connection.
+
+        Unlike other methods, this one could be called from a thread
+        other than the one executing the statement.
+        """
+        with self.guard:
+            return cancel(self.connection)
+
     def invalidate(self):
         self.is_valid = False
 
@@ -313,6 +323,25 @@ class Connect(Utility):
         raise NotImplementedError()
 
 
+class Cancel(Utility):
+    """
+    Interrupts the statement executed over a DBAPI connection.
+
+    The default implementation relies on the ``cancel()`` method
+    provided by some drivers; override it for other drivers.
+
+    `connection`
+        A raw DBAPI connection object.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self):
+        if hasattr(self.connection, 'cancel'):
+            self.connection.cancel()
+
+
 class Scramble(Adapter):
 
     adapt(Domain)
@@ -343,6 +372,57 @@ class Unscramble(Adapter):
         return self.convert
 
 
+class UnscrambleColumn(Adapter):
+    """
+    Converts a column of values fetched from the database.
+
+    The adapter returns a function that takes a sequence of raw values
+    of the given domain and returns a list of converted values.  The
+    default implementation applies :class:`Unscramble` to each value;
+    engines may convert the whole column at once, e.g., to parse
+    a repeated value only once.
+    """
+
+    adapt(Domain)
+
+    def __init__(self, domain):
+        self.domain = domain
+
+    def __call__(self):
+        convert = unscramble(self.domain)
+        def convert_column(values, convert=convert):
+            return list(map(convert, values))
+        return convert_column
+
+
+def cache_column(convert, types=(str,)):
+    """
+    Makes a column conversion function that converts each distinct
+    value once.
+
+    `convert`: ``object -> object``
+        Converts a single value.
+
+    `types`: tuple of types
+        Values of these types are cached; other values are passed to
+        `convert` as is.
+    """
+    def convert_column(values, convert=convert, types=types):
+        cache = {}
+        output = []
+        for value in values:
+            if type(value) in types:
+                try:
+                    item = cache[value]
+                except KeyError:
+                    item = cache[value] = convert(value)
+            else:
+                item = convert(value)
+            output.append(item)
+        return output
+    return convert_column
+
+
 class UnscrambleError(Utility):
 
     def __init__(self, error):
@@ -389,8 +469,10 @@ class TransactionGuard:
 
 
 connect = Connect.__invoke__
+cancel = Cancel.__invoke__
 scramble = Scramble.__invoke__
 unscramble = Unscramble.__invoke__
+unscramble_column = UnscrambleColumn.__invoke__
 unscramble_error = UnscrambleError.__invoke__
 transaction = Transact.__invoke__
 
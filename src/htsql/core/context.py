@@ -7,37 +7,50 @@
 :mod:`htsql.core.context`
 =========================
 
-This module keeps the active HTSQL application in a thread-local variable.
+This module keeps the active HTSQL application in a context variable.
 
 This module exports one global variable:
 
 `context` (:class:`ThreadContext`)
-    A thread-local variable that holds the active application.
+    Holds the active application and environment.
 """
 
 
-import threading
+import contextvars
 
 
-class ThreadContext(threading.local):
+class ThreadContext:
     """
     Keeps the active HTSQL application and environment.
+
+    The state is stored in a :mod:`contextvars` variable, so each thread,
+    and each :mod:`asyncio` task, has its own active application.  To
+    run a function in another thread with the same application, use
+    :func:`contextvars.copy_context`.
     """
 
     def __init__(self):
-        self.active_app = None
-        self.active_env = None
-        self.stack = []
+        # The value is a triple `(app, env, parent)`, where `parent`
+        # is the previous value or `None`.
+        self.state = contextvars.ContextVar('htsql.context',
+                                            default=(None, None, None))
+
+    @property
+    def active_app(self):
+        return self.state.get()[0]
+
+    @property
+    def active_env(self):
+        return self.state.get()[1]
 
     def push(self, app, env):
-        self.stack.append((self.active_app, self.active_env))
-        self.active_app = app
-        self.active_env = env
+        self.state.set((app, env, self.state.get()))
 
     def pop(self, app):
-        assert app is self.active_app
-        assert self.stack
-        self.active_app, self.active_env = self.stack.pop()
+        active_app, active_env, parent = self.state.get()
+        assert app is active_app
+        assert parent is not None
+        self.state.set(parent)
 
     @property
     def app(self):
@@ -47,15 +60,17 @@ class ThreadContext(threading.local):
         This property never returns ``None``; when there is no active
         application, it raises an exception.
         """
-        if self.active_app is None:
+        app = self.state.get()[0]
+        if app is None:
             raise RuntimeError("HTSQL application is not activated")
-        return self.active_app
+        return app
 
     @property
     def env(self):
-        if self.active_env is None:
+        env = self.state.get()[1]
+        if env is None:
             raise RuntimeError("HTSQL environment is not activated")
-        return self.active_env
+        return env
 
 
 context = ThreadContext()
@@ -17,8 +17,11 @@ import weakref
 
 
 class Entity(Printable):
+    # Frozen entities are compared by their definition, so that the same
+    # table introspected twice produces equal entities; mutable entities
+    # are compared by identity.
 
-    __slots__ = ('owner',)
+    __slots__ = ('owner', '_signature', '_hash')
 
     is_frozen = True
 
@@ -26,10 +29,31 @@ class Entity(Printable):
         assert not self.is_frozen
         assert isinstance(owner, weakref.ref) and isinstance(owner(), Entity)
         self.owner = owner
+        self._signature = None
+        self._hash = None
 
     def freeze(self):
         pass
 
+    def sign(self, signature, hash):
+        # Sets the definition of a frozen entity.
+        assert self.is_frozen
+        self._signature = signature
+        self._hash = hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__ or self._signature is None:
+            return False
+        return (self._hash == other._hash and
+                self._signature == other._signature)
+
+    def __hash__(self):
+        if self._signature is None:
+            return object.__hash__(self)
+        return self._hash
+
     def __str__(self):
         return "[%s]" % id(self)
 
@@ -88,30 +112,39 @@ class EntitySet(Printable):
         return len(self.entities)
 
     def get(self, name, default=None):
-        index = self.index_by_name
+        index = self.index_by_name.get(name)
         if index is not None:
             return self.entities[index]
         return default
 
     def keys(self):
-        return [entity.name for entity in self.entities]
+        return [entity.name for entity in self]
 
     def values(self):
-        return self.entities[:]
+        return list(self)
 
     def items(self):
-        return [(entity.name, entity) for entity in self.entities]
+        return [(entity.name, entity) for entity in self]
 
     def __str__(self):
-        return "[%s]" % ", ".join(entity.name for entity in self.entities)
+        return "[%s]" % ", ".join(entity.name for entity in self)
 
 
 class MutableEntitySet(EntitySet):
+    # Removed entities leave a `None` hole in `entities` so that removal
+    # does not shift the indexes of the remaining entities; the holes
+    # are compacted when the set is frozen.
 
     __slots__ = ()
 
     is_frozen = False
 
+    def __iter__(self):
+        return (entity for entity in self.entities if entity is not None)
+
+    def __len__(self):
+        return len(self.index_by_name)
+
     def add(self, entity):
         assert isinstance(entity, NamedEntity)
         if entity.name in self.index_by_name:
@@ -122,14 +155,16 @@ class MutableEntitySet(EntitySet):
     def remove(self, entity):
         assert isinstance(entity, NamedEntity)
         assert entity.name in self.index_by_name
-        idx = self.index_by_name[entity.name]
+        idx = self.index_by_name.pop(entity.name)
         assert self.entities[idx] is entity
-        del self.entities[idx]
-        del self.index_by_name[entity.name]
-        for entity in self.entities[idx:]:
-            self.index_by_name[entity.name] -= 1
+        self.entities[idx] = None
 
     def freeze(self):
+        if len(self.entities) != len(self.index_by_name):
+            self.entities = list(self)
+            self.index_by_name = dict((entity.name, idx)
+                                      for idx, entity
+                                            in enumerate(self.entities))
         for entity in self.entities:
             entity.freeze()
         self.__class__ = EntitySet
@@ -166,12 +201,150 @@ class MutableCatalogEntity(CatalogEntity, MutableEntity):
     def add_schema(self, name, priority=0):
         return MutableSchemaEntity(self, name, priority)
 
+    def remove_tables(self, tables):
+        # Removes a collection of tables together with their columns
+        # and keys.  Unlike calling `remove()` on each table, every
+        # affected key list is filtered only once.
+        tables = set(tables)
+        if not tables:
+            return
+        unique_keys = []
+        foreign_keys = []
+        for table in tables:
+            assert isinstance(table, MutableTableEntity)
+            assert table.schema.catalog is self
+            unique_keys.extend(table.unique_keys)
+            foreign_keys.extend(table.foreign_keys)
+            foreign_keys.extend(table.referring_foreign_keys)
+        self.remove_unique_keys(unique_keys)
+        self.remove_foreign_keys(foreign_keys)
+        for table in tables:
+            for column in list(table.columns):
+                table.columns.remove(column)
+                MutableEntity.remove(column)
+            table.schema.tables.remove(table)
+            MutableEntity.remove(table)
+
+    def remove_columns(self, columns):
+        # Removes a collection of columns together with the keys
+        # that contain them.
+        columns = set(columns)
+        if not columns:
+            return
+        tables = set()
+        for column in columns:
+            assert isinstance(column, MutableColumnEntity)
+            tables.add(column.table)
+        unique_keys = []
+        foreign_keys = []
+        for table in tables:
+            assert table.schema.catalog is self
+            unique_keys.extend(
+                    unique_key
+                    for unique_key in table.unique_keys
+                    if not columns.isdisjoint(unique_key.origin_columns))
+            foreign_keys.extend(
+                    foreign_key
+                    for foreign_key in table.foreign_keys
+                    if not columns.isdisjoint(foreign_key.origin_columns))
+            foreign_keys.extend(
+                    foreign_key
+                    for foreign_key in table.referring_foreign_keys
+                    if not columns.isdisjoint(foreign_key.target_columns))
+        self.remove_unique_keys(unique_keys)
+        self.remove_foreign_keys(foreign_keys)
+        for column in columns:
+            column.table.columns.remove(column)
+            MutableEntity.remove(column)
+
+    def remove_unique_keys(self, unique_keys):
+        # Removes a collection of unique keys.
+        unique_keys = set(unique_keys)
+        if not unique_keys:
+            return
+        tables = set()
+        for unique_key in unique_keys:
+            assert isinstance(unique_key, MutableUniqueKeyEntity)
+            tables.add(unique_key.origin)
+        for table in tables:
+            table.unique_keys[:] = [unique_key
+                                    for unique_key in table.unique_keys
+                                    if unique_key not in unique_keys]
+            if table.primary_key in unique_keys:
+                table.primary_key = None
+        for unique_key in unique_keys:
+            MutableEntity.remove(unique_key)
+
+    def remove_foreign_keys(self, foreign_keys):
+        # Removes a collection of foreign keys.
+        foreign_keys = set(foreign_keys)
+        if not foreign_keys:
+            return
+        origins = set()
+        targets = set()
+        for foreign_key in foreign_keys:
+            assert isinstance(foreign_key, MutableForeignKeyEntity)
+            origins.add(foreign_key.origin)
+            targets.add(foreign_key.target)
+        for table in origins:
+            table.foreign_keys[:] = [foreign_key
+                                     for foreign_key in table.foreign_keys
+                                     if foreign_key not in foreign_keys]
+        for table in targets:
+            table.referring_foreign_keys[:] = [
+                    foreign_key
+                    for foreign_key in table.referring_foreign_keys
+                    if foreign_key not in foreign_keys]
+        for foreign_key in foreign_keys:
+            MutableEntity.remove(foreign_key)
+
     def freeze(self):
         self.schemas.freeze()
         self.__class__ = CatalogEntity
+        for schema in self.schemas:
+            schema.sign((schema.name,), hash(schema.name))
+            for table in schema.tables:
+                definition = (
+                    tuple((column.name, column.domain,
+                           column.is_nullable, column.has_default)
+                          for column in table.columns),
+                    tuple((tuple(column.name
+                                 for column in unique_key.origin_columns),
+                           unique_key.is_primary, unique_key.is_partial)
+                          for unique_key in table.unique_keys),
+                    tuple((tuple(column.name
+                                 for column in foreign_key.origin_columns),
+                           foreign_key.target.schema.name,
+                           foreign_key.target.name,
+                           tuple(column.name
+                                 for column in foreign_key.target_columns),
+                           foreign_key.is_partial)
+                          for foreign_key in table.foreign_keys))
+                signature = (schema.name, table.name, definition)
+                table.sign(signature, hash(signature))
+                for column in table.columns:
+                    column.sign((signature, column.name),
+                                hash((table._hash, column.name)))
+        for schema in self.schemas:
+            for table in schema.tables:
+                for unique_key in table.unique_keys:
+                    names = tuple(column.name
+                                  for column in unique_key.origin_columns)
+                    unique_key.sign((table._signature, names),
+                                    hash((table._hash, names)))
+                for foreign_key in table.foreign_keys:
+                    names = (tuple(column.name
+                                   for column in foreign_key.origin_columns),
+                             tuple(column.name
+                                   for column in foreign_key.target_columns))
+                    target = foreign_key.target
+                    foreign_key.sign((table._signature, target._signature)
+                                     + names,
+                                     hash((table._hash, target._hash)
+                                          + names))
 
     def remove(self):
-        for schema in reversed(self.schemas):
+        for schema in reversed(list(self.schemas)):
             schema.remove()
         super(MutableCatalogEntity, self).remove()
 
@@ -226,8 +399,7 @@ class MutableSchemaEntity(SchemaEntity, MutableEntity):
         self.__class__ = SchemaEntity
 
     def remove(self):
-        for table in reversed(list(self.tables)):
-            table.remove()
+        self.catalog.remove_tables(self.tables)
         self.catalog.schemas.remove(self)
         super(MutableSchemaEntity, self).remove()
 
@@ -302,19 +474,10 @@ class MutableTableEntity(TableEntity, MutableEntity):
         self.__class__ = TableEntity
 
     def remove(self):
-        for unique_key in list(self.unique_keys):
-            unique_key.remove()
-        for foreign_key in list(self.foreign_keys):
-            foreign_key.remove()
-        for foreign_key in list(self.referring_foreign_keys):
-            foreign_key.remove()
-        for column in reversed(list(self.columns)):
-            column.remove()
-        self.schema.tables.remove(self)
-        super(MutableTableEntity, self).remove()
+        self.schema.catalog.remove_tables([self])
 
 
-class ColumnEntity(NamedEntity, MutableEntity):
+class ColumnEntity(NamedEntity):
 
     __slots__ = ('domain', 'is_nullable', 'has_default')
 
@@ -382,14 +545,7 @@ class MutableColumnEntity(ColumnEntity, MutableEntity):
         self.__class__ = ColumnEntity
 
     def remove(self):
-        for unique_key in self.unique_keys:
-            unique_key.remove()
-        for foreign_key in self.foreign_keys:
-            foreign_key.remove()
-        for foreign_key in self.referring_foreign_keys:
-            foreign_key.remove()
-        self.table.columns.remove(self)
-        super(MutableColumnEntity, self).remove()
+        self.table.schema.catalog.remove_columns([self])
 
 
 class UniqueKeyEntity(Entity):
@@ -468,10 +624,7 @@ class MutableUniqueKeyEntity(UniqueKeyEntity, MutableEntity):
         self.__class__ = UniqueKeyEntity
 
     def remove(self):
-        self.origin.unique_keys.remove(self)
-        if self.is_primary:
-            self.origin.primary_key = None
-        super(MutableUniqueKeyEntity, self).remove()
+        self.origin.schema.catalog.remove_unique_keys([self])
 
 
 class ForeignKeyEntity(Entity):
@@ -539,9 +692,7 @@ class MutableForeignKeyEntity(ForeignKeyEntity, MutableEntity):
         self.__class__ = ForeignKeyEntity
 
     def remove(self):
-        self.origin.foreign_keys.remove(self)
-        self.target.referring_foreign_keys.remove(self)
-        super(MutableForeignKeyEntity, self).remove()
+        self.origin.schema.catalog.remove_foreign_keys([self])
 
 
 class Join(Printable, Hashable):
@@ -726,3 +877,26 @@ def make_catalog():
     return MutableCatalogEntity()
 
 
+def find_entities(value):
+    """
+    Returns the set of catalog entities referred to by the given value.
+
+    `value` is a nested structure of tuples, lists and
+    :class:`htsql.core.util.Hashable` objects.
+    """
+    entities = set()
+    seen = set()
+    queue = [value]
+    while queue:
+        value = queue.pop()
+        if isinstance(value, Entity):
+            entities.add(value)
+        elif isinstance(value, (tuple, list, frozenset)):
+            queue.extend(value)
+        elif isinstance(value, Hashable):
+            if id(value) not in seen:
+                seen.add(id(value))
+                queue.append(value.__basis__())
+    return entities
+
+
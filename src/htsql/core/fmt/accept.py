@@ -5,7 +5,8 @@
 
 from ..adapter import Protocol, call
 from .format import (DefaultFormat, HTMLFormat, RawFormat, JSONFormat,
-        CSVFormat, TSVFormat, XMLFormat, ProxyFormat, TextFormat)
+        NDJSONFormat, CSVFormat, TSVFormat, XMLFormat, ProxyFormat,
+        TextFormat)
 
 
 class Accept(Protocol):
@@ -39,6 +40,13 @@ class AcceptJSON(Accept):
     format = JSONFormat
 
 
+class AcceptNDJSON(Accept):
+
+    call("application/x-ndjson",
+         "x-htsql/ndjson")
+    format = NDJSONFormat
+
+
 class AcceptCSV(Accept):
 
     call("text/csv",
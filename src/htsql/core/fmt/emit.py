@@ -4,6 +4,9 @@
 
 
 from ..adapter import Adapter, adapt
+from ..context import context
+from ..cache import current_cache, LRUCache
+from ..domain import ListDomain, RecordDomain
 from .format import Format, DefaultFormat, TextFormat, ProxyFormat
 from .accept import Accept
 import itertools
@@ -37,6 +40,26 @@ class Emit(Adapter):
         raise NotImplementedError()
 
 
+class EmitBatch(Adapter):
+    """
+    Tells how the data should be fetched for the given format.
+
+    Returns the number of rows to fetch from the database at a time,
+    or ``None`` if the whole output is to be loaded into memory.  With
+    a batch size set, rows are buffered in a temporary file and the
+    product data is an iterator, which lets the output be produced at
+    constant memory.
+    """
+
+    adapt(Format)
+
+    def __init__(self, format):
+        self.format = format
+
+    def __call__(self):
+        return None
+
+
 class EmitDefaultHeaders(EmitHeaders):
 
     adapt(DefaultFormat)
@@ -73,6 +96,14 @@ class EmitProxy(Emit):
         return emit(self.format.format, self.product)
 
 
+class EmitProxyBatch(EmitBatch):
+
+    adapt(ProxyFormat)
+
+    def __call__(self):
+        return emit_batch(self.format.format)
+
+
 def emit_headers(format, product):
     if isinstance(format, str):
         format = Accept.__invoke__(format)
@@ -80,6 +111,51 @@ def emit_headers(format, product):
     return list(EmitHeaders.__invoke__(format, product))
 
 
+def emit_batch(format):
+    if isinstance(format, str):
+        format = Accept.__invoke__(format)
+        assert not isinstance(format, DefaultFormat), "unknown format"
+    return EmitBatch.__invoke__(format)
+
+
+def get_formatter(make, profile, *args, key=None):
+    # Finds or builds a formatter for the given output structure.
+    # Formatters depend only on the structure of the output, not on the
+    # data, so they are kept in an LRU cache next to cached query plans.
+    # By default, the structure is identified by domains and headers.
+    cache = current_cache()
+    if key is None:
+        key = header_key(profile)
+    key = (make, key) + args
+    with cache.lock(get_formatter):
+        try:
+            return cache.values[get_formatter][key]
+        except KeyError:
+            pass
+    formatter = make(profile, *args)
+    size = context.app.htsql.query_cache_size
+    if size:
+        with cache.lock(get_formatter):
+            if get_formatter not in cache.values:
+                cache.values[get_formatter] = LRUCache(size=size)
+            cache.values[get_formatter][key] = formatter
+    return formatter
+
+
+def header_key(profile):
+    # Domains and headers of the profile and all nested fields.
+    return (profile.header, profile.domain,
+            domain_header_key(profile.domain))
+
+
+def domain_header_key(domain):
+    if isinstance(domain, ListDomain):
+        return domain_header_key(domain.item_domain)
+    if isinstance(domain, RecordDomain):
+        return tuple(header_key(field) for field in domain.fields)
+    return None
+
+
 def emit(format, product):
     if isinstance(format, str):
         format = Accept.__invoke__(format)
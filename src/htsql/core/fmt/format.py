@@ -18,14 +18,23 @@ class DefaultFormat(Format):
 
 class RawFormat(Format):
 
-    def __init__(self, with_null=False):
+    def __init__(self, with_null=False, with_indent=True):
         self.with_null = with_null
+        self.with_indent = with_indent
 
 
 class JSONFormat(Format):
 
-    def __init__(self, with_null=False):
+    def __init__(self, with_null=False, with_indent=True):
         self.with_null = with_null
+        self.with_indent = with_indent
+
+
+class NDJSONFormat(Format):
+
+    def __init__(self, with_null=False, batch=1024):
+        self.with_null = with_null
+        self.batch = batch
 
 
 class CSVFormat(Format):
@@ -42,11 +51,15 @@ class TSVFormat(CSVFormat):
 
 
 class HTMLFormat(Format):
-    pass
+
+    def __init__(self, batch=None):
+        self.batch = batch
 
 
 class TextFormat(Format):
-    pass
+
+    def __init__(self, window=None):
+        self.window = window
 
 
 class XMLFormat(Format):
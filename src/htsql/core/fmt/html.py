@@ -14,7 +14,8 @@ This module implements the HTML renderer.
 from ..util import listof, tupleof, maybe, Printable
 from ..adapter import Adapter, adapt, adapt_many
 from .format import HTMLFormat
-from .emit import EmitHeaders, Emit
+from .emit import EmitHeaders, Emit, EmitBatch, get_formatter
+from ..cache import once
 from ..error import Error, InternalServerError, Mark
 from ..domain import (Domain, BooleanDomain, NumberDomain, DecimalDomain,
         FloatDomain, TextDomain, EnumDomain, DateDomain, TimeDomain,
@@ -24,6 +25,7 @@ import pkg_resources
 import html
 import re
 import decimal
+import itertools
 
 
 class Block(Printable):
@@ -321,28 +323,52 @@ class EmitHTMLHeaders(EmitHeaders):
         yield ('Content-Type', 'text/html; charset=UTF-8')
 
 
+class EmitHTMLBatch(EmitBatch):
+
+    adapt(HTMLFormat)
+
+    def __call__(self):
+        return self.format.batch
+
+
 class EmitHTML(Emit):
 
     adapt(HTMLFormat)
 
     def __call__(self):
-        product_to_html = profile_to_html(self.meta)
+        product_to_html = get_formatter(profile_to_html, self.meta)
         headers_height = product_to_html.headers_height()
-        cells_height = product_to_html.cells_height(self.data)
+        data = self.data
+        if isinstance(self.meta.domain, ListDomain):
+            # Top-level rows are measured one at a time, right before
+            # they are rendered, so we only need to know if there are any.
+            items = iter(data or [])
+            for item in items:
+                data = itertools.chain([item], items)
+                is_empty = False
+                break
+            else:
+                is_empty = True
+            cells_height = None
+            layout = None
+        else:
+            layout = product_to_html.layout(data)
+            cells_height = layout[0]
+            is_empty = (cells_height == 0)
         if self.meta.header:
             title = html.escape(self.meta.header, True)
         else:
             title = ""
         content = None
-        if headers_height or cells_height:
-            content = self.table(product_to_html,
-                                 headers_height, cells_height, title)
-        stream = pkg_resources.resource_stream(__name__,
-                                               "static/template.html")
-        template = Template(stream)
+        if headers_height or not is_empty:
+            content = self.table(product_to_html, data, layout,
+                                 headers_height, cells_height, is_empty,
+                                 title)
+        template = get_template()
         return template(title=title, content=content)
 
-    def table(self, product_to_html, headers_height, cells_height, title):
+    def table(self, product_to_html, data, layout,
+              headers_height, cells_height, is_empty, title):
         yield "<table class=\"htsql-output\" summary=\"%s\">\n" % title
         if headers_height > 0:
             yield "<thead>\n"
@@ -361,10 +387,10 @@ class EmitHTML(Emit):
                                                     html.escape(content)))
                 yield "<tr>%s</tr>\n" % "".join(line)
             yield "</thead>\n"
-        if cells_height > 0:
+        if not is_empty:
             yield "<tbody>\n"
             index = 0
-            for row in product_to_html.cells(self.data, cells_height):
+            for row in product_to_html.cells(data, cells_height, layout):
                 line = []
                 for content, colspan, rowspan, classes in row:
                     attributes = []
@@ -409,7 +435,7 @@ class ToHTML(Adapter):
     def headers_height(self):
         return 0
 
-    def cells(self, value, height):
+    def cells(self, value, height, layout):
         assert height > 0
         classes = []
         classes.append("htsql-%s-type" % self.domain.__class__)
@@ -422,8 +448,10 @@ class ToHTML(Adapter):
         classes.extend(self.classes(value))
         yield [(content, self.width, height, classes)]
 
-    def cells_height(self, value):
-        return 1
+    def layout(self, value):
+        # Returns the height of the value cells and the layouts
+        # of the nested values.
+        return (1, None)
 
     def classes(self, value):
         return []
@@ -440,8 +468,8 @@ class VoidToHTML(ToHTML):
         super(VoidToHTML, self).__init__(domain)
         self.width = 0
 
-    def cells_height(self, value):
-        return 0
+    def layout(self, value):
+        return (0, None)
 
 
 class RecordToHTML(ToHTML):
@@ -480,15 +508,16 @@ class RecordToHTML(ToHTML):
         return max(field_to_html.headers_height()
                    for field_to_html in self.fields_to_html)
 
-    def cells(self, value, height):
+    def cells(self, value, height, layout):
         if not self.width or not height:
             return
         if value is None:
             yield [("", 1, height, ["htsql-null-record-value"])]*self.width
         else:
-            streams = [field_to_html.cells(item, height)
-                       for item, field_to_html in zip(value,
-                                                      self.fields_to_html)]
+            item_layouts = layout[1]
+            streams = [field_to_html.cells(item, height, item_layout)
+                       for item, field_to_html, item_layout
+                            in zip(value, self.fields_to_html, item_layouts)]
             is_done = False
             while not is_done:
                 is_done = True
@@ -501,11 +530,14 @@ class RecordToHTML(ToHTML):
                 if not is_done:
                     yield row
 
-    def cells_height(self, value):
+    def layout(self, value):
         if not self.width or value is None:
-            return 0
-        return max(field_to_html.cells_height(item)
-                   for field_to_html, item in zip(self.fields_to_html, value))
+            return (0, None)
+        item_layouts = [field_to_html.layout(item)
+                        for field_to_html, item in zip(self.fields_to_html,
+                                                       value)]
+        height = max(item_height for item_height, parts in item_layouts)
+        return (height, item_layouts)
 
 
 class ListToHTML(ToHTML):
@@ -530,8 +562,10 @@ class ListToHTML(ToHTML):
     def headers_height(self):
         return self.item_to_html.headers_height()
 
-    def cells(self, value, height):
-        if not height:
+    def cells(self, value, height, layout):
+        # When `height` and `layout` are not known (the top-level rows),
+        # each item is measured when it is rendered.
+        if height == 0:
             return
         if not value:
             row = []
@@ -543,6 +577,9 @@ class ListToHTML(ToHTML):
             return
         items = iter(value)
         item = next(items)
+        item_layouts = None
+        if layout is not None:
+            item_layouts = iter(layout[1])
         is_last = False
         total_height = height
         index = 1
@@ -552,11 +589,17 @@ class ListToHTML(ToHTML):
             except StopIteration:
                 next_item = None
                 is_last = True
-            item_height = max(1, self.item_to_html.cells_height(item))
-            if is_last:
-                item_height = total_height
-            total_height -= item_height
-            item_stream = self.item_to_html.cells(item, item_height)
+            if item_layouts is not None:
+                item_layout = next(item_layouts)
+            else:
+                item_layout = self.item_to_html.layout(item)
+            item_height = max(1, item_layout[0])
+            if total_height is not None:
+                if is_last:
+                    item_height = total_height
+                total_height -= item_height
+            item_stream = self.item_to_html.cells(item, item_height,
+                                                  item_layout)
             first_row = next(item_stream, [])
             first_row.insert(0, (str(index), 1, item_height,
                                  ["htsql-index"]))
@@ -572,11 +615,13 @@ class ListToHTML(ToHTML):
             item = next_item
             index += 1
 
-    def cells_height(self, value):
+    def layout(self, value):
         if not value:
-            return 0
-        return sum(max(1, self.item_to_html.cells_height(item))
-                   for item in value)
+            return (0, None)
+        item_layouts = [self.item_to_html.layout(item) for item in value]
+        height = sum(max(1, item_height)
+                     for item_height, parts in item_layouts)
+        return (height, item_layouts)
 
 
 class NativeToHTML(ToHTML):
@@ -705,11 +750,17 @@ class MetaToHTML:
             height += 1
         return height
 
-    def cells(self, value, height):
-        return self.domain_to_html.cells(value, height)
+    def cells(self, value, height, layout):
+        return self.domain_to_html.cells(value, height, layout)
+
+    def layout(self, value):
+        return self.domain_to_html.layout(value)
+
 
-    def cells_height(self, value):
-        return self.domain_to_html.cells_height(value)
+@once
+def get_template():
+    stream = pkg_resources.resource_stream(__name__, "static/template.html")
+    return Template(stream)
 
 
 def to_html(domain):
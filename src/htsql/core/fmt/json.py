@@ -17,8 +17,10 @@ from ..domain import (Domain, BooleanDomain, NumberDomain, FloatDomain,
         TextDomain, EnumDomain, DateDomain, TimeDomain, DateTimeDomain,
         ListDomain, RecordDomain, IdentityDomain, UntypedDomain, VoidDomain,
         OpaqueDomain, Profile)
-from .format import RawFormat, JSONFormat
-from .emit import EmitHeaders, Emit
+from ..context import context
+from ..cache import current_cache, LRUCache
+from .format import RawFormat, JSONFormat, NDJSONFormat
+from .emit import EmitHeaders, Emit, EmitBatch, get_formatter
 import re
 import math
 import decimal
@@ -75,7 +77,14 @@ def escape_json(value,
     return escape_regexp.sub(replace, value)
 
 
-def dump_json(iterator):
+def dump_json(iterator, with_indent=True):
+    if with_indent:
+        indent = "  "
+        newline = "\n"
+        colon = ": "
+    else:
+        indent = newline = ""
+        colon = ":"
     states = []
     context = None
     prefix = ""
@@ -108,10 +117,10 @@ def dump_json(iterator):
                 line = "[]"
                 next_token = next(iterator, JS_DONE)
             else:
-                yield prefix+"[\n"
+                yield prefix+"["+newline
                 states.append(context)
                 context = token
-                prefix = "  "*len(states)
+                prefix = indent*len(states)
                 continue
         elif token is JS_MAP:
             if next_token is JS_END:
@@ -119,19 +128,19 @@ def dump_json(iterator):
                 next_token = next(iterator, JS_DONE)
             else:
                 assert isinstance(next_token, str), repr(next_token)
-                yield prefix+"{\n"
+                yield prefix+"{"+newline
                 states.append(context)
                 context = token
-                prefix = "  "*len(states) + \
-                         "\"%s\": " % escape_json(next_token)
+                prefix = indent*len(states) + \
+                         "\"%s\"%s" % (escape_json(next_token), colon)
                 next_token = next(iterator, JS_DONE)
                 continue
         else:
             assert False, repr(token)
         if next_token is not JS_END and next_token is not JS_DONE:
-            yield prefix+line+",\n"
+            yield prefix+line+","+newline
         else:
-            yield prefix+line+"\n"
+            yield prefix+line+newline
         while next_token is JS_END and states:
             next_token = next(iterator, JS_DONE)
             if context is JS_SEQ:
@@ -139,14 +148,15 @@ def dump_json(iterator):
             elif context is JS_MAP:
                 line = "}"
             context = states.pop()
-            prefix = "  "*len(states)
+            prefix = indent*len(states)
             if next_token is not JS_END and next_token is not JS_DONE:
-                yield prefix+line+",\n"
+                yield prefix+line+","+newline
             else:
-                yield prefix+line+"\n"
+                yield prefix+line+newline
         if context is JS_MAP:
             assert isinstance(next_token, str), repr(next_token)
-            prefix = "  "*len(states) + "\"%s\": " % escape_json(next_token)
+            prefix = indent*len(states) + \
+                     "\"%s\"%s" % (escape_json(next_token), colon)
             next_token = next(iterator, JS_DONE)
         if context is None:
             assert next_token is JS_DONE, repr(next_token)
@@ -177,22 +187,19 @@ class EmitRaw(Emit):
     adapt(RawFormat)
 
     def __call__(self):
-        tokens = self.emit()
-        if not self.format.with_null:
-            tokens = purge_null_keys(tokens)
-        return dump_json(tokens)
-
-    def emit(self):
-        meta = list(profile_to_raw(self.meta))
-        data = to_raw(self.meta.domain)(self.data)
-        yield JS_MAP
-        yield "meta"
-        for token in meta:
-            yield token
-        yield "data"
-        for token in data:
-            yield token
-        yield JS_END
+        with_indent = self.format.with_indent
+        with_null = self.format.with_null
+        head, separator, tail, colon = layout(0, with_indent)
+        meta = get_formatter(dump_meta, self.meta, with_indent, with_null,
+                             key=meta_key(self.meta))
+        start = "{" + head + "\"meta\"" + colon + meta
+        end = tail + "}\n"
+        if self.data is None and not with_null:
+            return iter([start + end])
+        start += separator + "\"data\"" + colon
+        chunks = dump_chunks(EncodeRaw, self.meta.domain, self.data, 1,
+                             with_indent, with_null)
+        return wrap_chunks(start, chunks, end)
 
 
 class EmitJSON(Emit):
@@ -200,22 +207,75 @@ class EmitJSON(Emit):
     adapt(JSONFormat)
 
     def __call__(self):
-        tokens = self.emit()
-        if not self.format.with_null:
-            tokens = purge_null_keys(tokens)
-        return dump_json(tokens)
-
-    def emit(self):
-        product_to_json = to_json(self.meta.domain)
+        with_indent = self.format.with_indent
+        with_null = self.format.with_null
+        head, separator, tail, colon = layout(0, with_indent)
         if self.meta.tag:
             key = self.meta.tag
         else:
             key = str(0)
-        yield JS_MAP
-        yield key
-        for token in product_to_json(self.data):
-            yield token
-        yield JS_END
+        if self.data is None and not with_null:
+            return iter(["{}\n"])
+        start = "{" + head + "\"%s\"%s" % (escape_json(key), colon)
+        end = tail + "}\n"
+        chunks = dump_chunks(EncodeJSON, self.meta.domain, self.data, 1,
+                             with_indent, with_null)
+        return wrap_chunks(start, chunks, end)
+
+
+class EmitNDJSONHeaders(EmitHeaders):
+
+    adapt(NDJSONFormat)
+
+    def __call__(self):
+        filename = None
+        if self.meta.header:
+            filename = self.meta.header
+        if not filename:
+            filename = '_'
+        filename = filename.replace('\\', '\\\\').replace('"', '\\"')
+        yield ('Content-Type', 'application/x-ndjson')
+        yield ('Content-Disposition',
+               'inline; filename="%s.ndjson"' % filename)
+
+
+class EmitNDJSONBatch(EmitBatch):
+
+    adapt(NDJSONFormat)
+
+    def __call__(self):
+        return self.format.batch
+
+
+class EmitNDJSON(Emit):
+
+    adapt(NDJSONFormat)
+
+    def __call__(self):
+        # Emit every record of the output on a separate line; values
+        # which are not records are wrapped into an object.
+        with_null = self.format.with_null
+        domain = self.meta.domain
+        data = self.data
+        if isinstance(domain, ListDomain):
+            domain = domain.item_domain
+            if data is None:
+                data = []
+        else:
+            data = [data]
+        encode = get_encoder(EncodeJSON, domain, 0, False, with_null)
+        if not isinstance(domain, RecordDomain):
+            if self.meta.tag:
+                key = self.meta.tag
+            else:
+                key = str(0)
+            key = "\"%s\":" % escape_json(key)
+            encode_value = encode
+            def encode(value):
+                if value is None and not with_null:
+                    return "{}"
+                return "{%s%s}" % (key, encode_value(value))
+        return dump_lines(encode, data)
 
 
 class ToRaw(Adapter):
@@ -544,6 +604,379 @@ class ListToJSON(ToJSON):
             yield JS_END
 
 
+def layout(depth, with_indent):
+    # Returns separators for a container at the given nesting level:
+    # after the opening bracket, between items, before the closing
+    # bracket, and between a key and a value.
+    if with_indent:
+        head = "\n" + "  "*(depth+1)
+        return (head, "," + head, "\n" + "  "*depth, ": ")
+    return ("", ",", "", ":")
+
+
+def encode_string(value,
+                  search=re.compile(r"""[\x00-\x1F\\/"]""").search):
+    if search(value) is None:
+        return "\"%s\"" % value
+    return "\"%s\"" % escape_json(value)
+
+
+def encode_float(value):
+    if math.isinf(value) or math.isnan(value):
+        return "null"
+    return str(value)
+
+
+def encode_decimal(value):
+    if not value.is_finite():
+        return "null"
+    return str(value)
+
+
+def encode_scalar(value,
+                  encoders={type(None): (lambda value: "null"),
+                            bool: (lambda value: "true" if value
+                                                 else "false"),
+                            str: encode_string,
+                            int: str,
+                            float: encode_float,
+                            decimal.Decimal: encode_decimal}):
+    # Converts a native scalar value to JSON; must agree with `dump_json()`.
+    try:
+        return encoders[type(value)](value)
+    except KeyError:
+        pass
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, str):
+        return encode_string(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return encode_float(value)
+    if isinstance(value, decimal.Decimal):
+        return encode_decimal(value)
+    assert False, repr(value)
+
+
+class EncodeRaw(Adapter):
+    """
+    Compiles a function that converts a value to JSON text.
+
+    The function produces the same text as :func:`dump_json` would
+    produce from the output of :func:`to_raw`, but does not generate
+    intermediate tokens.
+
+    `domain`: :class:`.Domain`
+        The type of values.
+
+    `depth`: ``int``
+        The nesting level of values in the output.
+
+    `with_indent`: ``bool``
+        If not set, produce compact output.
+
+    `with_null`: ``bool``
+        If not set, omit object keys with ``null`` values.
+    """
+
+    adapt(Domain)
+
+    def __init__(self, domain, depth, with_indent, with_null):
+        assert isinstance(domain, Domain)
+        assert isinstance(depth, int) and depth >= 0
+        self.domain = domain
+        self.depth = depth
+        self.with_indent = with_indent
+        self.with_null = with_null
+        self.head, self.separator, self.tail, self.colon = \
+                layout(depth, with_indent)
+
+    def __call__(self):
+        return self.encode
+
+    def encode(self, value):
+        if value is None:
+            return "null"
+        return encode_scalar(self.domain.dump(value))
+
+
+class NativeEncodeRaw(EncodeRaw):
+
+    adapt_many(UntypedDomain,
+               BooleanDomain,
+               NumberDomain,
+               TextDomain,
+               EnumDomain)
+
+    def __call__(self):
+        return encode_scalar
+
+
+class NativeStringEncodeRaw(EncodeRaw):
+
+    adapt_many(DateDomain,
+               TimeDomain)
+
+    @staticmethod
+    def encode(value):
+        if value is None:
+            return "null"
+        return encode_string(str(value))
+
+
+class DateTimeEncodeRaw(EncodeRaw):
+
+    adapt(DateTimeDomain)
+
+    @staticmethod
+    def encode(value):
+        if value is None:
+            return "null"
+        elif not value.time():
+            return encode_string(str(value.date()))
+        else:
+            return encode_string(str(value))
+
+
+class OpaqueEncodeRaw(EncodeRaw):
+
+    adapt(OpaqueDomain)
+
+    @staticmethod
+    def encode(value):
+        if value is None:
+            return "null"
+        return encode_string(str(value))
+
+
+class RecordEncodeRaw(EncodeRaw):
+
+    adapt(RecordDomain)
+
+    def __init__(self, domain, depth, with_indent, with_null):
+        super(RecordEncodeRaw, self).__init__(
+                domain, depth, with_indent, with_null)
+        self.field_encoders = [encode_raw(field.domain, depth+1,
+                                          with_indent, with_null)
+                               for field in domain.fields]
+
+    def encode(self, value):
+        if value is None:
+            return "null"
+        if not self.field_encoders:
+            return "[]"
+        return "".join(["[", self.head,
+                        self.separator.join([
+                            encode(item)
+                            for item, encode in zip(value,
+                                                    self.field_encoders)]),
+                        self.tail, "]"])
+
+
+class ListEncodeRaw(EncodeRaw):
+
+    adapt(ListDomain)
+
+    def __init__(self, domain, depth, with_indent, with_null):
+        super(ListEncodeRaw, self).__init__(
+                domain, depth, with_indent, with_null)
+        self.item_encoder = encode_raw(domain.item_domain, depth+1,
+                                       with_indent, with_null)
+
+    def encode(self, value):
+        if value is None:
+            return "null"
+        if not value:
+            return "[]"
+        encode = self.item_encoder
+        return "".join(["[", self.head,
+                        self.separator.join([encode(item)
+                                             for item in value]),
+                        self.tail, "]"])
+
+
+class EncodeJSON(Adapter):
+    """
+    Compiles a function that converts a value to JSON text.
+
+    The function produces the same text as :func:`dump_json` would
+    produce from the output of :func:`to_json`.  Parameters are the
+    same as for :class:`EncodeRaw`.
+    """
+
+    adapt(Domain)
+
+    def __init__(self, domain, depth, with_indent, with_null):
+        assert isinstance(domain, Domain)
+        assert isinstance(depth, int) and depth >= 0
+        self.domain = domain
+        self.depth = depth
+        self.with_indent = with_indent
+        self.with_null = with_null
+        self.head, self.separator, self.tail, self.colon = \
+                layout(depth, with_indent)
+
+    def __call__(self):
+        return encode_raw(self.domain, self.depth,
+                          self.with_indent, self.with_null)
+
+
+class RecordEncodeJSON(EncodeJSON):
+
+    adapt(RecordDomain)
+
+    def __init__(self, domain, depth, with_indent, with_null):
+        super(RecordEncodeJSON, self).__init__(
+                domain, depth, with_indent, with_null)
+        self.field_encoders = [encode_json(field.domain, depth+1,
+                                           with_indent, with_null)
+                               for field in domain.fields]
+        self.field_keys = []
+        used = set()
+        for idx, field in enumerate(self.domain.fields):
+            if field.tag and field.tag not in used:
+                key = field.tag
+                used.add(key)
+            else:
+                key = str(idx)
+            self.field_keys.append("\"%s\"%s" % (escape_json(key),
+                                                 self.colon))
+
+    def __call__(self):
+        return self.encode
+
+    def encode(self, value):
+        if value is None:
+            return "null"
+        if self.with_null:
+            items = [key + encode(item)
+                     for item, encode, key in zip(value,
+                                                  self.field_encoders,
+                                                  self.field_keys)]
+        else:
+            items = [key + encode(item)
+                     for item, encode, key in zip(value,
+                                                  self.field_encoders,
+                                                  self.field_keys)
+                     if item is not None]
+        if not items:
+            return "{}"
+        return "".join(["{", self.head, self.separator.join(items),
+                        self.tail, "}"])
+
+
+class ListEncodeJSON(EncodeJSON):
+
+    adapt(ListDomain)
+
+    def __init__(self, domain, depth, with_indent, with_null):
+        super(ListEncodeJSON, self).__init__(
+                domain, depth, with_indent, with_null)
+        self.item_encoder = encode_json(domain.item_domain, depth+1,
+                                        with_indent, with_null)
+
+    def __call__(self):
+        return self.encode
+
+    def encode(self, value):
+        if value is None:
+            return "null"
+        if not value:
+            return "[]"
+        encode = self.item_encoder
+        return "".join(["[", self.head,
+                        self.separator.join([encode(item)
+                                             for item in value]),
+                        self.tail, "]"])
+
+
+def get_encoder(interface, domain, depth, with_indent, with_null):
+    # Finds or compiles an encoder for the given domain and layout; keeps
+    # compiled encoders in an LRU cache next to cached query plans.
+    cache = current_cache()
+    key = (interface, domain, depth, with_indent, with_null)
+    with cache.lock(get_encoder):
+        try:
+            return cache.values[get_encoder][key]
+        except KeyError:
+            pass
+    encoder = interface.__invoke__(domain, depth, with_indent, with_null)
+    size = context.app.htsql.query_cache_size
+    if size:
+        with cache.lock(get_encoder):
+            if get_encoder not in cache.values:
+                cache.values[get_encoder] = LRUCache(size=size)
+            cache.values[get_encoder][key] = encoder
+    return encoder
+
+
+def dump_chunks(interface, domain, value, depth, with_indent, with_null,
+                size=65536):
+    # Converts a value to JSON text; long lists are produced in chunks
+    # of approximately `size` characters.
+    if not (isinstance(domain, ListDomain) and value):
+        encode = get_encoder(interface, domain, depth,
+                             with_indent, with_null)
+        return iter([encode(value)])
+    encode = get_encoder(interface, domain.item_domain, depth+1,
+                         with_indent, with_null)
+    head, separator, tail, colon = layout(depth, with_indent)
+    return chunk_items(encode, value, "["+head, separator, tail+"]", size)
+
+
+def chunk_items(encode, items, head, separator, tail, size):
+    chunk = [head]
+    length = 0
+    is_first = True
+    for item in items:
+        if not is_first:
+            chunk.append(separator)
+        is_first = False
+        text = encode(item)
+        chunk.append(text)
+        length += len(text)
+        if length >= size:
+            yield "".join(chunk)
+            chunk = []
+            length = 0
+    chunk.append(tail)
+    yield "".join(chunk)
+
+
+def dump_lines(encode, items, size=65536):
+    # Converts each item to JSON text on a separate line; lines are
+    # produced in chunks of approximately `size` characters.
+    chunk = []
+    length = 0
+    for item in items:
+        line = encode(item)
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            chunk.append("")
+            yield "\n".join(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        chunk.append("")
+        yield "\n".join(chunk)
+
+
+def wrap_chunks(head, chunks, tail):
+    # Attaches `head` and `tail` to the first and the last chunks.
+    chunk = next(chunks)
+    chunk = head + chunk
+    for next_chunk in chunks:
+        yield chunk
+        chunk = next_chunk
+    yield chunk + tail
+
+
 def profile_to_raw(profile):
     yield JS_MAP
     for name in MetaToRaw.__catalogue__():
@@ -553,6 +986,34 @@ def profile_to_raw(profile):
     yield JS_END
 
 
+def dump_meta(profile, with_indent, with_null):
+    # The `meta` section of `/:raw` output, indented to nest in
+    # the top-level object.
+    head, separator, tail, colon = layout(0, with_indent)
+    meta = profile_to_raw(profile)
+    if not with_null:
+        meta = purge_null_keys(meta)
+    meta = "".join(dump_json(meta, with_indent)).rstrip("\n")
+    return meta.replace("\n", head)
+
+
+def meta_key(profile):
+    # All the profile attributes reported in the `meta` section.
+    syntax = path = None
+    if profile.syntax is not None:
+        syntax = str(profile.syntax)
+    if profile.path is not None:
+        path = tuple(profile.path)
+    domain = profile.domain
+    while isinstance(domain, ListDomain):
+        domain = domain.item_domain
+    fields = None
+    if isinstance(domain, RecordDomain):
+        fields = tuple(meta_key(field) for field in domain.fields)
+    return (syntax, profile.tag, profile.header, path, profile.domain,
+            fields)
+
+
 def domain_to_raw(domain):
     return DomainToRaw.__invoke__(domain)
 
@@ -565,3 +1026,11 @@ def to_json(domain):
     return ToJSON.__invoke__(domain)
 
 
+
+
+def encode_raw(domain, depth, with_indent, with_null):
+    return EncodeRaw.__invoke__(domain, depth, with_indent, with_null)
+
+
+def encode_json(domain, depth, with_indent, with_null):
+    return EncodeJSON.__invoke__(domain, depth, with_indent, with_null)
@@ -14,7 +14,7 @@ This module implements the CSV and TSV renderers.
 from ..util import listof
 from ..adapter import Adapter, adapt, adapt_many
 from .format import CSVFormat
-from .emit import EmitHeaders, Emit
+from .emit import EmitHeaders, Emit, get_formatter
 from ..domain import (Domain, BooleanDomain, NumberDomain, FloatDomain,
         DecimalDomain, TextDomain, EnumDomain, DateDomain, TimeDomain,
         DateTimeDomain, ListDomain, RecordDomain, UntypedDomain, VoidDomain,
@@ -56,7 +56,7 @@ class EmitCSV(Emit):
     adapt(CSVFormat)
 
     def __call__(self):
-        product_to_csv = to_csv(self.meta.domain, [self.meta])
+        product_to_csv = get_formatter(profile_to_csv, self.meta)
         if not product_to_csv.width:
             return
         headers = product_to_csv.headers()
@@ -285,3 +285,7 @@ class OpaqueToCSV(ToCSV):
 to_csv = ToCSV.__invoke__
 
 
+def profile_to_csv(profile):
+    return to_csv(profile.domain, [profile])
+
+
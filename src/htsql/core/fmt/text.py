@@ -15,7 +15,7 @@ from ..adapter import Adapter, adapt, adapt_many
 from ..util import maybe, oneof
 from ..context import context
 from .format import TextFormat
-from .emit import EmitHeaders, Emit
+from .emit import EmitHeaders, Emit, EmitBatch, get_formatter
 from ..domain import (Domain, BooleanDomain, NumberDomain, IntegerDomain,
         DecimalDomain, FloatDomain, TextDomain, EnumDomain, DateDomain,
         TimeDomain, DateTimeDomain, ListDomain, RecordDomain, UntypedDomain,
@@ -24,6 +24,7 @@ from ..tr.pipe import SQLPipe
 import re
 import decimal
 import datetime
+import itertools
 
 
 class EmitTextHeaders(EmitHeaders):
@@ -34,17 +35,55 @@ class EmitTextHeaders(EmitHeaders):
         yield ('Content-Type', 'text/plain; charset=UTF-8')
 
 
+class EmitTextBatch(EmitBatch):
+
+    adapt(TextFormat)
+
+    def __call__(self):
+        return self.format.window
+
+
 class EmitText(Emit):
 
     adapt(TextFormat)
 
     def __call__(self):
         addon = context.app.htsql
-        product_to_text = profile_to_text(self.meta)
+        product_to_text = get_formatter(profile_to_text, self.meta)
         size = product_to_text.size
         if size == 0:
             return
-        widths = product_to_text.widths(self.data)
+        # Cells are rendered once, and the rendered strings are used both
+        # to measure the columns and to produce the output.  In windowed
+        # mode, the output is split into pages; the header is repeated
+        # whenever a page needs wider columns than the previous one.
+        last_widths = None
+        for cells, widths in product_to_text.pages(self.data,
+                                                   self.format.window):
+            if widths != last_widths:
+                if last_widths is not None:
+                    yield "\n"
+                for line in self.head(product_to_text, widths):
+                    yield line
+                last_widths = widths
+            for line in self.body(product_to_text, cells, widths):
+                yield line
+        yield "\n"
+        if addon.debug and (self.meta.syntax or hasattr(self.product, 'sql')):
+            yield " ----\n"
+            if self.meta.syntax:
+                yield " %s\n" % self.meta.syntax
+            if hasattr(self.product, 'sql'):
+                sql = re.sub(r'[\0-\x09\x0b-\x1f\x7f]', '\ufffd',
+                             self.product.sql)
+                for line in sql.splitlines():
+                    if line:
+                        yield " %s\n" % line
+                    else:
+                        yield "\n"
+
+    def head(self, product_to_text, widths):
+        size = product_to_text.size
         depth = product_to_text.head_depth()
         head = product_to_text.head(depth)
         if depth > 0:
@@ -134,8 +173,9 @@ class EmitText(Emit):
                 line.append("-+-")
             line.append("\n")
             yield "".join(line)
-        body = product_to_text.body(self.data, widths)
-        for row in body:
+
+    def body(self, product_to_text, cells, widths):
+        for row in product_to_text.body(cells, widths):
             line = []
             is_last_solid = False
             for chunk, is_solid in row:
@@ -150,19 +190,6 @@ class EmitText(Emit):
             else:
                 line.append(" :\n")
             yield "".join(line)
-        yield "\n"
-        if addon.debug and (self.meta.syntax or hasattr(self.product, 'sql')):
-            yield " ----\n"
-            if self.meta.syntax:
-                yield " %s\n" % self.meta.syntax
-            if hasattr(self.product, 'sql'):
-                sql = re.sub(r'[\0-\x09\x0b-\x1f\x7f]', '\ufffd',
-                             self.product.sql)
-                for line in sql.splitlines():
-                    if line:
-                        yield " %s\n" % line
-                    else:
-                        yield "\n"
 
 
 class ToText(Adapter):
@@ -184,13 +211,14 @@ class ToText(Adapter):
             return
         yield [("", depth, self.size)]
 
-    def body(self, data, widths):
-        [width] = widths
+    def render(self, data):
+        # Returns the rendered cells and the column widths.
         cell = self.dump(data)
-        yield [("%*s" % (-width, cell), True)]
+        return cell, [len(cell)]
 
-    def widths(self, data):
-        return [len(self.dump(data))]
+    def body(self, cells, widths):
+        [width] = widths
+        yield [("%*s" % (-width, cells), True)]
 
     def dump(self, value):
         if value is None:
@@ -235,12 +263,15 @@ class TextToText(ToText):
             return value
         return '"%s"' % self.escape_regexp.sub(self.escape_replace, value)
 
-    def body(self, data, widths):
-        [width] = widths
+    def render(self, data):
         if data is None:
-            yield [(" "*width, True)]
-            return
+            return "", [0]
         value = self.escape(data)
+        return value, [self.measure(value)]
+
+    def body(self, cells, widths):
+        [width] = widths
+        value = cells
         if len(value) <= width:
             yield [("%*s" % (-width, value), True)]
             return
@@ -286,16 +317,13 @@ class TextToText(ToText):
             yield [(line, is_first)]
             is_first = False
 
-    def widths(self, data):
-        if data is None:
-            return [0]
-        value = self.escape(data)
+    def measure(self, value):
         if len(value) <= self.threshold:
-            return [len(value)]
+            return len(value)
         chunks = self.boundary_regexp.split(value)
         max_length = max(len(chunk) for chunk in chunks)
         if max_length >= self.threshold:
-            return [max_length]
+            return max_length
         max_length = length = 0
         start = end = 0
         while end < len(chunks):
@@ -311,7 +339,7 @@ class TextToText(ToText):
             assert start < end
             if length > max_length:
                 max_length = length
-        return [max_length]
+        return max_length
 
 
 class NativeStringToText(ToText):
@@ -330,10 +358,9 @@ class NumberToText(NativeStringToText):
 
     adapt(NumberDomain)
 
-    def body(self, data, widths):
+    def body(self, cells, widths):
         [width] = widths
-        cell = self.dump(data)
-        yield [("%*s" % (width, cell), True)]
+        yield [("%*s" % (width, cells), True)]
 
 
 class DecimalToText(ToText):
@@ -433,16 +460,29 @@ class RecordToText(ToText):
             if not is_done:
                 yield row
 
-    def body(self, data, widths):
+    def render(self, data):
+        cells = []
+        widths = []
+        if data is None:
+            cells = None
+            data = [None]*len(self.fields_to_text)
+        for item, field_to_text in zip(data, self.fields_to_text):
+            item_cells, item_widths = field_to_text.render(item)
+            if cells is not None:
+                cells.append(item_cells)
+            widths += item_widths
+        return cells, widths
+
+    def body(self, cells, widths):
         if not self.size:
             return
         dummies = [(" "*width, False) for width in widths]
-        if data is None:
+        if cells is None:
             yield dummies
             return
         streams = []
         start = 0
-        for field_to_text, item in zip(self.fields_to_text, data):
+        for field_to_text, item in zip(self.fields_to_text, cells):
             size = field_to_text.size
             stream = field_to_text.body(item, widths[start:start+size])
             streams.append((stream, size))
@@ -461,14 +501,6 @@ class RecordToText(ToText):
             if not is_done:
                 yield row
 
-    def widths(self, data):
-        widths = []
-        if data is None:
-            data = [None]*self.size
-        for item, field_to_text in zip(data, self.fields_to_text):
-            widths += field_to_text.widths(item)
-        return widths
-
 
 class ListToText(ToText):
 
@@ -484,22 +516,26 @@ class ListToText(ToText):
     def head(self, depth):
         return self.item_to_text.head(depth)
 
-    def body(self, data, widths):
+    def render(self, data):
         if not data:
-            return
-        for item in data:
-            for row in self.item_to_text.body(item, widths):
-                yield row
-
-    def widths(self, data):
+            cells, widths = self.item_to_text.render(None)
+            return None, widths
         widths = [0]*self.size
-        if not data:
-            data = [None]
+        cells = []
+        item_render = self.item_to_text.render
         for item in data:
+            item_cells, item_widths = item_render(item)
+            cells.append(item_cells)
             widths = [max(width, item_width)
-                      for width, item_width
-                            in zip(widths, self.item_to_text.widths(item))]
-        return widths
+                      for width, item_width in zip(widths, item_widths)]
+        return cells, widths
+
+    def body(self, cells, widths):
+        if not cells:
+            return
+        for item in cells:
+            for row in self.item_to_text.body(item, widths):
+                yield row
 
 
 class MetaToText:
@@ -532,13 +568,34 @@ class MetaToText:
             for row in self.domain_to_text.head(depth-1):
                 yield row
 
-    def body(self, data, widths):
-        return self.domain_to_text.body(data, widths)
+    def body(self, cells, widths):
+        return self.domain_to_text.body(cells, widths)
 
-    def widths(self, data):
+    def pages(self, data, window=None):
+        # Renders the data by pages of `window` top-level rows; without
+        # a window, the whole data makes one page.
+        if window is None or not isinstance(self.profile.domain, ListDomain):
+            yield self.render(data)
+            return
+        items = iter(data or [])
+        last_widths = None
+        while True:
+            chunk = list(itertools.islice(items, window))
+            if not chunk and last_widths is not None:
+                break
+            cells, widths = self.render(chunk)
+            if last_widths is not None:
+                widths = [max(width, last_width)
+                          for width, last_width in zip(widths, last_widths)]
+            yield cells, widths
+            last_widths = widths
+            if len(chunk) < window:
+                break
+
+    def render(self, data):
         if not self.size:
-            return []
-        widths = self.domain_to_text.widths(data)
+            return None, []
+        cells, widths = self.domain_to_text.render(data)
         total = sum(widths) + 3*(self.size-1)
         if self.profile.header and len(self.profile.header) > total:
             extra = len(self.profile.header) - total
@@ -548,7 +605,7 @@ class MetaToText:
                 widths[idx] += inc
                 if idx < rem:
                     widths[idx] += 1
-        return widths
+        return cells, widths
 
 
 def to_text(domain):
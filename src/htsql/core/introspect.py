@@ -38,44 +38,51 @@ class IntrospectCleanup(Introspect):
     def __call__(self):
         catalog = super(IntrospectCleanup, self).__call__()
 
-        for schema in reversed(list(catalog)):
-            for table in reversed(list(schema)):
-                if not table.columns:
-                    table.remove()
+        catalog.remove_tables([table
+                               for schema in catalog
+                               for table in schema
+                               if not table.columns])
+        for schema in list(catalog):
             if not schema:
                 schema.remove()
 
+        duplicate_unique_keys = []
+        duplicate_foreign_keys = []
         for schema in catalog:
             for table in schema:
-                seen = {}
-                for unique_key in list(table.unique_keys):
-                    key = tuple(unique_key.origin_columns)
-                    if key in seen:
-                        other_key = seen[key]
-                        if (unique_key.is_primary or
-                            (not unique_key.is_partial and
-                                other_key.is_partial)):
-                            other_key.remove()
+                if len(table.unique_keys) > 1:
+                    seen = {}
+                    for unique_key in table.unique_keys:
+                        key = tuple(unique_key.origin_columns)
+                        if key in seen:
+                            other_key = seen[key]
+                            if (unique_key.is_primary or
+                                (not unique_key.is_partial and
+                                    other_key.is_partial)):
+                                duplicate_unique_keys.append(other_key)
+                                seen[key] = unique_key
+                            else:
+                                duplicate_unique_keys.append(unique_key)
+                        else:
                             seen[key] = unique_key
+                if len(table.foreign_keys) > 1:
+                    seen = {}
+                    for foreign_key in table.foreign_keys:
+                        key = (tuple(foreign_key.origin_columns),
+                               foreign_key.target,
+                               tuple(foreign_key.target_columns))
+                        if key in seen:
+                            other_key = seen[key]
+                            if (not foreign_key.is_partial and
+                                    other_key.is_partial):
+                                duplicate_foreign_keys.append(other_key)
+                                seen[key] = foreign_key
+                            else:
+                                duplicate_foreign_keys.append(foreign_key)
                         else:
-                            unique_key.remove()
-                    else:
-                        seen[key] = unique_key
-                seen = {}
-                for foreign_key in list(table.foreign_keys):
-                    key = (tuple(foreign_key.origin_columns),
-                           foreign_key.target,
-                           tuple(foreign_key.target_columns))
-                    if key in seen:
-                        other_key = seen[key]
-                        if (not foreign_key.is_partial and
-                                other_key.is_partial):
-                            other_key.remove()
                             seen[key] = foreign_key
-                        else:
-                            foreign_key.remove()
-                    else:
-                        seen[key] = foreign_key
+        catalog.remove_unique_keys(duplicate_unique_keys)
+        catalog.remove_foreign_keys(duplicate_foreign_keys)
 
         return catalog
 
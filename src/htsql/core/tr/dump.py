@@ -15,19 +15,22 @@ from ..util import listof, maybe
 from ..adapter import Adapter, Protocol, adapt, call
 from ..domain import (Domain, BooleanDomain, IntegerDomain, DecimalDomain,
                       FloatDomain, TextDomain, EnumDomain, DateDomain,
-                      TimeDomain, DateTimeDomain, ListDomain, RecordDomain)
+                      TimeDomain, DateTimeDomain, ListDomain, RecordDomain,
+                      OpaqueDomain, Profile)
+from ..context import context
 from ..error import Error, translate_guard
 from ..syn.syntax import IdentifierSyntax, ApplySyntax, LiteralSyntax
+from .coerce import coerce
 from .frame import (Clause, Frame, TableFrame, BranchFrame, NestedFrame,
         SegmentFrame, Phrase, NullPhrase, CastPhrase, LiteralPhrase,
-        ColumnPhrase, ReferencePhrase, EmbeddingPhrase, FormulaPhrase, Anchor,
-        LeadingAnchor)
+        ColumnPhrase, ReferencePhrase, EmbeddingPhrase, FormulaPhrase,
+        FoldPhrase, Anchor, LeadingAnchor)
 from .signature import (Signature, isformula, IsEqualSig, IsTotallyEqualSig,
                         IsInSig, IsNullSig, IfNullSig, NullIfSig, CompareSig,
                         AndSig, OrSig, NotSig, SortDirectionSig, RowNumberSig,
                         ToPredicateSig, FromPredicateSig, PlaceholderSig)
 from .pipe import (SQLPipe, BatchSQLPipe, RecordPipe, ComposePipe, ProducePipe,
-        MixPipe)
+        MixPipe, ExtractPipe, ValuePipe, KeySetPipe)
 from ..connect import unscramble
 import io
 import re
@@ -300,6 +303,10 @@ class SerializeSegment(Serialize):
 
     `max_alias_length` (an integer)
         The maximum length of an alias.
+
+    `with_json_folding` (Boolean)
+        Indicates that the backend can evaluate nested segments as
+        correlated JSON aggregates (see :class:`DumpFold`).
     """
 
     adapt(SegmentFrame)
@@ -309,39 +316,285 @@ class SerializeSegment(Serialize):
     # the PostgreSQL limit `NAMEDATALEN-1`.
     max_alias_length = 63
 
+    # Backends that implement `DumpFold` should enable it.
+    with_json_folding = False
+
     def __call__(self):
-        # Populate the `frame_by_tag` mapping.
-        self.state.set_tree(self.clause)
-        # Generate `SELECT` and `FROM` aliases.
-        self.aliasing()
-        # Dump the `SELECT` statement.
-        self.state.dump(self.clause)
-        # Retrieve and return the generated SQL.
-        placeholders = self.state.placeholders
-        sql = self.state.flush()
+        # Fold nested segments into the statement if the backend supports
+        # it and it is enabled.
+        clause = None
+        if (self.clause.dependents and self.with_json_folding and
+                context.app.htsql.fold_segments):
+            clause = self.fold()
+        if clause is None:
+            clause = self.clause
+        # Generate the `SELECT` statement.
+        sql, aliases, placeholders = self.dump(clause)
         input_domains = None
         if placeholders:
             input_domains = []
             for index in sorted(placeholders):
                 input_domains.append(placeholders[index])
-        output_domains = [phrase.domain for phrase in self.clause.select]
+        output_domains = [phrase.domain for phrase in clause.select]
         if self.state.batch is None:
             pipe = SQLPipe(sql, input_domains, output_domains)
         else:
             pipe = BatchSQLPipe(sql, input_domains, output_domains,
                                 self.state.batch)
-        if self.clause.dependents:
+        # Unless they are folded, nested segments are fetched by separate
+        # statements and merged with the parent rows.
+        if self.clause.dependents and clause is self.clause:
+            # When the parent segment has a few rows, a nested segment
+            # may be fetched by a statement that takes the parent keys.
+            parent_keys = None
+            size = context.app.htsql.key_set_size
+            if size and self.state.batch is None:
+                parent_keys = self.decompose(self.clause.key_pipe)
             feeds = [pipe]
+            keyed_feeds = [None]
             keys = [self.clause.key_pipe]
             for subframe in self.clause.dependents:
                 feed = self.state.serialize(subframe)
+                keyed_feed = None
+                if parent_keys is not None:
+                    keyed_feed = self.push_keys(subframe, feed,
+                                                parent_keys, size)
                 feeds.append(feed)
+                keyed_feeds.append(keyed_feed)
                 keys.append(subframe.superkey_pipe)
-            pipe = RecordPipe(feeds)
+            if any(keyed_feed is not None for keyed_feed in keyed_feeds):
+                key_pipe = RecordPipe([parent_key
+                                       for parent_key in parent_keys
+                                       if isinstance(parent_key,
+                                                     ExtractPipe)])
+                pipe = KeySetPipe(feeds, key_pipe, keyed_feeds, size)
+            else:
+                pipe = RecordPipe(feeds)
             mix_pipe = MixPipe(keys)
             pipe = ComposePipe(pipe, mix_pipe)
         return pipe
 
+    def dump(self, clause, with_aliases=False):
+        """
+        Generates a ``SELECT`` statement for the segment.
+
+        Returns the SQL, the list of ``SELECT`` aliases and a mapping
+        of placeholders to their domains.
+
+        `clause` (:class:`htsql.core.tr.frame.SegmentFrame`)
+            The segment frame, possibly with extra folded phrases.
+
+        `with_aliases` (Boolean)
+            If set, the ``SELECT`` clause must contain aliases.
+        """
+        # Populate the `frame_by_tag` mapping.
+        self.state.set_tree(clause)
+        # Generate `SELECT` and `FROM` aliases.
+        self.aliasing(clause)
+        # Dump the `SELECT` statement.
+        self.state.push_hook(with_aliases=with_aliases)
+        self.state.dump(clause)
+        self.state.pop_hook()
+        # Retrieve and return the generated SQL.
+        aliases = self.state.select_aliases_by_tag[clause.tag]
+        placeholders = self.state.placeholders
+        sql = self.state.flush()
+        return sql, aliases, placeholders
+
+    def fold(self):
+        """
+        Folds nested segments into correlated JSON aggregates.
+
+        Returns a copy of the segment frame with a :class:`FoldPhrase`
+        appended to the ``SELECT`` clause for each nested segment, or
+        ``None`` if some of the segments cannot be folded.
+        """
+        parent_keys = self.decompose(self.clause.key_pipe)
+        if parent_keys is None:
+            return None
+        select = self.clause.select[:]
+        placeholders = {}
+        for subframe in self.clause.dependents:
+            # A nested `LIMIT` applies to all the rows of the segment,
+            # which would force the database to evaluate the whole
+            # segment for each parent row.
+            if subframe.limit is not None or subframe.offset is not None:
+                return None
+            # Match the parent keys with the columns of the segment.
+            child_keys = self.decompose(subframe.superkey_pipe)
+            if child_keys is None or len(child_keys) != len(parent_keys):
+                return None
+            keys = []
+            for parent_key, child_key in zip(parent_keys, child_keys):
+                if (isinstance(parent_key, ExtractPipe) and
+                        isinstance(child_key, ExtractPipe)):
+                    phrase = self.clause.select[parent_key.index]
+                    keys.append((phrase, child_key.index))
+                elif not (isinstance(parent_key, ValuePipe) and
+                          isinstance(child_key, ValuePipe) and
+                          parent_key.data == child_key.data):
+                    return None
+            # The segment must fold its own nested segments.
+            serialize = Serialize.__prepare__(subframe, self.state)
+            subclause = subframe
+            if subframe.dependents:
+                subclause = serialize.fold()
+                if subclause is None:
+                    return None
+            domains = [phrase.domain for phrase in subclause.select]
+            if any(isinstance(domain, OpaqueDomain) for domain in domains):
+                return None
+            # The database may reorder the rows of a nested `SELECT`, so
+            # the order of the segment is exported as a row number.
+            order = self.unlink_order(subclause)
+            if order:
+                ordinal = FormulaPhrase(RowNumberSig(),
+                                        coerce(IntegerDomain()), False,
+                                        subframe.expression,
+                                        partition=[], order=order)
+                subclause = subclause.clone(select=subclause.select+[ordinal],
+                                            order=[])
+            sql, aliases, subplaceholders = \
+                    serialize.dump(subclause, with_aliases=True)
+            placeholders.update(subplaceholders)
+            ordinal_alias = None
+            if order:
+                ordinal_alias = aliases.pop()
+            fields = [Profile(domain, tag=alias)
+                      for domain, alias in zip(domains, aliases)]
+            domain = ListDomain(RecordDomain(fields))
+            name = self.state.dub(subframe)
+            phrase = FoldPhrase(sql, name, aliases, ordinal_alias, keys,
+                                domain, subframe.expression)
+            select.append(phrase)
+        for index in sorted(placeholders):
+            self.state.add_placeholder(index, placeholders[index])
+        return self.clause.clone(select=select)
+
+    def push_keys(self, subframe, feed, parent_keys, size):
+        """
+        Generates a variant of a nested segment restricted to the keys
+        of the parent rows.
+
+        Returns a pipe that takes `size` parent keys, or ``None`` if
+        the segment cannot be restricted.
+
+        The statement of a nested segment repeats the parent segment
+        in a nested ``SELECT``.  When the parent has ``LIMIT`` or
+        ``OFFSET``, the variant replaces them with a condition on the
+        parent keys, so the database does not need to evaluate the
+        parent segment again.
+        """
+        # Segments with their own nested segments and segments that
+        # already take parameters are fetched by the regular statement.
+        if (subframe.dependents or
+                subframe.limit is not None or subframe.offset is not None or
+                not isinstance(feed, SQLPipe) or
+                feed.input_domains is not None):
+            return None
+        # The parent keys must be exported by one nested frame.
+        child_keys = self.decompose(subframe.superkey_pipe)
+        if child_keys is None or len(child_keys) != len(parent_keys):
+            return None
+        tag = None
+        indexes = []
+        for parent_key, child_key in zip(parent_keys, child_keys):
+            if (isinstance(parent_key, ExtractPipe) and
+                    isinstance(child_key, ExtractPipe)):
+                phrase = subframe.select[child_key.index]
+                if not (isinstance(phrase, ReferencePhrase) and
+                        tag in [None, phrase.tag]):
+                    return None
+                tag = phrase.tag
+                indexes.append(phrase.index)
+            elif not (isinstance(parent_key, ValuePipe) and
+                      isinstance(child_key, ValuePipe) and
+                      parent_key.data == child_key.data):
+                return None
+        if tag is None:
+            return None
+        for anchor in subframe.include:
+            if anchor.frame.tag == tag:
+                break
+        else:
+            return None
+        # The frame must evaluate the parent segment.
+        frame = anchor.frame
+        if (frame.space != self.clause.space or
+                (frame.limit is None and frame.offset is None)):
+            return None
+        # Generate the condition:
+        #   (<key> IN (:1, :2, ...))
+        # or, for a composite key:
+        #   ((<key1> = :1 AND <key2> = :2) OR ...)
+        phrases = [frame.select[index] for index in indexes]
+        boolean = coerce(BooleanDomain())
+        placeholders = [FormulaPhrase(PlaceholderSig(index),
+                                      phrases[index % len(phrases)].domain,
+                                      False, subframe.expression)
+                        for index in range(size*len(phrases))]
+        if len(phrases) == 1:
+            condition = FormulaPhrase(IsInSig(+1), boolean, False,
+                                      subframe.expression,
+                                      lop=phrases[0], rops=placeholders)
+        else:
+            terms = []
+            for start in range(0, len(placeholders), len(phrases)):
+                equalities = [FormulaPhrase(IsEqualSig(+1), boolean, False,
+                                            subframe.expression,
+                                            lop=phrase, rop=placeholder)
+                              for phrase, placeholder
+                                in zip(phrases, placeholders[start:])]
+                terms.append(FormulaPhrase(AndSig(), boolean, False,
+                                           subframe.expression,
+                                           ops=equalities))
+            condition = FormulaPhrase(OrSig(), boolean, False,
+                                      subframe.expression, ops=terms)
+        if frame.group:
+            having = condition
+            if frame.having is not None:
+                having = FormulaPhrase(AndSig(), boolean, False,
+                                       subframe.expression,
+                                       ops=[frame.having, condition])
+            frame = frame.clone(having=having)
+        else:
+            where = condition
+            if frame.where is not None:
+                where = FormulaPhrase(AndSig(), boolean, False,
+                                      subframe.expression,
+                                      ops=[frame.where, condition])
+            frame = frame.clone(where=where)
+        frame = frame.clone(order=[], limit=None, offset=None)
+        include = [anchor.clone(frame=frame)
+                        if anchor.frame.tag == tag else anchor
+                   for anchor in subframe.include]
+        return self.state.serialize(subframe.clone(include=include))
+
+    def unlink_order(self, frame):
+        # Returns the `ORDER BY` clause of the frame with positional
+        # references to the `SELECT` clause replaced by the selected
+        # phrases.
+        order = []
+        for phrase in frame.order:
+            if (isformula(phrase, SortDirectionSig) and
+                    isinstance(phrase.base, LiteralPhrase) and
+                    isinstance(phrase.base.domain, IntegerDomain)):
+                base = frame.select[phrase.base.value-1]
+                phrase = phrase.clone(base=base)
+            order.append(phrase)
+        return order
+
+    def decompose(self, pipe):
+        # Splits a key pipe into a list of `ExtractPipe` and `ValuePipe`
+        # components.
+        if isinstance(pipe, (ExtractPipe, ValuePipe)):
+            return [pipe]
+        if isinstance(pipe, RecordPipe):
+            if all(isinstance(field_pipe, (ExtractPipe, ValuePipe))
+                   for field_pipe in pipe.field_pipes):
+                return pipe.field_pipes
+        return None
+
     def aliasing(self, frame=None,
                  taken_select_aliases=None,
                  taken_include_aliases=None):
@@ -1407,6 +1660,98 @@ class DumpEmbedding(Dump):
         self.state.pop_hook()
 
 
+class DubFold(Dub):
+    """
+    Generates a preform alias for a folded nested segment.
+    """
+
+    adapt(FoldPhrase)
+
+    def __call__(self):
+        return self.clause.name
+
+
+class DumpFold(Dump):
+    """
+    Serializes a nested segment folded into a JSON aggregate.
+
+    This is an abstract adapter; a backend that enables
+    `SerializeSegment.with_json_folding` must implement
+    :meth:`dump_aggregate`.  The aggregate must produce a JSON array
+    with one entry per row of the nested statement, ordered by the
+    `ordinal` column of the phrase, if any.
+    """
+
+    adapt(FoldPhrase)
+
+    def __init__(self, phrase, state):
+        super(DumpFold, self).__init__(phrase, state)
+        self.phrase = phrase
+        # The alias of the nested statement; it must not hide any frame
+        # referred to by the correlation conditions.
+        taken_aliases = set(state.frame_alias_by_tag.values())
+        alias = phrase.name
+        number = 1
+        while alias in taken_aliases:
+            alias = "%s_%s" % (phrase.name, number)
+            number += 1
+        self.alias = alias
+
+    def __call__(self):
+        # Dump:
+        #   (SELECT <aggregate>
+        #    FROM (<segment>) AS <alias>
+        #    WHERE <alias>.<column> = <key>
+        #          AND ...)
+        self.write("(")
+        self.indent()
+        self.write("SELECT ")
+        self.dump_aggregate()
+        self.newline()
+        self.dump_from()
+        self.dump_where()
+        self.dedent()
+        self.write(")")
+
+    def dump_from(self):
+        # Dump:
+        #   FROM (<segment>) AS <alias>
+        self.write("FROM (")
+        self.indent()
+        for index, line in enumerate(self.phrase.sql.splitlines()):
+            if index > 0:
+                self.newline()
+            self.write(line)
+        self.dedent()
+        self.format(") AS {alias:name}", alias=self.alias)
+
+    def dump_where(self):
+        # Dump:
+        #   WHERE <alias>.<column> = <key>
+        #         AND ...
+        if not self.phrase.keys:
+            return
+        self.newline()
+        self.write("WHERE ")
+        self.indent()
+        for index, (phrase, column) in enumerate(self.phrase.keys):
+            if index > 0:
+                self.newline()
+                self.write("AND ")
+            self.dump_condition(phrase, self.phrase.aliases[column])
+        self.dedent()
+
+    def dump_aggregate(self):
+        # Must be implemented by the backend.
+        raise NotImplementedError("the fold adapter is not implemented")
+
+    def dump_condition(self, phrase, column):
+        # Dump:
+        #   <alias>.<column> = <key>
+        self.format("{alias:name}.{column:name} = {phrase}",
+                    alias=self.alias, column=column, phrase=phrase)
+
+
 class DumpLiteral(Dump):
     """
     Serializes a literal node.
@@ -342,11 +342,13 @@ class TrimSig(UnarySig):
 
 
 class TodaySig(NullarySig):
-    pass
+
+    is_volatile = True
 
 
 class NowSig(NullarySig):
-    pass
+
+    is_volatile = True
 
 
 class AggregateSig(Signature):
@@ -610,3 +610,50 @@ class EmbeddingPhrase(ExportPhrase):
         return (self.tag,)
 
 
+class FoldPhrase(Phrase):
+    """
+    Represents a nested segment evaluated as a correlated JSON aggregate.
+
+    The phrase is generated by the serializer when nested segments are
+    folded into the statement of the enclosing segment.
+
+    `sql` (a string)
+        The ``SELECT`` statement of the nested segment.
+
+    `name` (a string)
+        A preform alias for the nested statement.
+
+    `aliases` (a list of strings)
+        The ``SELECT`` aliases of the nested statement.
+
+    `ordinal` (a string or ``None``)
+        The alias of the column of the nested statement that contains
+        the row number; it follows the columns listed in `aliases`.
+
+    `keys` (a list of pairs)
+        Pairs ``(phrase, index)`` that correlate the nested statement
+        with the enclosing one: the value of `phrase` must coincide
+        with the column `index` of the nested statement.
+
+    `domain` (:class:`htsql.core.domain.ListDomain`)
+        A list of records with fields matching the columns of the nested
+        statement.
+    """
+
+    def __init__(self, sql, name, aliases, ordinal, keys, domain,
+                 expression):
+        #assert isinstance(sql, str)
+        #assert isinstance(aliases, listof(str))
+        #assert isinstance(ordinal, maybe(str))
+        #assert isinstance(keys, listof(tupleof(Phrase, int)))
+        super(FoldPhrase, self).__init__(domain, False, expression)
+        self.sql = sql
+        self.name = name
+        self.aliases = aliases
+        self.ordinal = ordinal
+        self.keys = keys
+
+    def __basis__(self):
+        return (self.sql, tuple(self.keys))
+
+
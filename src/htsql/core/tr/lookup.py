@@ -15,8 +15,8 @@ from ..util import Clonable, Printable, maybe
 from ..adapter import Adapter, adapt, adapt_many
 from ..entity import DirectJoin
 from ..model import (HomeNode, TableNode, Arc, TableArc, ChainArc, ColumnArc,
-        SyntaxArc, InvalidArc, AmbiguousArc)
-from ..classify import classify, relabel, localize, normalize
+        SyntaxArc, AmbiguousArc)
+from ..classify import classify, index_labels, relabel, localize, normalize
 from ..syn.syntax import IdentifierSyntax
 from ..error import point
 from .binding import (Binding, ScopeBinding, ChainingBinding, WrappingBinding,
@@ -506,12 +506,10 @@ class LookupAttributeInHome(Lookup):
     adapt(HomeBinding, AttributeProbe)
 
     def __call__(self):
-        labels = classify(HomeNode())
-        label_by_signature = dict(((label.name, label.arity), label)
-                                  for label in labels)
-        if (self.probe.key, self.probe.arity) not in label_by_signature:
+        label_by_signature = index_labels(HomeNode()).by_signature
+        label = label_by_signature.get((self.probe.key, self.probe.arity))
+        if label is None:
             return None
-        label = label_by_signature[self.probe.key, self.probe.arity]
         recipe = prescribe(label.arc, self.binding)
         return recipe
 
@@ -522,14 +520,7 @@ class LookupAttributeSetInHome(Lookup):
     adapt(HomeBinding, AttributeSetProbe)
 
     def __call__(self):
-        attributes = set()
-        labels = classify(HomeNode())
-        for label in labels:
-            # Skip invalid labels.
-            if isinstance(label.arc, InvalidArc):
-                continue
-            attributes.add((label.name, label.arity))
-        return attributes
+        return set(index_labels(HomeNode()).signatures)
 
 
 class ExpandHome(Lookup):
@@ -582,12 +573,11 @@ class LookupAttributeInTable(Lookup):
     adapt(TableBinding, AttributeProbe)
 
     def __call__(self):
-        labels = classify(TableNode(self.binding.table))
-        label_by_signature = dict(((label.name, label.arity), label)
-                                  for label in labels)
-        if (self.probe.key, self.probe.arity) not in label_by_signature:
+        labels = index_labels(TableNode(self.binding.table))
+        label_by_signature = labels.by_signature
+        label = label_by_signature.get((self.probe.key, self.probe.arity))
+        if label is None:
             return None
-        label = label_by_signature[self.probe.key, self.probe.arity]
         recipe = prescribe(label.arc, self.binding)
         return recipe
 
@@ -598,14 +588,7 @@ class LookupAttributeSetInTable(Lookup):
     adapt(TableBinding, AttributeSetProbe)
 
     def __call__(self):
-        attributes = set()
-        labels = classify(TableNode(self.binding.table))
-        for label in labels:
-            # Skip invalid labels.
-            if isinstance(label.arc, InvalidArc):
-                continue
-            attributes.add((label.name, label.arity))
-        return attributes
+        return set(index_labels(TableNode(self.binding.table)).signatures)
 
 
 class ExpandTable(Lookup):
@@ -663,12 +646,7 @@ class GuessPathForTable(Lookup):
             node = path[-1].target
         else:
             node = HomeNode()
-        arc = None
-        for label in classify(node):
-            if (isinstance(label.arc, TableArc) and
-                    (label.arc.table == self.binding.table)):
-                arc = label.arc
-                break
+        arc = index_labels(node).by_arc.get(TableArc(self.binding.table))
         if arc is None:
             return None
         return path+[arc]
@@ -682,15 +660,12 @@ class GuessPathForChain(Lookup):
         path = lookup(self.binding.base, self.probe)
         if not path:
             return None
-        arc = None
         parent_arc = path[-1]
         if isinstance(parent_arc, ColumnArc) and parent_arc.link is not None:
             parent_arc = parent_arc.link
-        for label in classify(parent_arc.target):
-            if (isinstance(label.arc, ChainArc) and
-                    (label.arc.joins == self.binding.joins)):
-                arc = label.arc
-                break
+        joins = self.binding.joins
+        arc = index_labels(parent_arc.target).by_arc.get(
+                ChainArc(joins[0].origin, joins))
         if arc is None:
             return None
         return path+[arc]
@@ -749,15 +724,12 @@ class GuessPathForColumn(Lookup):
         path = lookup(self.binding.base, self.probe)
         if not path:
             return None
-        arc = None
         parent_arc = path[-1]
         if isinstance(parent_arc, ColumnArc) and parent_arc.link is not None:
             parent_arc = parent_arc.link
-        for label in classify(parent_arc.target):
-            if (isinstance(label.arc, ColumnArc) and
-                    (label.arc.column == self.binding.column)):
-                arc = label.arc
-                break
+        column = self.binding.column
+        arc = index_labels(parent_arc.target).by_arc.get(
+                ColumnArc(column.table, column))
         if arc is None:
             return None
         return path+[arc]
@@ -6,8 +6,8 @@
 from ..util import Clonable, YAMLable
 from ..context import context
 from ..domain import Product
-from ..connect import transaction, scramble, unscramble
-from ..error import PermissionError
+from ..connect import connect, transaction, scramble, unscramble_column
+from ..error import Error, PermissionError
 import operator
 import tempfile
 import pickle
@@ -50,8 +50,8 @@ class SQLPipe(Pipe):
             scrambles = None
             if input_domains is not None:
                 scrambles = [scramble(domain) for domain in input_domains]
-            unscrambles = list(enumerate(
-                    [unscramble(domain) for domain in output_domains]))
+            unscrambles = [unscramble_column(domain)
+                           for domain in output_domains]
             with transaction() as connection:
                 cursor = connection.cursor()
                 if scrambles is None:
@@ -64,12 +64,7 @@ class SQLPipe(Pipe):
                             for index, (item, scramble)
                                     in enumerate(zip(input, scrambles)))
                     cursor.execute(sql, parameters)
-                output = []
-                for row in cursor:
-                    #assert len(row) == len(unscrambles)
-                    output.append(tuple([
-                        convert(row[idx])
-                        for idx, convert in unscrambles]))
+                output = convert_rows(cursor.fetchall(), unscrambles)
             return output
         return run_sql
 
@@ -83,6 +78,15 @@ class SQLPipe(Pipe):
                               for domain in self.output_domains])
 
 
+def convert_rows(rows, unscrambles):
+    # Converts fetched rows column by column.
+    if not rows or not unscrambles:
+        return [()]*len(rows)
+    columns = [convert(column)
+               for column, convert in zip(zip(*rows), unscrambles)]
+    return list(zip(*columns))
+
+
 class BatchSQLPipe(Pipe):
 
     def __init__(self, sql, input_domains, output_domains, batch):
@@ -101,23 +105,51 @@ class BatchSQLPipe(Pipe):
             scrambles = None
             if input_domains is not None:
                 scrambles = [scramble(domain) for domain in input_domains]
-            unscrambles = [unscramble(domain) for domain in output_domains]
+            unscrambles = [unscramble_column(domain)
+                           for domain in output_domains]
+            parameters = None
+            if scrambles is None:
+                assert input is None
+            else:
+                assert isinstance(input, (tuple, list))
+                assert len(input) == len(scrambles)
+                parameters = dict((str(index+1), scramble(item))
+                        for index, (item, scramble)
+                                in enumerate(zip(input, scrambles)))
+            # When the caller collects open streams (e.g., the WSGI
+            # handler), the rows are read from the cursor while
+            # the output is produced.
+            streams = context.env.streams
+            if streams is not None and context.env.connection is None:
+                connection = connect()
+                try:
+                    cursor = connection.cursor()
+                    if parameters is None:
+                        cursor.execute(sql)
+                    else:
+                        cursor.execute(sql, parameters)
+                    chunk = convert_rows(cursor.fetchmany(batch),
+                                         unscrambles)
+                except:
+                    connection.invalidate()
+                    connection.release()
+                    raise
+                if len(chunk) < batch:
+                    connection.commit()
+                    connection.release()
+                    return chunk
+                stream = RowStream(connection, cursor, chunk,
+                                   batch, unscrambles)
+                streams.append(stream)
+                return iter(stream)
+            # Otherwise, the rows are spooled to a temporary file.
             with transaction() as connection:
                 cursor = connection.cursor()
-                if scrambles is None:
-                    assert input is None
+                if parameters is None:
                     cursor.execute(sql)
                 else:
-                    assert isinstance(input, (tuple, list))
-                    assert len(input) == len(scrambles)
-                    parameters = dict((str(index+1), scramble(item))
-                            for index, (item, scramble)
-                                    in enumerate(zip(input, scrambles)))
                     cursor.execute(sql, parameters)
-                chunk = cursor.fetchmany(batch)
-                chunk = [tuple([convert(item)
-                                for item, convert in zip(row, unscrambles)])
-                         for row in chunk]
+                chunk = convert_rows(cursor.fetchmany(batch), unscrambles)
                 if len(chunk) < batch:
                     return chunk
                 stream = tempfile.TemporaryFile()
@@ -125,15 +157,16 @@ class BatchSQLPipe(Pipe):
                 while chunk:
                     size += 1
                     pickle.dump(chunk, stream, 2)
-                    chunk = cursor.fetchmany(batch)
-                    chunk = [tuple([convert(item)
-                                    for item, convert in zip(row, unscrambles)])
-                             for row in chunk]
+                    chunk = convert_rows(cursor.fetchmany(batch),
+                                         unscrambles)
                 stream.seek(0)
                 def iterate(stream=stream, size=size, load=pickle.load):
-                    for k in range(size):
-                        for row in load(stream):
-                            yield row
+                    try:
+                        for k in range(size):
+                            for row in load(stream):
+                                yield row
+                    finally:
+                        stream.close()
                 return iterate(stream, size)
         return run_sql
 
@@ -148,6 +181,78 @@ class BatchSQLPipe(Pipe):
         yield ('batch', self.batch)
 
 
+class RowStream:
+    """
+    Reads the rows of a statement from an open cursor.
+
+    The transaction is committed when all the rows are read.  If the
+    stream is closed before that, which normally means that the client
+    went away, the statement is cancelled and the connection is
+    discarded.
+
+    `connection` (:class:`htsql.core.connect.ConnectionProxy`)
+        The connection executing the statement.
+
+    `cursor` (:class:`htsql.core.connect.CursorProxy`)
+        The cursor with the pending rows.
+
+    `chunk` (a list of records)
+        The rows that are already fetched.
+
+    `batch` (an integer)
+        The number of rows to fetch at once.
+
+    `unscrambles` (a list of functions)
+        Convert columns of fetched rows.
+    """
+
+    def __init__(self, connection, cursor, chunk, batch, unscrambles):
+        self.app = context.app
+        self.connection = connection
+        self.cursor = cursor
+        self.chunk = chunk
+        self.batch = batch
+        self.unscrambles = unscrambles
+
+    def __iter__(self):
+        chunk = self.chunk
+        self.chunk = None
+        while chunk:
+            for row in chunk:
+                yield row
+            with self.app:
+                try:
+                    chunk = convert_rows(self.cursor.fetchmany(self.batch),
+                                         self.unscrambles)
+                except:
+                    self.discard()
+                    raise
+        with self.app:
+            connection = self.connection
+            self.connection = None
+            try:
+                connection.commit()
+            finally:
+                connection.release()
+
+    def close(self):
+        # Cancels the statement if the rows are not read to the end.
+        if self.connection is None:
+            return
+        with self.app:
+            try:
+                self.connection.cancel()
+            except Error:
+                pass
+            self.discard()
+
+    def discard(self):
+        connection = self.connection
+        self.connection = None
+        connection.invalidate()
+        connection.release()
+
+
 class ProducePipe(Pipe):
 
     def __init__(self, meta, data_pipe, **properties):
@@ -200,6 +305,63 @@ class RecordPipe(Pipe):
         yield ('fields', self.field_pipes)
 
 
+class KeySetPipe(RecordPipe):
+    # Same as `RecordPipe` for a segment with nested segments, but
+    # when the parent segment has no more than `size` rows, a nested
+    # segment with a keyed variant is fetched by the variant, which
+    # takes the keys of the parent rows padded to `size` entries.
+
+    def __init__(self, field_pipes, key_pipe, keyed_pipes, size):
+        super(KeySetPipe, self).__init__(field_pipes)
+        self.key_pipe = key_pipe
+        self.keyed_pipes = keyed_pipes
+        self.size = size
+
+    def __call__(self):
+        make_fields = [field_pipe() for field_pipe in self.field_pipes]
+        make_keyed_fields = [keyed_pipe() if keyed_pipe is not None else None
+                             for keyed_pipe in self.keyed_pipes]
+        def make_record(input, make_parent=make_fields[0],
+                               make_kids=make_fields[1:],
+                               make_keyed_kids=make_keyed_fields[1:],
+                               make_key=self.key_pipe(),
+                               size=self.size):
+            parent = make_parent(input)
+            keys = None
+            if isinstance(parent, list) and len(parent) <= size:
+                keys = []
+                seen = set()
+                for row in parent:
+                    key = make_key(row)
+                    # `NULL` keys cannot be matched by `IN`.
+                    if None in key:
+                        keys = None
+                        break
+                    if key not in seen:
+                        seen.add(key)
+                        keys.append(key)
+            parameters = None
+            if keys:
+                keys += [keys[-1]]*(size-len(keys))
+                parameters = [item for key in keys for item in key]
+            fields = [parent]
+            for make_kid, make_keyed_kid in zip(make_kids, make_keyed_kids):
+                if keys is None or make_keyed_kid is None:
+                    fields.append(make_kid(input))
+                elif not keys:
+                    fields.append([])
+                else:
+                    fields.append(make_keyed_kid(parameters))
+            return tuple(fields)
+        return make_record
+
+    def __yaml__(self):
+        yield ('fields', self.field_pipes)
+        yield ('key', self.key_pipe)
+        yield ('keyed', self.keyed_pipes)
+        yield ('size', self.size)
+
+
 class ExtractPipe(Pipe):
 
     def __init__(self, index):
@@ -274,6 +436,9 @@ class MixPipe(Pipe):
                        make_kid_keys=make_keys[1:]):
             parent = input[0]
             kids = input[1:]
+            if not all(isinstance(item, list) for item in input):
+                return mix_streams(parent, kids,
+                                   make_parent_key, make_kid_keys)
             kids_range = list(range(len(kids)))
             tops = [0]*len(kids)
             output = []
@@ -301,3 +466,27 @@ class MixPipe(Pipe):
         yield ('keys', self.key_pipes)
 
 
+def mix_streams(parent, kids, make_parent_key, make_kid_keys):
+    # Same as `MixPipe`, but for rows arriving from batch cursors:
+    # reads every input once, without loading it into memory.
+    kids = [iter(kid) for kid in kids]
+    kids_range = list(range(len(kids)))
+    tops = [next(kid, None) for kid in kids]
+    for parent_row in parent:
+        row = list(parent_row)
+        parent_key = make_parent_key(parent_row)
+        for idx in kids_range:
+            kid = kids[idx]
+            top = tops[idx]
+            make_kid_key = make_kid_keys[idx]
+            kid_rows = []
+            while top is not None and make_kid_key(top) == parent_key:
+                kid_rows.append(top)
+                top = next(kid, None)
+            tops[idx] = top
+            row.append(kid_rows)
+        yield tuple(row)
+    for idx in kids_range:
+        assert tops[idx] is None
+
+
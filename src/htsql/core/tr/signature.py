@@ -53,10 +53,15 @@ class Signature(Hashable, Clonable, Printable):
 
     `slots` (a list of :class:`Slot`)
         The formula slots.
+
+    `is_volatile` (Boolean)
+        Set if the value of the formula may change between
+        two executions of the same query, e.g., ``now()``.
     """
 
     # Override in subclasses.
     slots = []
+    is_volatile = False
 
     def __init__(self):
         pass
@@ -4,10 +4,14 @@
 
 
 from ..context import context
+from ..util import Printable
+from ..cache import current_cache, LRUCache
+from ..domain import Value
 from ..syn.syntax import Syntax
 from ..syn.parse import parse
 from .bind import bind
 from .binding import Binding
+from .flow import Flow, FormulaFlow
 from .decorate import decorate
 from .route import route
 from .encode import encode
@@ -18,87 +22,91 @@ from .assemble import assemble
 from .reduce import reduce
 from .dump import serialize
 from .pack import pack
-from .pipe import SQLPipe, RecordPipe, ComposePipe, ProducePipe
+from .frame import TableFrame, SegmentFrame
+from .pipe import (SQLPipe, BatchSQLPipe, RecordPipe, ComposePipe,
+        ProducePipe)
 
 
-class CacheItem:
-
-    __slots__ = ('prev', 'next', 'key', 'value')
-
-    def __init__(self, prev, next, key, value):
-        self.prev = prev
-        self.next = next
-        self.key = key
-        self.value = value
-
-
-class LRUCache:
-
-    __slots__ = ('head', 'tail', 'items', 'size')
-
-    def __init__(self, size):
-        self.head = None
-        self.tail = None
-        self.items = {}
-        self.size = size
-
-    def __getitem__(self, key):
-        item = self.items[key]
-        if item.prev is not None:
-            item.prev.next = item.next
-            if item.next is not None:
-                item.next.prev = item.prev
-            else:
-                self.tail = item.prev
-            item.prev = None
-            item.next = self.head
-            self.head.prev = item
-            self.head = item
-        return item.value
-
-    def __setitem__(self, key, value):
+def cache_plan(key, plan, slot=None):
+    # Plans kept in a slot other than the default one are not copied
+    # to a new catalog generation by `transfer_plans()`.
+    if slot is None:
+        slot = cache_plan
+    cache = current_cache()
+    with cache.lock(slot):
         try:
-            self.items[key].value = value
-        except KeyError:
-            item = CacheItem(None, self.head, key, value)
-            if self.head is not None:
-                self.head.prev = item
-            else:
-                self.tail = item
-            self.head = item
-            self.items[key] = item
-            if len(self.items) > self.size:
-                del self.items[self.tail.key]
-                self.tail.prev.next = None
-                self.tail = self.tail.prev
-
-    def __len__(self):
-        return len(self.items)
-
-
-def cache_plan(key, plan):
-    cache = context.app.htsql.cache
-    with cache.lock(cache_plan):
-        try:
-            mapping = cache.values[cache_plan]
+            mapping = cache.values[slot]
         except KeyError:
             size = context.app.htsql.query_cache_size
             if not size:
                 return
-            mapping = cache.values[cache_plan] = LRUCache(size=size)
+            mapping = cache.values[slot] = LRUCache(size=size)
         mapping[key] = plan
 
 
-def get_cached_plan(key, cache_plan=cache_plan):
-    cache = context.app.htsql.cache
-    with cache.lock(cache_plan):
+def get_cached_plan(key, slot=cache_plan):
+    cache = current_cache()
+    with cache.lock(slot):
         try:
-            return cache.values[cache_plan][key]
+            return cache.values[slot][key]
         except KeyError:
             return None
 
 
-def translate(syntax, environment=None, limit=None, offset=None, batch=None):
+def transfer_plans(source, target, is_valid):
+    # Copies cached plans from one catalog generation to another,
+    # keeping those for which `is_valid(key)` holds.
+    with source.lock(cache_plan):
+        try:
+            mapping = source.values[cache_plan]
+        except KeyError:
+            return
+        plans = [(key, mapping.peek(key)) for key in mapping]
+    size = context.app.htsql.query_cache_size
+    with target.lock(cache_plan):
+        if cache_plan not in target.values:
+            target.values[cache_plan] = LRUCache(size=size)
+        mapping = target.values[cache_plan]
+        for key, plan in plans:
+            if is_valid(key):
+                mapping[key] = plan
+
+
+class SQLPlan(Printable):
+    """
+    The SQL translation of a query, without the means to execute it.
+
+    `meta` (:class:`htsql.core.domain.Profile`)
+        The structure of the query output.
+
+    `sql` (a string)
+        The text of all SQL statements.
+
+    `statements` (a list of :class:`htsql.core.tr.pipe.SQLPipe`)
+        The statements in the order of execution; each keeps the SQL,
+        the domains of the parameters and the domains of the output
+        columns.
+
+    `tables` (a set of :class:`htsql.core.entity.TableEntity`)
+        The tables read by the statements.
+
+    Like the pipe produced by :func:`translate`, the plan keeps
+    the SQL and the tables in the `properties` dictionary.
+    """
+
+    def __init__(self, meta, sql, statements, tables):
+        self.meta = meta
+        self.sql = sql
+        self.statements = statements
+        self.tables = tables
+        self.properties = {'sql': sql, 'tables': tables}
+
+    def __str__(self):
+        return self.sql or ""
+
+
+def prepare(syntax, environment):
+    # Binds the query; returns the output profile and the flow.
     assert isinstance(syntax, (Syntax, Binding, str))
     if isinstance(syntax, str):
         syntax = parse(syntax)
@@ -108,11 +116,65 @@ def translate(syntax, environment=None, limit=None, offset=None, batch=None):
         binding = syntax
     profile = decorate(binding)
     flow = route(binding)
+    return profile, flow
+
+
+def translate_sql(syntax, environment=None):
+    """
+    Translates a query to SQL; returns :class:`SQLPlan`.
+
+    Unlike :func:`translate`, does not build the pipes that execute
+    the statements and convert the rows to the output structure.
+    Plans are cached by the query, given as text or as a syntax tree,
+    and the parameters, so a repeated query is not bound again.
+    """
+    key = None
+    if all(isinstance(value, Value)
+           for value in (environment or {}).values()):
+        parameters = tuple(sorted((name, value.domain, repr(value.data))
+                                  for name, value
+                                        in (environment or {}).items()))
+        key = (syntax, parameters)
+        plan = get_cached_plan(key, translate_sql)
+        if plan is not None:
+            return plan
+    plan = make_sql_plan(syntax, environment)
+    if key is not None:
+        cache_plan(key, plan, translate_sql)
+    return plan
+
+
+def make_sql_plan(syntax, environment):
+    profile, flow = prepare(syntax, environment)
+    # Reuse the plan of the query if it was executed.
+    plan = get_cached_plan((profile.tag, flow, None, None, None))
+    if plan is not None:
+        pipe, sql, tables, is_volatile = plan
+        return SQLPlan(profile, sql, get_statements(pipe), tables)
+    key = ('sql', flow)
+    plan = get_cached_plan(key)
+    if plan is None:
+        expression = encode(flow)
+        expression = rewrite(expression)
+        term = compile(expression)
+        frame = assemble(term)
+        frame = reduce(frame)
+        raw_pipe = serialize(frame)
+        plan = (get_sql(raw_pipe), get_statements(raw_pipe),
+                get_tables(frame))
+        cache_plan(key, plan)
+    sql, statements, tables = plan
+    return SQLPlan(profile, sql, statements, tables)
+
+
+def translate(syntax, environment=None, limit=None, offset=None, batch=None):
+    profile, flow = prepare(syntax, environment)
     key = (profile.tag, flow, limit, offset, batch)
-    pipe_sql = get_cached_plan(key)
-    if pipe_sql is not None:
-        pipe, sql = pipe_sql
-        pipe = ProducePipe(profile, pipe, sql=sql)
+    plan = get_cached_plan(key)
+    if plan is not None:
+        pipe, sql, tables, is_volatile = plan
+        pipe = ProducePipe(profile, pipe, sql=sql, tables=tables,
+                           is_volatile=is_volatile)
         return pipe
     expression = encode(flow)
     if limit is not None or offset is not None:
@@ -123,11 +185,14 @@ def translate(syntax, environment=None, limit=None, offset=None, batch=None):
     frame = reduce(frame)
     raw_pipe = serialize(frame, batch=batch)
     sql = get_sql(raw_pipe)
+    tables = get_tables(frame)
+    is_volatile = get_volatile(flow)
     value_pipe = pack(flow, frame, profile.tag)
     pipe = ComposePipe(raw_pipe, value_pipe)
     #print pipe
-    cache_plan(key, (pipe, sql))
-    pipe = ProducePipe(profile, pipe, sql=sql)
+    cache_plan(key, (pipe, sql, tables, is_volatile))
+    pipe = ProducePipe(profile, pipe, sql=sql, tables=tables,
+                       is_volatile=is_volatile)
     return pipe
 
 
@@ -150,6 +215,53 @@ def get_sql(pipe):
             return "\n\n".join(merged_sqls)
 
 
+def get_statements(pipe):
+    # The SQL statements of the pipe in the order of `get_sql()`.
+    if isinstance(pipe, (SQLPipe, BatchSQLPipe)):
+        return [pipe]
+    if isinstance(pipe, ComposePipe):
+        return get_statements(pipe.left_pipe)
+    elif isinstance(pipe, RecordPipe):
+        statements = []
+        for field_pipe in pipe.field_pipes:
+            statements.extend(get_statements(field_pipe))
+        return statements
+    return []
+
+
+def get_tables(frame):
+    # The set of tables read by the frame, its subframes and
+    # dependent segments.
+    tables = set()
+    frames = [frame]
+    while frames:
+        frame = frames.pop()
+        if isinstance(frame, TableFrame):
+            tables.add(frame.table)
+        frames.extend(frame.kids)
+        if isinstance(frame, SegmentFrame):
+            frames.extend(frame.dependents)
+    return frozenset(tables)
+
+
+def get_volatile(flow):
+    # Checks if the flow calls a function which value may change
+    # between executions of the query, such as `today()`.
+    nodes = [flow]
+    seen = set()
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (tuple, list)):
+            nodes.extend(node)
+        elif isinstance(node, Flow) and node not in seen:
+            if (isinstance(node, FormulaFlow) and
+                    node.signature.is_volatile):
+                return True
+            seen.add(node)
+            nodes.extend(node.__basis__())
+    return False
+
+
 def safe_patch(segment, limit, offset):
     space = segment.space
     if limit is not None:
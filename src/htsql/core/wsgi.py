@@ -11,12 +11,102 @@ This module provides a handler for WSGI requests.
 """
 
 from .adapter import Utility
+from .context import context
 from .error import HTTPError
 from .cmd.command import UniversalCmd
 from .cmd.act import render
+import itertools
 import urllib.request, urllib.parse, urllib.error
 
 
+class WSGIBody:
+    """
+    Wraps the body of a WSGI response.
+
+    The response is sent from `chunks`, which is derived from the
+    original body; closing the wrapper closes the original body and
+    the row streams opened by the request.  If the server closes the
+    body before it is exhausted, which normally means that the client
+    went away, the statements still streaming rows are cancelled.
+
+    `chunks`
+        An iterable over the chunks of the response body.
+
+    `body`
+        The original body.
+
+    `streams` (a list of :class:`htsql.core.tr.pipe.RowStream`)
+        Row streams opened by the request.
+    """
+
+    def __init__(self, chunks, body, streams):
+        self.chunks = chunks
+        self.body = body
+        self.streams = streams
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            close_streams(self.streams)
+
+
+def close_streams(streams):
+    # Closes row streams; the statements that are not completed
+    # are cancelled.
+    for stream in streams:
+        stream.close()
+
+
+def coalesce(chunks, size):
+    """
+    Joins a stream of small chunks into buffers of at least `size` bytes.
+
+    All buffers but the last one are not shorter than `size`.
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b"".join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def accept_encodings(environ):
+    """
+    Returns the set of content encodings accepted by the client.
+
+    The encodings are taken from the ``Accept-Encoding`` header;
+    those with zero quality are excluded.
+    """
+    encodings = set()
+    header = environ.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        encoding, _, parameter = item.partition(';')
+        encoding = encoding.strip().lower()
+        quality = 1.0
+        key, _, value = parameter.partition('=')
+        if key.strip().lower() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if encoding and quality > 0.0:
+            encodings.add(encoding)
+    return encodings
+
+
 class WSGI(Utility):
     """
     Declares the WSGI interface.
@@ -50,13 +140,37 @@ class WSGI(Utility):
             return [("%s requests are not permitted.\n" % method).encode('utf-8')]
         # Process the query.
         uri = self.request()
+        # Rows of large batched results are read from the database
+        # while the response is sent.
+        streams = []
         try:
-            command = UniversalCmd(uri)
-            status, headers, body = render(command, self.environ)
+            with context.env(streams=streams):
+                command = UniversalCmd(uri)
+                status, headers, body = render(command, self.environ)
         except HTTPError as exc:
+            close_streams(streams)
             return exc(self.environ, self.start_response)
+        except:
+            close_streams(streams)
+            raise
+        # Collect the output into buffers; if the whole body fits in one
+        # buffer, we also know its length.
+        chunks = body
+        size = context.app.htsql.response_buffer_size
+        if size:
+            chunks = coalesce(body, size)
+            try:
+                head = next(chunks, b"")
+            except:
+                WSGIBody(chunks, body, streams).close()
+                raise
+            if len(head) < size and not status.startswith('304 '):
+                headers = headers + [('Content-Length', str(len(head)))]
+                chunks = [head]
+            else:
+                chunks = itertools.chain([head], chunks)
         self.start_response(status, headers)
-        return body
+        return WSGIBody(chunks, body, streams)
 
 
 wsgi = WSGI.__invoke__
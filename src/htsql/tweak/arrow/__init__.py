@@ -0,0 +1,41 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import format, emit
+from ...core.addon import Addon, Parameter
+from ...core.validator import UIntVal
+
+
+class TweakArrowAddon(Addon):
+
+    name = 'tweak.arrow'
+    hint = """Arrow IPC output format"""
+    help = """
+    This addon adds `/:arrow` output format, which serializes
+    query results in Apache Arrow IPC streaming format.  The format
+    is binary and columnar: data-analysis tools could load it
+    directly without parsing text.  This format could also be
+    requested with `Accept: application/vnd.apache.arrow.stream`
+    header.
+
+    Rows are fetched from the database in batches and each batch
+    is sent to the client as an Arrow record batch.  Parameter
+    `batch` sets the number of rows in a record batch.
+
+    This addon requires `pyarrow` package.
+    """
+
+    parameters = [
+            Parameter('batch', UIntVal(), default=65536,
+                      value_name="ROWS",
+                      hint="""rows per record batch (default: 65536)"""),
+    ]
+
+    def validate(self):
+        if emit.pyarrow is None:
+            raise ValueError("this addon requires pyarrow package;"
+                             " install it with `pip install pyarrow`")
+
+
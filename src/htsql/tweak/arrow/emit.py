@@ -0,0 +1,266 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.adapter import Adapter, adapt, adapt_many
+from ...core.fmt.emit import EmitHeaders, Emit, EmitBatch
+from ...core.domain import (Domain, VoidDomain, BooleanDomain, IntegerDomain,
+        FloatDomain, DecimalDomain, TextDomain, EnumDomain, DateDomain,
+        TimeDomain, DateTimeDomain, UntypedDomain, ListDomain, RecordDomain)
+from .format import ArrowFormat
+import itertools
+import io
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class EmitArrowHeaders(EmitHeaders):
+
+    adapt(ArrowFormat)
+
+    def __call__(self):
+        filename = None
+        if self.meta.header:
+            filename = self.meta.header
+        if not filename:
+            filename = '_'
+        filename = filename.replace('\\', '\\\\').replace('"', '\\"')
+        yield ('Content-Type', 'application/vnd.apache.arrow.stream')
+        yield ('Content-Disposition',
+               'attachment; filename="%s.arrows"' % filename)
+
+
+class EmitArrowBatch(EmitBatch):
+
+    adapt(ArrowFormat)
+
+    def __call__(self):
+        return context.app.tweak.arrow.batch
+
+
+class EmitArrow(Emit):
+
+    adapt(ArrowFormat)
+
+    def __call__(self):
+        # The output is a table: a list of records becomes a set of
+        # columns, a list of other values becomes a single column,
+        # and a single value becomes a table with one row.
+        domain = self.meta.domain
+        rows = self.data
+        if isinstance(domain, ListDomain):
+            domain = domain.item_domain
+            if rows is None:
+                rows = []
+            if not isinstance(domain, RecordDomain):
+                rows = ((row,) for row in rows)
+        else:
+            rows = [rows] if isinstance(domain, RecordDomain) else [(rows,)]
+            if rows == [None]:
+                rows = []
+        if isinstance(domain, RecordDomain):
+            columns = [(field_name(field, index), field.domain)
+                       for index, field in enumerate(domain.fields)]
+        else:
+            columns = [(field_name(self.meta, 0), domain)]
+        types = []
+        converts = []
+        for name, domain in columns:
+            type, convert = to_arrow(domain)
+            types.append(type)
+            converts.append(convert)
+        schema = pyarrow.schema([pyarrow.field(name, type)
+                                 for (name, domain), type
+                                 in zip(columns, types)])
+        size = context.app.tweak.arrow.batch
+        output = io.BytesIO()
+        writer = pyarrow.ipc.new_stream(output, schema)
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, size))
+            if not chunk:
+                break
+            arrays = []
+            for column, type, convert in zip(zip(*chunk), types, converts):
+                if convert is not None:
+                    column = [convert(value) for value in column]
+                arrays.append(pyarrow.array(column, type=type))
+            writer.write_batch(
+                    pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+        writer.close()
+        yield output.getvalue()
+
+
+class ToArrow(Adapter):
+    """
+    Maps a domain to an Arrow data type.
+
+    Returns a pair: the Arrow type and a function that converts a value
+    to the form accepted by :func:`pyarrow.array`, or ``None`` if the
+    value could be passed as is.  By default, values are serialized to
+    strings.
+    """
+
+    adapt(Domain)
+
+    def __init__(self, domain):
+        assert isinstance(domain, Domain)
+        self.domain = domain
+
+    def __call__(self):
+        dump = self.domain.dump
+        return (pyarrow.string(),
+                (lambda value: dump(value) if value is not None else None))
+
+
+class VoidToArrow(ToArrow):
+
+    adapt(VoidDomain)
+
+    def __call__(self):
+        return (pyarrow.null(), None)
+
+
+class BooleanToArrow(ToArrow):
+
+    adapt(BooleanDomain)
+
+    def __call__(self):
+        return (pyarrow.bool_(), None)
+
+
+class IntegerToArrow(ToArrow):
+
+    adapt(IntegerDomain)
+
+    def __call__(self):
+        return (pyarrow.int64(), None)
+
+
+class FloatToArrow(ToArrow):
+
+    adapt(FloatDomain)
+
+    def __call__(self):
+        return (pyarrow.float64(), None)
+
+
+class DecimalToArrow(ToArrow):
+
+    adapt(DecimalDomain)
+
+    max_precision = 38
+
+    def __call__(self):
+        # Decimal columns need a fixed scale; when the database does not
+        # report it, we fall back to strings to keep the values exact.
+        precision = self.domain.precision
+        scale = self.domain.scale
+        if (scale is None or
+                (precision is not None and precision > self.max_precision)):
+            return (pyarrow.string(),
+                    (lambda value: str(value)
+                                   if value is not None and value.is_finite()
+                                   else None))
+        if precision is None:
+            precision = self.max_precision
+        return (pyarrow.decimal128(precision, scale),
+                (lambda value: value
+                               if value is not None and value.is_finite()
+                               else None))
+
+
+class TextToArrow(ToArrow):
+
+    adapt_many(UntypedDomain,
+               TextDomain,
+               EnumDomain)
+
+    def __call__(self):
+        return (pyarrow.string(), None)
+
+
+class DateToArrow(ToArrow):
+
+    adapt(DateDomain)
+
+    def __call__(self):
+        return (pyarrow.date32(), None)
+
+
+class TimeToArrow(ToArrow):
+
+    adapt(TimeDomain)
+
+    def __call__(self):
+        return (pyarrow.time64('us'), None)
+
+
+class DateTimeToArrow(ToArrow):
+
+    adapt(DateTimeDomain)
+
+    def __call__(self):
+        return (pyarrow.timestamp('us'), None)
+
+
+class ListToArrow(ToArrow):
+
+    adapt(ListDomain)
+
+    def __call__(self):
+        item_type, item_convert = to_arrow(self.domain.item_domain)
+        type = pyarrow.list_(item_type)
+        if item_convert is None:
+            return (type, None)
+        def convert(value):
+            if value is None:
+                return None
+            return [item_convert(item) for item in value]
+        return (type, convert)
+
+
+class RecordToArrow(ToArrow):
+
+    adapt(RecordDomain)
+
+    def __call__(self):
+        fields = []
+        field_converts = []
+        for index, field in enumerate(self.domain.fields):
+            field_type, field_convert = to_arrow(field.domain)
+            fields.append(pyarrow.field(field_name(field, index), field_type))
+            field_converts.append(field_convert)
+        type = pyarrow.struct(fields)
+        if all(field_convert is None for field_convert in field_converts):
+            return (type, None)
+        field_converts = [field_convert or (lambda item: item)
+                          for field_convert in field_converts]
+        def convert(value):
+            if value is None:
+                return None
+            return tuple([field_convert(item)
+                          for item, field_convert
+                          in zip(value, field_converts)])
+        return (type, convert)
+
+
+def field_name(profile, index):
+    # Column name: the field header, the tag, or the position.
+    if profile.header:
+        return profile.header
+    if profile.tag:
+        return profile.tag
+    return str(index)
+
+
+to_arrow = ToArrow.__invoke__
+
+
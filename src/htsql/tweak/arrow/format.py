@@ -0,0 +1,28 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.adapter import call
+from ...core.fmt.format import Format
+from ...core.fmt.accept import Accept
+from ...core.cmd.summon import SummonFormat
+
+
+class ArrowFormat(Format):
+    pass
+
+
+class SummonArrow(SummonFormat):
+
+    call('arrow')
+    format = ArrowFormat
+
+
+class AcceptArrow(Accept):
+
+    call("application/vnd.apache.arrow.stream",
+         "x-htsql/arrow")
+    format = ArrowFormat
+
+
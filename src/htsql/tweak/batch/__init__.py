@@ -0,0 +1,66 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect, wsgi
+from ...core.addon import Addon, Parameter, addon_registry
+from ...core.validator import PIntVal
+import concurrent.futures
+
+
+class TweakBatchAddon(Addon):
+
+    name = 'tweak.batch'
+    prerequisites = ['tweak.pool']
+    hint = """run a batch of queries in one request"""
+    help = """
+    This addon lets the client submit several queries in a single
+    HTTP request.  The request must be a POST request with a JSON
+    body, which is either a list of queries:
+
+        ["/school", "/department{name, count(course)}"]
+
+    or an object with the list of queries and options:
+
+        {"queries": [...], "snapshot": true}
+
+    The queries are executed concurrently, and the response is a JSON
+    object with the output of each query, in the same order:
+
+        {"results": [{"result": {...}}, {"error": "..."}]}
+
+    An error in one query does not affect the other queries.  The
+    queries cannot modify the database.
+
+    With option `snapshot`, the queries are executed one after another
+    in a single transaction, so that all of them see the same state
+    of the database.  Snapshot batches are supported by PostgreSQL,
+    MySQL, Oracle and SQLite backends.
+
+    Parameter `workers` sets the maximum number of queries executed
+    concurrently by the server; the default is 4.
+
+    Parameter `max_queries` sets the maximum number of queries in
+    a batch; the default is 100.
+    """
+
+    parameters = [
+            Parameter('workers', PIntVal(), default=4,
+                      hint="""number of concurrent queries (default: 4)"""),
+            Parameter('max_queries', PIntVal(), default=100,
+                      hint="""max. number of queries in a batch"""),
+    ]
+
+    @classmethod
+    def get_extension(cls, app, attributes):
+        if app.htsql.db is not None:
+            name = '%s.%s' % (cls.name, app.htsql.db.engine)
+            if name in addon_registry:
+                return name
+
+    def __init__(self, app, attributes):
+        super(TweakBatchAddon, self).__init__(app, attributes)
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+
+
@@ -0,0 +1,73 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.adapter import Utility
+from ...core.error import Error
+
+
+class BeginSnapshot(Utility):
+    """
+    Prepares a new transaction for a snapshot batch.
+
+    All statements executed in the transaction must see the same state
+    of the database.  Engines that support snapshot batches override
+    this utility.
+
+    `connection` (:class:`htsql.core.connect.ConnectionProxy`)
+        The connection of the transaction; no statements have been
+        executed in the transaction yet.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self):
+        raise Error("Snapshot batches are not supported by %s"
+                    % context.app.htsql.db.engine)
+
+
+class SaveSnapshot(Utility):
+    """
+    Marks the state of a snapshot transaction before a query.
+
+    With some engines, a failed statement aborts the whole transaction,
+    so the rest of the batch could not be executed.  These engines
+    override this utility and :class:`RestoreSnapshot` to isolate
+    the queries of the batch from each other.
+
+    `connection` (:class:`htsql.core.connect.ConnectionProxy`)
+        The connection of the snapshot transaction.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self):
+        pass
+
+
+class RestoreSnapshot(Utility):
+    """
+    Restores the state of a snapshot transaction after a query.
+
+    Called after each query of the batch, whether it succeeded or not.
+
+    `connection` (:class:`htsql.core.connect.ConnectionProxy`)
+        The connection of the snapshot transaction.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self):
+        pass
+
+
+begin_snapshot = BeginSnapshot.__invoke__
+save_snapshot = SaveSnapshot.__invoke__
+restore_snapshot = RestoreSnapshot.__invoke__
+
+
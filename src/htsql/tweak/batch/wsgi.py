@@ -0,0 +1,114 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.adapter import rank
+from ...core.error import Error, HTTPError
+from ...core.cache import current_cache
+from ...core.connect import transaction
+from ...core.wsgi import WSGI
+from ...core.cmd.act import produce
+from ...core.cmd.command import FormatCmd
+from ...core.cmd.summon import recognize
+from ...core.fmt.format import JSONFormat
+from ...core.fmt.emit import emit
+from .connect import begin_snapshot, save_snapshot, restore_snapshot
+import json
+
+
+class BatchWSGI(WSGI):
+
+    rank(3.0)
+
+    def __call__(self):
+        method = self.environ['REQUEST_METHOD']
+        content_type = self.environ.get('CONTENT_TYPE', '')
+        content_type = content_type.split(';')[0].strip().lower()
+        if not (method == 'POST' and content_type == 'application/json'):
+            return super(BatchWSGI, self).__call__()
+        try:
+            queries, is_snapshot = self.batch()
+        except ValueError as exc:
+            self.start_response('400 Bad Request',
+                                [('Content-Type', 'text/plain')])
+            return [("Invalid batch request: %s.\n" % exc).encode('utf-8')]
+        env = context.env
+        with env(can_write=False):
+            if is_snapshot:
+                try:
+                    with transaction() as connection:
+                        begin_snapshot(connection)
+                        outputs = []
+                        for query in queries:
+                            save_snapshot(connection)
+                            outputs.append(execute(query))
+                            restore_snapshot(connection)
+                except HTTPError as exc:
+                    return exc(self.environ, self.start_response)
+            else:
+                app = context.app
+                cache = current_cache()
+                can_read = env.can_read
+                # Queries share the catalog and cached plans of the request.
+                def run(query):
+                    with app, context.env(cache=cache, can_read=can_read,
+                                          can_write=False):
+                        return execute(query)
+                executor = app.tweak.batch.executor
+                outputs = list(executor.map(run, queries))
+        body = (b"{\"results\": [\n  " + b",\n  ".join(outputs) + b"\n]}\n")
+        self.start_response('200 OK',
+                            [('Content-Type', 'application/json'),
+                             ('Content-Length', str(len(body)))])
+        return [body]
+
+    def batch(self):
+        # Extract the list of queries and options from the request body.
+        try:
+            length = int(self.environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        data = self.environ['wsgi.input'].read(length)
+        try:
+            batch = json.loads(data.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            raise ValueError("expected a JSON document")
+        is_snapshot = False
+        if isinstance(batch, dict):
+            is_snapshot = batch.get('snapshot', False)
+            batch = batch.get('queries')
+            if not isinstance(is_snapshot, bool):
+                raise ValueError("expected a Boolean value for `snapshot`")
+        if not (isinstance(batch, list) and
+                all(isinstance(query, str) for query in batch)):
+            raise ValueError("expected a list of queries")
+        max_queries = context.app.tweak.batch.max_queries
+        if len(batch) > max_queries:
+            raise ValueError("expected no more than %s queries"
+                             % max_queries)
+        return batch, is_snapshot
+
+
+def execute(query):
+    # Runs a query; returns its output or the error as a JSON object.
+    try:
+        command = recognize(query)
+        # The output is always JSON.
+        if isinstance(command, FormatCmd):
+            command = command.feed
+        product = produce(command)
+        output = b"".join(emit(JSONFormat(with_indent=False), product))
+    except Error as exc:
+        return make_error(str(exc))
+    except Exception:
+        # An unexpected failure must not take down the whole batch.
+        return make_error("Failed to execute the query")
+    return b"{\"result\": " + output.strip() + b"}"
+
+
+def make_error(message):
+    return b"{\"error\": " + json.dumps(message).encode('utf-8') + b"}"
+
+
@@ -0,0 +1,66 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import act, connect, store
+from .store import ResultStore, MemoryStore
+from ...core.addon import Addon, Parameter, Variable
+from ...core.validator import PIntVal, UIntVal, ClassVal
+
+
+class TweakCacheAddon(Addon):
+
+    name = 'tweak.cache'
+    hint = """cache query results"""
+    help = """
+    This addon caches the output of HTSQL queries.  Responses to
+    repeated requests are served without querying the database.
+    Cached responses carry an `ETag` header, and a request with
+    a matching `If-None-Match` header gets `304 Not Modified`.
+
+    A cached result is discarded when the ETL commands modify any
+    of the tables read by the query, or when it expires.  Queries
+    that read no tables or call `today()` or `now()` are not cached.
+
+    Parameter `ttl` sets the time, in seconds, a result is kept in the
+    cache; the default is 60 seconds.  Set it to `null` to keep
+    results until the tables are modified.
+
+    Parameter `size` sets the maximum number of cached results;
+    the default is 1024.
+
+    Parameter `max_length` sets the size, in bytes, of the largest
+    response that could be cached; the default is 1048576.
+
+    Parameter `store` points to a `ResultStore` object that keeps
+    cached results.  Use it to share the cache between processes.
+    The object is specified by a dotted string of module names; the
+    last component in the dotted string is a module attribute.
+    By default, the results are kept in the memory of the process.
+    """
+
+    parameters = [
+            Parameter('ttl', PIntVal(is_nullable=True), default=60,
+                      value_name="SECONDS",
+                      hint="""time to keep a cached result (default: 60)"""),
+            Parameter('size', PIntVal(), default=1024,
+                      hint="""max number of cached results"""),
+            Parameter('max_length', UIntVal(), default=1048576,
+                      value_name="BYTES",
+                      hint="""max size of a cached response"""),
+            Parameter('store', ClassVal(ResultStore, is_nullable=True),
+                      value_name="MODULE.NAME",
+                      hint="""the shared result store"""),
+    ]
+
+    variables = [
+            Variable('modified_tables'),
+    ]
+
+    def __init__(self, app, attributes):
+        super(TweakCacheAddon, self).__init__(app, attributes)
+        if self.store is None:
+            self.store = MemoryStore(self.size)
+
+
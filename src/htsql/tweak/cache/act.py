@@ -0,0 +1,122 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.adapter import adapt
+from ...core.cmd.command import DefaultCmd, FetchCmd
+from ...core.cmd.act import Act, RenderAction, RenderFormat, produce_for
+from ...core.cmd.embed import embed
+from ...core.fmt.format import Format
+from ...core.fmt.accept import accept
+from ...core.fmt.emit import emit, emit_headers, emit_batch
+from ...core.fmt.json import meta_key
+from ...core.tr.translate import translate
+from .store import table_version
+import hashlib
+import itertools
+
+
+class RenderCachedFetch(Act):
+
+    adapt(FetchCmd, RenderAction)
+
+    def __call__(self):
+        format = accept(self.action.environ)
+        return render_cached(format, self.command, self.action.environ)
+
+
+class RenderCachedFormat(RenderFormat):
+
+    def __call__(self):
+        feed = self.command.feed
+        if isinstance(feed, DefaultCmd):
+            feed = FetchCmd(feed.syntax)
+        if not isinstance(feed, FetchCmd):
+            return super(RenderCachedFormat, self).__call__()
+        return render_cached(self.command.format, feed, self.action.environ)
+
+
+def render_cached(format, command, environ):
+    # Without read permissions, the query fails as usual.
+    if not context.env.can_read:
+        product = produce_for(format, command)
+        return ("200 OK", emit_headers(format, product),
+                emit(format, product))
+    addon = context.app.tweak.cache
+    store = addon.store
+    pipe = translate(command.syntax, embed(None), batch=emit_batch(format))
+    # Table versions cannot tell when the output of a query that uses
+    # `now()` or reads no tables changes; such queries are not cached.
+    if (pipe.properties['is_volatile'] or
+            not pipe.properties['tables']):
+        product = pipe()(None)
+        return ("200 OK", emit_headers(format, product),
+                emit(format, product))
+    # The output is determined by the SQL, the structure of the output,
+    # the format and the user.
+    key = (pipe.properties['sql'], meta_key(pipe.meta), format_key(format),
+           environ.get('REMOTE_USER'), context.env.can_write)
+    key = "result:%s" % hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    # Versions must be read before the query is executed; otherwise
+    # we may label old data with the version of a concurrent update.
+    versions = tuple((table, table_version(store, table))
+                     for table in sorted(str(table) for table
+                                         in pipe.properties['tables']))
+    entry = store.get(key)
+    if entry is not None and entry[0] == versions:
+        versions, etag, status, headers, body = entry
+        return respond(environ, etag, status, headers, body)
+    product = pipe()(None)
+    status = "200 OK"
+    headers = emit_headers(format, product)
+    body = emit(format, product)
+    chunks = []
+    length = 0
+    for chunk in body:
+        chunks.append(chunk)
+        length += len(chunk)
+        if length > addon.max_length:
+            # Too large to cache; send as is.
+            return (status, headers, itertools.chain(chunks, body))
+    body = b"".join(chunks)
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    store.set(key, (versions, etag, status, tuple(headers), body),
+              addon.ttl)
+    return respond(environ, etag, status, headers, body)
+
+
+def respond(environ, etag, status, headers, body):
+    # Makes a response with an `ETag` header; checks `If-None-Match`.
+    if etag_matches(environ.get('HTTP_IF_NONE_MATCH'), etag):
+        return ("304 Not Modified", [('ETag', etag)], [])
+    headers = list(headers)+[('ETag', etag)]
+    return (status, headers, [body])
+
+
+def etag_matches(header, etag):
+    # Weak comparison, as required for `If-None-Match`.
+    if not header:
+        return False
+    for item in header.split(','):
+        item = item.strip()
+        if item == '*':
+            return True
+        if item.startswith('W/'):
+            item = item[2:]
+        if item == etag:
+            return True
+    return False
+
+
+def format_key(format):
+    # The format type and its options.
+    key = [format.__class__.__module__, format.__class__.__name__]
+    for name, value in sorted(vars(format).items()):
+        if isinstance(value, Format):
+            value = format_key(value)
+        key.append((name, value))
+    return tuple(key)
+
+
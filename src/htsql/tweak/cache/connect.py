@@ -0,0 +1,54 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.connect import Transact, TransactionGuard
+from ..etl.cmd.command import Touch
+from .store import touch_table
+
+
+class CacheTransactionGuard(TransactionGuard):
+    # Collects the tables modified by the transaction and makes their
+    # cached results stale once the transaction is over.  We cannot
+    # do it earlier: a concurrent request could cache the content of
+    # the table before the changes are committed.
+
+    def __enter__(self):
+        connection = super(CacheTransactionGuard, self).__enter__()
+        if self.connection is None:
+            context.env.push(modified_tables=set())
+        return connection
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        tables = None
+        if self.connection is None:
+            tables = context.env.modified_tables
+            context.env.pop()
+        super(CacheTransactionGuard, self).__exit__(
+                exc_type, exc_value, exc_traceback)
+        if tables:
+            store = context.app.tweak.cache.store
+            for table in tables:
+                touch_table(store, table)
+
+
+class CacheTransact(Transact):
+
+    def __call__(self):
+        return CacheTransactionGuard()
+
+
+class CacheTouch(Touch):
+
+    def __call__(self):
+        tables = context.env.modified_tables
+        if tables is not None:
+            tables.add(str(self.table))
+        else:
+            # The connection is managed by the caller; we do not know
+            # when the transaction ends.
+            touch_table(context.app.tweak.cache.store, str(self.table))
+
+
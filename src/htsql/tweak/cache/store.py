@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.cache import LRUCache
+import threading
+import time
+import uuid
+
+
+class ResultStore:
+    """
+    Keeps cached query results.
+
+    To share cached results between several processes, implement this
+    interface on top of a shared key-value storage.
+
+    Keys are strings.  Values are strings or tuples of strings, bytes,
+    numbers and nested tuples, and could be serialized with :mod:`pickle`.
+    The store may discard any value at any time.
+    """
+
+    def get(self, key):
+        """
+        Returns the value associated with the key, or ``None``.
+        """
+        raise NotImplementedError()
+
+    def set(self, key, value, ttl=None):
+        """
+        Associates the value with the key.
+
+        `ttl` (an integer or ``None``)
+            If set, the number of seconds after which the value expires.
+        """
+        raise NotImplementedError()
+
+
+class MemoryStore(ResultStore):
+    """
+    Keeps cached results in the memory of the process.
+
+    `size` (an integer)
+        The maximum number of values; the least recently used values
+        are discarded first.
+    """
+
+    def __init__(self, size):
+        self.values = LRUCache(size=size)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                expires, value = self.values[key]
+            except KeyError:
+                return None
+        if expires is not None and expires < time.monotonic():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires = None
+        if ttl is not None:
+            expires = time.monotonic()+ttl
+        with self.lock:
+            self.values[key] = (expires, value)
+
+
+def table_version(store, table):
+    # Every table has a version tag, which changes when the table is
+    # modified; a cached result remembers the versions of the tables
+    # it was produced from.  A missing tag is replaced with a new one,
+    # which only makes the existing results stale.
+    key = "table:%s" % table
+    version = store.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        store.set(key, version)
+    return version
+
+
+def touch_table(store, table):
+    # Makes all cached results that read the table stale.  We use random
+    # tags rather than counters so that concurrent updates to a shared
+    # store could never restore a tag seen earlier.
+    store.set("table:%s" % table, uuid.uuid4().hex)
+
+
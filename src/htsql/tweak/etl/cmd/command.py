@@ -4,6 +4,7 @@
 
 
 from ....core.util import listof, tupleof, maybe
+from ....core.adapter import Utility
 from ....core.cmd.command import Command
 from ....core.entity import TableEntity
 
@@ -86,3 +87,26 @@ class WithCmd(Command):
         self.body = body
 
 
+class Touch(Utility):
+    """
+    Notifies that the active transaction modifies a table.
+
+    ETL commands call it for every table they write to.  By default,
+    it does nothing; addons that keep data derived from the table
+    content override it.
+
+    `table` (:class:`htsql.core.entity.TableEntity`)
+        The modified table.
+    """
+
+    def __init__(self, table):
+        assert isinstance(table, TableEntity)
+        self.table = table
+
+    def __call__(self):
+        pass
+
+
+touch = Touch.__invoke__
+
+
@@ -13,7 +13,7 @@ from ....core.domain import Product
 from ....core.cmd.act import Act, ProduceAction, SafeProduceAction, act
 from ....core.tr.binding import VoidBinding
 from ....core.tr.decorate import decorate
-from .command import CopyCmd
+from .command import CopyCmd, touch
 from .insert import BuildExtractNode, BuildExtractTable
 import tempfile
 
@@ -46,6 +46,7 @@ class CollectCopyPipe:
         if not context.env.can_write:
             raise PermissionError("No write permissions")
         with transaction() as connection:
+            touch(self.table)
             cursor = connection.cursor()
             with cursor.guard:
                 cursor = cursor.cursor
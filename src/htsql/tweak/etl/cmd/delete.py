@@ -13,7 +13,7 @@ from ....core.domain import Product
 from ....core.cmd.act import Act, ProduceAction, act
 from ....core.tr.binding import VoidBinding
 from ....core.tr.decorate import decorate
-from .command import DeleteCmd
+from .command import DeleteCmd, touch
 from .insert import BuildExtractNode
 from .merge import BuildResolveKey
 from ..tr.dump import serialize_delete
@@ -38,6 +38,7 @@ class ExecuteDeletePipe:
         if not context.env.can_write:
             raise PermissionError("No write permissions")
         with transaction() as connection:
+            touch(self.table)
             cursor = connection.cursor()
             cursor.execute(self.sql, key_row)
 
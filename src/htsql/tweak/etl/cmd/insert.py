@@ -27,7 +27,7 @@ from ....core.tr.signature import IsEqualSig, AndSig, PlaceholderSig
 from ....core.tr.decorate import decorate
 from ....core.tr.coerce import coerce
 from ....core.tr.lookup import identify
-from .command import InsertCmd
+from .command import InsertCmd, touch
 from ..tr.dump import serialize_insert
 import itertools
 import datetime
@@ -402,6 +402,7 @@ class ExecuteInsertPipe:
         if not context.env.can_write:
             raise PermissionError("No write permissions")
         with transaction() as connection:
+            touch(self.table)
             cursor = connection.cursor()
             cursor.execute(self.sql, row)
             rows = cursor.fetchall()
@@ -23,7 +23,7 @@ from ....core.tr.signature import IsEqualSig, AndSig, PlaceholderSig
 from ....core.tr.decorate import decorate
 from ....core.tr.coerce import coerce
 from ....core.tr.lookup import prescribe
-from .command import MergeCmd
+from .command import MergeCmd, touch
 from .insert import (BuildExtractNode, BuildExtractTable, BuildExecuteInsert,
         BuildResolveIdentity, BuildResolveChain)
 from ..tr.dump import serialize_update
@@ -227,6 +227,7 @@ class ExecuteUpdatePipe:
         if not context.env.can_write:
             raise PermissionError("No write permissions")
         with transaction() as connection:
+            touch(self.table)
             cursor = connection.cursor()
             cursor.execute(self.sql, row+key_row)
             rows = cursor.fetchall()
@@ -11,7 +11,7 @@ from ....core.cmd.act import Act, ProduceAction
 from ....core.domain import Product
 from ....core.tr.binding import VoidBinding
 from ....core.tr.decorate import decorate
-from .command import TruncateCmd
+from .command import TruncateCmd, touch
 from ..tr.dump import serialize_truncate
 
 
@@ -23,6 +23,7 @@ class ProduceTruncate(Act):
         if not context.env.can_write:
             raise PermissionError("No write permissions")
         with transaction() as connection:
+            touch(self.command.table)
             sql = serialize_truncate(self.command.table)
             meta = decorate(VoidBinding())
             data = None
@@ -6,7 +6,7 @@
 from . import connect, introspect
 from ...core.addon import Addon, Parameter
 from ...core.util import DB
-from ...core.validator import StrVal, SeqVal, RecordVal
+from ...core.validator import StrVal, SeqVal, RecordVal, BoolVal, UIntVal
 
 
 class TweakFileDBAddon(Addon):
@@ -20,6 +20,10 @@ class TweakFileDBAddon(Addon):
     the first row of the CSV file.  The remaining rows become the
     records in the table.
 
+    The type of each column is inferred from the first 1000 rows:
+    integer, float, date (`YYYY-MM-DD`) and Boolean (`true`/`false`)
+    columns are recognized; other columns are text.
+
     Parameter `sources` is a list of entries describing the source
     files; each entry has the following fields:
 
@@ -29,7 +33,16 @@ class TweakFileDBAddon(Addon):
     By default, UTF-8 encoding is assumed.
 
     Optional parameter `cache-file` allows you to specify a persistent
-    storage for the database.
+    storage for the database.  When a source file is changed, the
+    table is loaded again; if rows were only appended to the file,
+    just the new rows are loaded.
+
+    Use parameter `processes` to parse the files in a pool of several
+    processes.
+
+    If parameter `detect-keys` is set, the addon detects primary keys
+    and foreign keys of the tables from the names and the values of
+    the columns and indexes the key columns.
     """
 
     prerequisites = []
@@ -44,6 +57,13 @@ class TweakFileDBAddon(Addon):
                 hint="""encoding of CSV files"""),
             Parameter('cache_file', StrVal(),
                 hint="""persistent storage"""),
+            Parameter('detect_keys', BoolVal(),
+                default=False,
+                hint="""detect primary and foreign keys"""),
+            Parameter('processes', UIntVal(),
+                default=1,
+                value_name="""N""",
+                hint="""number of processes parsing CSV files"""),
     ]
 
     @classmethod
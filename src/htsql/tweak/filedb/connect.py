@@ -10,9 +10,15 @@ from ...core.adapter import rank, Utility
 from ...core.error import Error
 import sqlite3
 import os.path
+import io
 import csv
 import re
 import glob
+import itertools
+import datetime
+import hashlib
+import contextlib
+import multiprocessing
 
 
 class FileDBConnect(Connect):
@@ -23,13 +29,199 @@ class FileDBConnect(Connect):
         return build_filedb()
 
 
+integer_regexp = re.compile(r"^[-+]?(0|[1-9][0-9]*)$")
+real_regexp = re.compile(r"^[-+]?([0-9]+[.]?[0-9]*|[.][0-9]+)"
+                         r"([eE][-+]?[0-9]+)?$")
+date_regexp = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+
+
+def to_integer(value):
+    # Leading zeros are significant, e.g. in ZIP codes.
+    if integer_regexp.match(value):
+        value = int(value)
+        # SQLite integers are signed 64-bit.
+        if -2**63 <= value < 2**63:
+            return value
+
+
+def to_real(value):
+    if real_regexp.match(value):
+        # Digit strings rejected by `to_integer` are kept as text too.
+        if value.lstrip("+-").isdigit() and to_integer(value) is None:
+            return None
+        return float(value)
+
+
+def to_date(value):
+    if date_regexp.match(value):
+        try:
+            datetime.date(int(value[:4]), int(value[5:7]), int(value[8:]))
+        except ValueError:
+            return None
+        return value
+
+
+def to_boolean(value):
+    return {"true": 1, "false": 0}.get(value.lower())
+
+
+def open_csv(path, encoding, offset=0):
+    # Opens a CSV file at the given byte offset.
+    try:
+        binary = open(path, mode="rb")
+    except IOError as exc:
+        raise Error("Failed to open file", path)
+    binary.seek(offset)
+    stream = io.TextIOWrapper(binary, encoding=encoding, newline="")
+    return stream, csv.reader(stream)
+
+
+def mark_csv(binary, block_size=65536):
+    # Returns the end of the loaded data and the digest of its first and
+    # last blocks, which tells if the file was extended or rewritten.
+    offset = binary.tell()
+    if not offset:
+        return (None, None)
+    # A file could be extended only after a complete line.
+    binary.seek(offset-1)
+    if binary.read(1) != b"\n":
+        return (None, None)
+    return (offset, digest_csv(binary, offset, block_size))
+
+
+def digest_csv(binary, offset, block_size=65536):
+    digest = hashlib.sha1()
+    binary.seek(0)
+    digest.update(binary.read(min(offset, block_size)))
+    binary.seek(max(offset-block_size, 0))
+    digest.update(binary.read(min(offset, block_size)))
+    return digest.hexdigest()
+
+
+def read_csv(path, encoding, converters, preferences, sample_size,
+             batch_size, offset=None, column_types=None):
+    # Generates the events of loading a CSV file into a table:
+    #   `("create", column_names, column_types)`: (re)create the table;
+    #   `("insert", records)`: add a batch of records to the table;
+    #   `("done", offset, digest)`: the file is loaded; `offset` is
+    #   the position where new rows could be appended or `None`.
+    # If `column_types` is set, only the rows after `offset` are loaded
+    # into the existing table.
+    if column_types is not None:
+        stream, rows = open_csv(path, encoding, offset)
+        with stream:
+            idx = yield from convert_csv(rows, column_types, converters,
+                                         batch_size)
+            if idx is None:
+                yield ("done",)+mark_csv(stream.buffer)
+                return
+        # A new value does not fit the column type, so the whole file
+        # is loaded again.
+    stream, rows = open_csv(path, encoding)
+    with stream:
+        columns_row = next(rows, None)
+        if not columns_row:
+            yield ("done", None, None)
+            return
+        column_names = []
+        for idx, name in enumerate(columns_row):
+            if name:
+                name = to_name(name)
+            if not name or name in column_names or re.match(r"^_\d+$", name):
+                name = "_%s" % (idx+1)
+            column_names.append(name)
+        # Infer column types from the first rows of the file.
+        sample = list(itertools.islice(rows, sample_size))
+        column_types = []
+        for idx in range(len(column_names)):
+            values = [row[idx] for row in sample if idx < len(row) and row[idx]]
+            for column_type in preferences:
+                convert = converters[column_type]
+                if values and all(convert(value) is not None
+                                  for value in values):
+                    break
+            else:
+                column_type = "TEXT"
+            column_types.append(column_type)
+        # Rows appended to the file could be loaded separately only if
+        # they cannot change the inferred types.
+        is_extensible = (len(sample) == sample_size)
+        rows = itertools.chain(sample, rows)
+        # A value after the sample may not fit the inferred type; then
+        # the column is declared as `TEXT` and the file is read again.
+        while True:
+            yield ("create", column_names, column_types[:])
+            idx = yield from convert_csv(rows, column_types, converters,
+                                         batch_size)
+            if idx is None:
+                break
+            column_types[idx] = "TEXT"
+            stream.seek(0)
+            rows = csv.reader(stream)
+            next(rows)
+        if is_extensible:
+            yield ("done",)+mark_csv(stream.buffer)
+        else:
+            yield ("done", None, None)
+
+
+def convert_csv(rows, column_types, converters, batch_size):
+    # Generates `insert` events with batches of records, so that the file
+    # is never kept in memory.  Returns the index of a column with
+    # an ill-typed value or `None`.
+    width = len(column_types)
+    conversions = [(idx, converters[column_type])
+                   for idx, column_type in enumerate(column_types)
+                   if column_type in converters]
+    while True:
+        records = []
+        for row in itertools.islice(rows, batch_size):
+            if len(row) != width:
+                row = (row+[""]*width)[:width]
+            record = [value or None for value in row]
+            for idx, convert in conversions:
+                value = record[idx]
+                if value is not None:
+                    value = convert(value)
+                    if value is None:
+                        return idx
+                    record[idx] = value
+            records.append(record)
+        if not records:
+            return None
+        yield ("insert", records)
+
+
+def read_csv_worker(queue, index, arguments):
+    # Loads a file in a separate process and passes the events
+    # to the writer.
+    try:
+        for event in read_csv(*arguments):
+            queue.put((index, event))
+    except Exception as exc:
+        queue.put((index, ("error", str(exc))))
+
+
 class BuildFileDB(Utility):
 
+    # The number of rows used to infer column types.
+    sample_size = 1000
+    # The number of rows inserted at once.
+    batch_size = 10000
+    # The column types in the order of preference.
+    column_types = ["BOOLEAN", "INTEGER", "REAL", "DATE"]
+    converters = {
+            "BOOLEAN": to_boolean,
+            "INTEGER": to_integer,
+            "REAL": to_real,
+            "DATE": to_date,
+    }
+
     def __init__(self, connection):
         self.connection = connection
 
     def __call__(self):
-        encoding = context.app.tweak.filedb.encoding
+        addon = context.app.tweak.filedb
         cursor = self.connection.cursor()
         source_meta = {}
         cursor.execute("""
@@ -43,85 +235,289 @@ class BuildFileDB(Utility):
                     name        TEXT PRIMARY KEY NOT NULL,
                     file        TEXT UNIQUE NOT NULL,
                     size        INTEGER NOT NULL,
-                    timestamp   FLOAT NOT NULL
+                    timestamp   FLOAT NOT NULL,
+                    "offset"    INTEGER,
+                    digest      TEXT
                 )
             """)
         else:
+            # Cache files made by older versions do not track offsets.
+            cursor.execute("""
+                PRAGMA table_info("!source")
+            """)
+            if "offset" not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute("""
+                    ALTER TABLE "!source" ADD COLUMN "offset" INTEGER
+                """)
+                cursor.execute("""
+                    ALTER TABLE "!source" ADD COLUMN digest TEXT
+                """)
             cursor.execute("""
-                SELECT name, file, size, timestamp
+                SELECT name, file, size, timestamp, "offset", digest
                 FROM "!source"
                 ORDER BY name
             """)
-            for name, file, size, timestamp in cursor.fetchall():
-                source_meta[name] = (file, size, timestamp)
+            for name, file, size, timestamp, offset, digest \
+                    in cursor.fetchall():
+                source_meta[name] = (file, size, timestamp, offset, digest)
+        tasks = []
         for table_name, source_file in build_names():
             if not os.path.exists(source_file):
                 raise Error("File does not exist", source_file)
             stat = os.stat(source_file)
             meta = (source_file, stat.st_size, stat.st_mtime)
+            offset = None
+            column_types = None
             if table_name in source_meta:
-                if meta == source_meta[table_name]:
+                if meta == source_meta[table_name][:3]:
                     continue
+                offset, digest = source_meta[table_name][3:]
+                if (source_meta[table_name][0] == source_file and
+                        offset is not None and offset <= stat.st_size):
+                    with open(source_file, mode="rb") as binary:
+                        if digest_csv(binary, offset) != digest:
+                            offset = None
                 else:
+                    offset = None
+                if offset is not None:
                     cursor.execute("""
-                        UPDATE "!source"
-                        SET file = ?,
-                            size = ?,
-                            timestamp = ?
-                        WHERE name = ?
-                    """, meta+(table_name,))
-                    cursor.execute("""
-                        DROP TABLE "%s"
+                        PRAGMA table_info("%s")
                     """ % table_name)
+                    column_types = [row[2] for row in cursor.fetchall()]
+                    if not column_types:
+                        offset = column_types = None
+            if column_types is not None:
+                # The file has grown: indexes are dropped to let
+                # the new rows in; the keys are detected again.
+                cursor.execute("""
+                    SELECT name
+                    FROM sqlite_master
+                    WHERE type = 'index' AND tbl_name = ? AND
+                          sql IS NOT NULL
+                    ORDER BY name
+                """, (table_name,))
+                for name, in cursor.fetchall():
+                    cursor.execute("""
+                        DROP INDEX "%s"
+                    """ % name)
             else:
                 cursor.execute("""
-                    INSERT INTO "!source" (name, file, size, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (table_name,)+meta)
-            try:
-                stream = open(source_file, mode="rU", encoding=encoding)
-            except IOError as exc:
-                raise Error("Failed to open file", source_file)
-            reader = csv.reader(stream)
-            try:
-                columns_row = next(reader)
-            except StopIteration:
-                continue
-            if not columns_row:
+                    DROP TABLE IF EXISTS "%s"
+                """ % table_name)
+            arguments = (source_file, addon.encoding, self.converters,
+                         self.column_types, self.sample_size,
+                         self.batch_size, offset, column_types)
+            tasks.append((table_name, meta, arguments))
+        if not tasks:
+            return False
+        if addon.processes > 1 and len(tasks) > 1:
+            events = self.read_parallel([arguments
+                                         for table_name, meta, arguments
+                                         in tasks], addon.processes)
+        else:
+            events = ((index, event)
+                      for index, (table_name, meta, arguments)
+                            in enumerate(tasks)
+                      for event in read_csv(*arguments))
+        with contextlib.closing(events):
+            for index, event in events:
+                table_name, meta, arguments = tasks[index]
+                if event[0] == "create":
+                    self.create(cursor, table_name, *event[1:])
+                elif event[0] == "insert":
+                    self.insert(cursor, table_name, *event[1:])
+                elif event[0] == "done":
+                    cursor.execute("""
+                        INSERT OR REPLACE INTO "!source"
+                            (name, file, size, timestamp, "offset", digest)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (table_name,)+meta+event[1:])
+        return True
+
+    def read_parallel(self, tasks, processes):
+        # Parses the files in a pool of processes; the events are passed
+        # back to the caller, which is the only writer to the database.
+        queue = multiprocessing.Queue(2*processes)
+        tasks = list(enumerate(tasks))
+        workers = {}
+        try:
+            while tasks or workers:
+                while tasks and len(workers) < processes:
+                    index, arguments = tasks.pop(0)
+                    worker = multiprocessing.Process(
+                            target=read_csv_worker,
+                            args=(queue, index, arguments),
+                            daemon=True)
+                    worker.start()
+                    workers[index] = worker
+                index, event = queue.get()
+                if event[0] == "error":
+                    raise Error(event[1])
+                yield (index, event)
+                if event[0] == "done":
+                    workers.pop(index).join()
+        finally:
+            for worker in workers.values():
+                worker.terminate()
+
+    def create(self, cursor, table_name, column_names, column_types):
+        cursor.execute("""
+            DROP TABLE IF EXISTS "%s"
+        """ % table_name)
+        chunks = []
+        chunks.append("CREATE TABLE \"%s\" (" % table_name)
+        for idx, column_name in enumerate(column_names):
+            chunks.append("    \"%s\" %s"
+                          % (column_name, column_types[idx])
+                          + ("," if idx < len(column_names)-1 else ""))
+        chunks.append(")")
+        sql = "\n".join(chunks)
+        cursor.execute(sql)
+
+    def insert(self, cursor, table_name, records):
+        chunks = []
+        chunks.append("INSERT INTO \"%s\"" % table_name)
+        chunks.append("VALUES (%s)" % ",".join(["?"]*len(records[0])))
+        sql = "\n".join(chunks)
+        cursor.executemany(sql, records)
+
+
+class DetectFileDBKeys(Utility):
+    """
+    Detects primary and foreign keys of the loaded tables and indexes
+    the key columns.
+
+    The keys are recorded in the ``"!key"`` table.
+
+    `connection`
+        A connection to the filedb database.
+
+    `is_changed` (Boolean)
+        Set if any table was loaded.
+    """
+
+    # Column types that could form a key.
+    key_types = ["INTEGER", "TEXT", "DATE"]
+
+    def __init__(self, connection, is_changed):
+        self.connection = connection
+        self.is_changed = is_changed
+
+    def __call__(self):
+        addon = context.app.tweak.filedb
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT 1
+            FROM sqlite_master
+            WHERE name = '!key'
+        """)
+        is_recorded = (cursor.fetchone() is not None)
+        if is_recorded:
+            if addon.detect_keys and not self.is_changed:
+                return
+            # Drop the keys detected previously.
+            cursor.execute("""
+                SELECT name
+                FROM "!key"
+                ORDER BY name
+            """)
+            for name, in cursor.fetchall():
+                cursor.execute("""
+                    DROP INDEX IF EXISTS "%s"
+                """ % name)
+            cursor.execute("""
+                DROP TABLE "!key"
+            """)
+        if not addon.detect_keys:
+            return
+        cursor.execute("""
+            CREATE TABLE "!key" (
+                name            TEXT PRIMARY KEY NOT NULL,
+                "table"         TEXT NOT NULL,
+                "column"        TEXT NOT NULL,
+                target_table    TEXT,
+                target_column   TEXT
+            )
+        """)
+        # Find the columns of the loaded tables.
+        columns_by_table = {}
+        for table_name, source_file in build_names():
+            cursor.execute("""
+                PRAGMA table_info("%s")
+            """ % table_name)
+            columns = [(row[1], row[2]) for row in cursor.fetchall()]
+            if columns:
+                columns_by_table[table_name] = columns
+        # A primary key is a column with unique non-null values named
+        # `id` or `code` (possibly prefixed with the table name), or
+        # else the first column.
+        primary_keys = {}
+        for table_name in sorted(columns_by_table):
+            columns = columns_by_table[table_name]
+            names = ["id", "code", table_name+"_id", table_name+"_code"]
+            candidates = [column for column in columns if column[0] in names]
+            candidates.sort(key=(lambda column: names.index(column[0])))
+            if columns[0] not in candidates:
+                candidates.append(columns[0])
+            cursor.execute("""
+                SELECT COUNT(*) FROM "%s"
+            """ % table_name)
+            count, = cursor.fetchone()
+            if not count:
                 continue
-            column_names = []
-            for idx, name in enumerate(columns_row):
-                if name:
-                    name = to_name(name)
-                if not name or name in column_names or re.match(r"^_\d+$", name):
-                    name = "_%s" % (idx+1)
-                column_names.append(name)
-            records = []
-            for row in reader:
-                record = []
-                for idx in range(len(column_names)):
-                    if idx < len(row):
-                        value = row[idx]
-                        if not value:
-                            value = None
-                    else:
-                        value = None
-                    record.append(value)
-                records.append(record)
-            chunks = []
-            chunks.append("CREATE TABLE \"%s\" (" % table_name)
-            for idx, column_name in enumerate(column_names):
-                chunks.append("    \"%s\" TEXT" % column_name
-                              + ("," if idx < len(column_names)-1 else ""))
-            chunks.append(")")
-            sql = "\n".join(chunks)
-            cursor.execute(sql)
-            if records:
-                chunks = []
-                chunks.append("INSERT INTO \"%s\"" % table_name)
-                chunks.append("VALUES (%s)" % ",".join(["?"]*len(column_names)))
-                sql = "\n".join(chunks)
-                cursor.executemany(sql, records)
+            for column_name, column_type in candidates:
+                if column_type not in self.key_types:
+                    continue
+                cursor.execute("""
+                    SELECT COUNT(DISTINCT "%s") FROM "%s"
+                """ % (column_name, table_name))
+                if cursor.fetchone()[0] == count:
+                    primary_keys[table_name] = (column_name, column_type)
+                    self.record(cursor, "UNIQUE INDEX",
+                                table_name, column_name)
+                    break
+        # A foreign key is a column named after another table, which
+        # contains only values of the primary key of that table.
+        for table_name in sorted(columns_by_table):
+            for column_name, column_type in columns_by_table[table_name]:
+                if primary_keys.get(table_name) == (column_name, column_type):
+                    continue
+                for target_name in sorted(primary_keys):
+                    if target_name == table_name:
+                        continue
+                    target_column, target_type = primary_keys[target_name]
+                    names = [target_name, target_name+"_"+target_column]
+                    if target_column not in ["id", "code"]:
+                        names.append(target_column)
+                    if column_name in names and column_type == target_type:
+                        break
+                else:
+                    continue
+                cursor.execute("""
+                    SELECT COUNT("%s"),
+                           COUNT(CASE WHEN "%s" NOT IN
+                                          (SELECT "%s" FROM "%s")
+                                      THEN 1 END)
+                    FROM "%s"
+                """ % (column_name, column_name,
+                       target_column, target_name, table_name))
+                count, missing = cursor.fetchone()
+                if count and not missing:
+                    self.record(cursor, "INDEX", table_name, column_name,
+                                target_name, target_column)
+
+    def record(self, cursor, kind, table_name, column_name,
+               target_name=None, target_column=None):
+        # Creates an index and records the key.
+        name = "!key:%s:%s" % (table_name, column_name)
+        cursor.execute("""
+            CREATE %s "%s" ON "%s" ("%s")
+        """ % (kind, name, table_name, column_name))
+        cursor.execute("""
+            INSERT INTO "!key" (name, "table", "column",
+                                target_table, target_column)
+            VALUES (?, ?, ?, ?, ?)
+        """, (name, table_name, column_name, target_name, target_column))
 
 
 @once
@@ -152,7 +548,8 @@ def build_filedb():
         cache_file = ':memory:'
     with DBErrorGuard():
         connection = sqlite3.connect(cache_file, check_same_thread=False)
-        BuildFileDB.__invoke__(connection)
+        is_changed = BuildFileDB.__invoke__(connection)
+        DetectFileDBKeys.__invoke__(connection, is_changed)
         connection.commit()
     return connection
 
@@ -3,6 +3,8 @@
 #
 
 
+from ...core.context import context
+from ...core.connect import connect
 from htsql_sqlite.core.introspect import IntrospectSQLite
 from .connect import build_names
 
@@ -12,10 +14,43 @@ class IntrospectFileDBCleanup(IntrospectSQLite):
     def __call__(self):
         catalog = super(IntrospectFileDBCleanup, self).__call__()
         table_names = set(name for name, file in build_names())
-        for schema in catalog:
-            for table in list(schema):
-                if table.name not in table_names:
-                    table.remove()
+        catalog.remove_tables([table
+                               for schema in catalog
+                               for table in schema
+                               if table.name not in table_names])
+        if context.app.tweak.filedb.detect_keys:
+            self.add_keys(catalog)
         return catalog
 
+    def add_keys(self, catalog):
+        # Adds the keys found by `DetectFileDBKeys`.
+        schema = catalog['']
+        connection = connect()
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT "table", "column", target_table, target_column
+            FROM "!key"
+            ORDER BY target_table IS NOT NULL, name
+        """)
+        for table_name, column_name, target_name, target_column_name \
+                in cursor.fetchall():
+            if table_name not in schema:
+                continue
+            table = schema[table_name]
+            column = table[column_name]
+            if target_name is None:
+                # The unique index is already introspected as a unique key.
+                for unique_key in table.unique_keys:
+                    if unique_key.origin_columns == [column]:
+                        break
+                else:
+                    unique_key = table.add_unique_key([column])
+                column.set_is_nullable(False)
+                unique_key.set_is_primary(True)
+            elif target_name in schema:
+                target = schema[target_name]
+                table.add_foreign_key([column], target,
+                                      [target[target_column_name]])
+        connection.release()
+
 
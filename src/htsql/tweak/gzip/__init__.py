@@ -0,0 +1,30 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import wsgi
+from ...core.addon import Addon, Parameter
+from ...core.validator import IntVal
+
+
+class TweakGZipAddon(Addon):
+
+    name = 'tweak.gzip'
+    hint = """compress HTTP output"""
+    help = """
+    This addon compresses query results when the client indicates
+    support for `gzip` or `deflate` encoding in the `Accept-Encoding`
+    header.  The output is compressed as it is produced.
+
+    Parameter `level` sets the compression level from 1 (fastest)
+    to 9 (best compression); the default is 6.
+    """
+
+    parameters = [
+            Parameter('level', IntVal(1, 9), default=6,
+                      value_name="LEVEL",
+                      hint="""compression level, 1-9 (default: 6)"""),
+    ]
+
+
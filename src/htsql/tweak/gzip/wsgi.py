@@ -0,0 +1,108 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.adapter import rank
+from ...core.wsgi import WSGI, accept_encodings
+import zlib
+
+
+class CompressedBody:
+    """
+    Compresses the body of a WSGI response as it is produced.
+
+    `body`
+        An iterator over the chunks of the response body.
+
+    `compressor`
+        A ``zlib`` compression object.
+    """
+
+    def __init__(self, body, compressor):
+        self.body = body
+        self.compressor = compressor
+
+    def __iter__(self):
+        for chunk in self.body:
+            chunk = self.compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        yield self.compressor.flush()
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
+
+
+class GZipWSGI(WSGI):
+
+    rank(5.0)
+
+    # The value of `wbits` for each supported encoding.
+    encodings = [('gzip', 16+zlib.MAX_WBITS),
+                 ('deflate', zlib.MAX_WBITS)]
+    # Do not compress responses shorter than that.
+    min_length = 512
+
+    def __call__(self):
+        accepted = accept_encodings(self.environ)
+        for encoding, wbits in self.encodings:
+            if encoding in accepted:
+                break
+        else:
+            return super(GZipWSGI, self).__call__()
+        # Let the response be generated, but hold the headers until we
+        # decide whether to compress it.
+        start_response = self.start_response
+        responses = []
+        def hold_start_response(status, headers, exc_info=None):
+            responses.append((status, headers, exc_info))
+        self.start_response = hold_start_response
+        try:
+            body = super(GZipWSGI, self).__call__()
+        finally:
+            self.start_response = start_response
+        status, headers, exc_info = responses[-1]
+        names = set(name.lower() for name, value in headers)
+        if status.startswith('304 ') and 'vary' not in names:
+            # Report the same entity tag as the compressed response would;
+            # a response with `Vary` has already chosen its encoding.
+            headers = self.weaken(headers)+[('Vary', 'Accept-Encoding')]
+            start_response(status, headers, exc_info)
+            return body
+        length = None
+        for name, value in headers:
+            if name.lower() == 'content-length':
+                length = int(value)
+        if not (status.startswith('200 ') and 'content-type' in names and
+                'content-encoding' not in names and
+                (length is None or length >= self.min_length)):
+            start_response(status, headers, exc_info)
+            return body
+        level = context.app.tweak.gzip.level
+        compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+        headers = [(name, value) for name, value in headers
+                   if name.lower() != 'content-length']
+        headers = self.weaken(headers)
+        headers.append(('Content-Encoding', encoding))
+        headers.append(('Vary', 'Accept-Encoding'))
+        if length is not None:
+            # The body is already buffered; compress it at once.
+            body = CompressedBody(body, compressor)
+            data = b"".join(body)
+            body.close()
+            headers.append(('Content-Length', str(len(data))))
+            start_response(status, headers, exc_info)
+            return [data]
+        start_response(status, headers, exc_info)
+        return CompressedBody(body, compressor)
+
+    def weaken(self, headers):
+        # The compressed body is not byte-identical to the original one,
+        # so a strong entity tag becomes weak.
+        return [(name, 'W/'+value)
+                if name.lower() == 'etag' and not value.startswith('W/')
+                else (name, value)
+                for name, value in headers]
@@ -4,7 +4,8 @@
 
 
 from . import command
-from ...core.addon import Addon
+from ...core.addon import Addon, Parameter
+from ...core.validator import StrVal
 
 
 class TweakMetaAddon(Addon):
@@ -26,8 +27,18 @@ class TweakMetaAddon(Addon):
     For example, to get a list of all tables, run the query:
 
         /table/:meta
+
+    The meta database is built in memory on the first query and
+    shared by all applications with the same catalog.  Use parameter
+    `cache-file` to keep it in a file; then it is rebuilt only when
+    the catalog changes, and only the rows of changed tables are
+    replaced.
     """
 
     prerequisites = []
+    parameters = [
+            Parameter('cache_file', StrVal(),
+                hint="""persistent storage for the meta database"""),
+    ]
 
 
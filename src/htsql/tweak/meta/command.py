@@ -4,12 +4,14 @@
 
 
 from ...core.context import context
-from ...core.cache import once
+from ...core.cache import once, current_cache
 from ...core.adapter import adapt, call
+from ...core.classify import PrepareCatalog
 from ...core.error import Error
 from ...core.cmd.command import Command
 from ...core.cmd.act import Act, Action, RenderAction, act
 from ...core.cmd.summon import Summon, recognize
+from .slave.connect import build_meta
 import weakref
 
 
@@ -17,10 +19,24 @@ import weakref
 def get_slave_app():
     from htsql import HTSQL
     master = weakref.ref(context.app)
-    slave = HTSQL(None, {'tweak.meta.slave': {'master': master}})
+    master_cache = weakref.ref(current_cache())
+    cache_file = context.app.tweak.meta.cache_file
+    slave = HTSQL(None, {'tweak.meta.slave': {'master': master,
+                                              'master_cache': master_cache,
+                                              'cache_file': cache_file}})
     return slave
 
 
+class PrepareMeta(PrepareCatalog):
+
+    def __call__(self):
+        super(PrepareMeta, self).__call__()
+        # Build the meta database before the new catalog is put to use.
+        slave_app = get_slave_app()
+        with slave_app:
+            build_meta()
+
+
 class MetaCmd(Command):
 
     def __init__(self, command):
@@ -3,10 +3,10 @@
 #
 
 
-from . import connect
+from . import connect, introspect
 from ....core.addon import Addon, Parameter
 from ....core.util import DB
-from ....core.validator import ClassVal
+from ....core.validator import ClassVal, StrVal
 
 
 class TweakMetaSlaveAddon(Addon):
@@ -18,6 +18,8 @@ class TweakMetaSlaveAddon(Addon):
     postrequisites = ['htsql']
     parameters = [
             Parameter('master', ClassVal(object)),
+            Parameter('master_cache', ClassVal(object)),
+            Parameter('cache_file', StrVal(is_nullable=True)),
     ]
 
     @classmethod
@@ -29,6 +31,6 @@ class TweakMetaSlaveAddon(Addon):
                                      password=None,
                                      host=None, port=None),
                             'debug': debug },
-                 'engine.sqlite': {} }
+                 'engine.sqlite': { 'connection_cache_size': 8 } }
 
 
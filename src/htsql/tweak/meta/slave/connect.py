@@ -8,37 +8,120 @@ from ....core.connect import Connect
 from ....core.adapter import rank, Utility
 from ....core.classify import classify, relabel
 from ....core.model import HomeNode, TableArc, ColumnArc, ChainArc
+from ....core.introspect import introspect
+from urllib.request import pathname2url
 import sqlite3
+import threading
+import weakref
+import hashlib
+import os.path
 
 
 class MetaSlaveConnect(Connect):
 
-    rank(2.0) # ensure connections here are not pooled
+    rank(2.0) # override `ConnectSQLite`
 
     def open(self):
-        return build_meta()
+        return build_meta().open()
+
+
+class MetaDatabase:
+    """
+    A meta database shared by slave applications.
+
+    In-memory databases are named after the fingerprint of the master
+    catalog, so the slaves of the same catalog use the same database;
+    the database exists while the object holding the writer connection
+    is alive.
+
+    `uri`: ``str``
+        The SQLite URI of the database.
+
+    `is_memory`: ``bool``
+        Set if the database is kept in memory.
+    """
+
+    def __init__(self, uri, is_memory):
+        self.uri = uri
+        self.is_memory = is_memory
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(uri, uri=True,
+                                          check_same_thread=False)
+        self.fingerprint = self.get_fingerprint()
+
+    def get_fingerprint(self):
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT 1
+            FROM sqlite_master
+            WHERE name = '!fingerprint'
+        """)
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute("""
+            SELECT value
+            FROM "!fingerprint"
+        """)
+        row = cursor.fetchone()
+        return row[0] if row is not None else None
+
+    def update(self, fingerprint, base=None):
+        # Brings the database up to date with the master catalog.
+        with self.lock:
+            if self.fingerprint == fingerprint:
+                return
+            if base is not None and self.fingerprint is None:
+                # Start from a database built for another catalog.
+                base.connection.backup(self.connection)
+            BuildMetaDatabase.__invoke__(self.connection)
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                DELETE FROM "!fingerprint"
+            """)
+            cursor.execute("""
+                INSERT INTO "!fingerprint" (value)
+                VALUES (?)
+            """, [fingerprint])
+            self.connection.commit()
+            self.fingerprint = fingerprint
+
+    def open(self):
+        # Opens a read-only connection.
+        connection = sqlite3.connect(self.uri, uri=True,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA query_only = ON")
+        return connection
 
 
 class BuildMetaDatabase(Utility):
+    """
+    Updates the meta database to describe the master catalog.
+
+    For every table of the master database, the utility computes
+    a digest of the structure of the table and its neighbors; only if
+    the digest differs from the one stored in the ``"!digest"`` table,
+    the table is classified and its rows are replaced.
+    """
 
     def __init__(self, connection):
         self.connection = connection
 
     def __call__(self):
-        master_app = context.app.tweak.meta.slave.master()
-        with master_app:
+        slave = context.app.tweak.meta.slave
+        master_app = slave.master()
+        with master_app, context.env(cache=slave.master_cache()):
             self.build_schema()
-            self.build_data()
+            self.build_data(get_configuration(master_app))
 
     def build_schema(self):
         cursor = self.connection.cursor()
         cursor.executescript("""
-            CREATE TABLE "table" (
+            CREATE TABLE IF NOT EXISTS "table" (
                 name                TEXT NOT NULL,
                 PRIMARY KEY (name)
             );
 
-            CREATE TABLE "field" (
+            CREATE TABLE IF NOT EXISTS "field" (
                 table_name          TEXT NOT NULL,
                 name                TEXT NOT NULL,
                 kind                TEXT NOT NULL,
@@ -50,7 +133,7 @@ class BuildMetaDatabase(Utility):
                 CHECK ("kind" IN ('column', 'link'))
             );
 
-            CREATE TABLE "column" (
+            CREATE TABLE IF NOT EXISTS "column" (
                 table_name          TEXT NOT NULL,
                 name                TEXT NOT NULL,
                 domain              TEXT NOT NULL,
@@ -62,7 +145,7 @@ class BuildMetaDatabase(Utility):
                    REFERENCES "table"(name)
             );
 
-            CREATE TABLE "link" (
+            CREATE TABLE IF NOT EXISTS "link" (
                 table_name          TEXT NOT NULL,
                 name                TEXT NOT NULL,
                 is_singular         BOOLEAN NOT NULL,
@@ -80,13 +163,71 @@ class BuildMetaDatabase(Utility):
                    REFERENCES "link"(table_name, name)
             );
 
-            PRAGMA FOREIGN_KEYS = ON;
+            CREATE TABLE IF NOT EXISTS "!fingerprint" (
+                value               TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS "!digest" (
+                table_name          TEXT NOT NULL,
+                digest              TEXT NOT NULL,
+                PRIMARY KEY (table_name)
+            );
         """)
 
-    def build_data(self):
+    def build_data(self, configuration):
         cursor = self.connection.cursor()
+        digests = {}
+        cursor.execute("""
+            SELECT table_name, digest
+            FROM "!digest"
+        """)
+        for table_name, digest in cursor.fetchall():
+            digests[table_name] = digest
+        changes = []
+        for origin in self.collect_tables():
+            table_name = relabel(TableArc(origin.table))[0].name
+            digest = self.get_digest(origin, configuration)
+            if digests.pop(table_name, None) != digest:
+                changes.append((table_name, digest, origin))
+        # Remove all obsolete rows before adding new ones, so that
+        # unique keys are never violated.
+        obsolete = sorted(digests)+[table_name
+                                    for table_name, digest, origin in changes]
+        for table_name in obsolete:
+            for name in ["link", "column", "field", "table", "!digest"]:
+                key = "table_name" if name != "table" else "name"
+                cursor.execute("""
+                    DELETE FROM "%s"
+                    WHERE %s = ?
+                """ % (name, key), [table_name])
+        for table_name, digest, origin in changes:
+            fields, columns, links = self.collect_data(table_name, origin)
+            cursor.execute("""
+                INSERT INTO "table" (name)
+                VALUES (?)
+            """, [table_name])
+            cursor.executemany("""
+                INSERT INTO "field" (table_name, name, kind, sort)
+                VALUES (?, ?, ?, ?)
+            """, fields)
+            cursor.executemany("""
+                INSERT INTO "column" (table_name, name,
+                                      domain, is_mandatory)
+                VALUES (?, ?, ?, ?)
+            """, columns)
+            cursor.executemany("""
+                INSERT INTO "link" (table_name, name, is_singular,
+                                    target_name, reverse_name)
+                VALUES (?, ?, ?, ?, ?)
+            """, links)
+            cursor.execute("""
+                INSERT INTO "!digest" (table_name, digest)
+                VALUES (?, ?)
+            """, [table_name, digest])
 
-        home_arcs = []
+    def collect_tables(self):
+        # Returns the nodes of the tables available from the root.
+        nodes = []
         seen = set()
         for label in classify(HomeNode()):
             arc = label.arc
@@ -94,91 +235,157 @@ class BuildMetaDatabase(Utility):
                 continue
             if arc in seen:
                 continue
-            home_arcs.append(arc)
+            nodes.append(arc.target)
             seen.add(arc)
+        return nodes
+
+    def get_digest(self, origin, configuration):
+        # The rows of a table depend on the table itself, the tables
+        # it is linked to, and the tables linked to those, which may
+        # affect the names of reverse links.
+        table = origin.table
+        neighbors = []
+        for neighbor in get_neighbors(table):
+            labels = relabel(TableArc(neighbor))
+            neighbors.append((labels[0].name if labels else None,
+                              describe(neighbor),
+                              [(other.schema.name, other.name)
+                               for other in get_neighbors(neighbor)]))
+        return hashlib.sha1(repr((configuration, describe(table), neighbors))
+                            .encode('utf-8')).hexdigest()
 
-        for arc in home_arcs:
-            labels = relabel(arc)
-            assert len(labels) > 0
-            label = labels[0]
+    def collect_data(self, table_name, origin):
+        # Returns rows of `field`, `column` and `link` tables describing
+        # the given table.
+        table_arcs = []
+        seen = set()
+        for label in classify(origin):
+            arc = label.arc
+            if not isinstance(arc, (ColumnArc, ChainArc)):
+                continue
+            if arc in seen:
+                continue
+            if (isinstance(arc, ChainArc) and
+                    not relabel(TableArc(arc.target.table))):
+                continue
+            table_arcs.append(arc)
+            seen.add(arc)
+
+        fields = []
+        columns = []
+        links = []
+        last_sort = 0
+        for arc in table_arcs:
+            label = relabel(arc)[0]
             name = label.name
-            cursor.execute("""
-                INSERT INTO "table" (name)
-                VALUES (?)
-            """, [name])
-
-        reverse_names = []
-
-        for home_arc in home_arcs:
-            origin = home_arc.target
-            table_arcs = []
-            seen = set()
-            for label in classify(origin):
-                arc = label.arc
-                if not isinstance(arc, (ColumnArc, ChainArc)):
-                    continue
-                if arc in seen:
-                    continue
-                if (isinstance(arc, ChainArc) and
-                        not relabel(TableArc(arc.target.table))):
-                    continue
-                table_arcs.append(arc)
-                seen.add(arc)
+            kind = None
+            if isinstance(arc, ColumnArc):
+                kind = 'column'
+            elif isinstance(arc, ChainArc):
+                kind = 'link'
+            sort = None
+            if label.is_public:
+                last_sort += 1
+                sort = last_sort
+            fields.append((table_name, name, kind, sort))
+            if isinstance(arc, ColumnArc):
+                domain = str(arc.column.domain.__class__)
+                is_mandatory = (not arc.column.is_nullable)
+                columns.append((table_name, name, domain, is_mandatory))
+            if isinstance(arc, ChainArc):
+                is_singular = arc.is_contracting
+                target_arc = TableArc(arc.target.table)
+                target_label = relabel(target_arc)[0]
+                target_name = target_label.name
+                reverse_name = None
+                reverse_labels = relabel(arc.reverse())
+                if reverse_labels:
+                    reverse_name = reverse_labels[0].name
+                links.append((table_name, name, is_singular,
+                              target_name, reverse_name))
 
-            table_name = relabel(TableArc(origin.table))[0].name
-            last_sort = 0
-            for arc in table_arcs:
-                label = relabel(arc)[0]
-                name = label.name
-                kind = None
-                if isinstance(arc, ColumnArc):
-                    kind = 'column'
-                elif isinstance(arc, ChainArc):
-                    kind = 'link'
-                sort = None
-                if label.is_public:
-                    last_sort += 1
-                    sort = last_sort
-                cursor.execute("""
-                    INSERT INTO "field" (table_name, name, kind, sort)
-                    VALUES (?, ?, ?, ?)
-                """, [table_name, name, kind, sort])
-                if isinstance(arc, ColumnArc):
-                    domain = str(arc.column.domain.__class__)
-                    is_mandatory = (not arc.column.is_nullable)
-                    cursor.execute("""
-                        INSERT INTO "column" (table_name, name,
-                                              domain, is_mandatory)
-                        VALUES (?, ?, ?, ?)
-                    """, [table_name, name, domain, is_mandatory])
-                if isinstance(arc, ChainArc):
-                    is_singular = arc.is_contracting
-                    target_arc = TableArc(arc.target.table)
-                    target_label = relabel(target_arc)[0]
-                    target_name = target_label.name
-                    cursor.execute("""
-                        INSERT INTO "link" (table_name, name, is_singular,
-                                            target_name)
-                        VALUES (?, ?, ?, ?)
-                    """, [table_name, name, is_singular, target_name])
-                    reverse_labels = relabel(arc.reverse())
-                    if reverse_labels:
-                        reverse_name = reverse_labels[0].name
-                        reverse_names.append((table_name, name, reverse_name))
-
-        for table_name, name, reverse_name in reverse_names:
-            cursor.execute("""
-                UPDATE "link"
-                SET reverse_name = ?
-                WHERE table_name = ? AND name = ?
-            """, [reverse_name, table_name, name])
+        return fields, columns, links
+
+
+def describe(table):
+    # The structure of a table as a hashable value.
+    return (table.schema.name, table.name,
+            [(column.name, str(column.domain), column.is_nullable)
+             for column in table.columns],
+            [([column.name for column in key.origin_columns],
+              key.is_primary, key.is_partial)
+             for key in table.unique_keys],
+            [([column.name for column in key.origin_columns],
+              key.target.schema.name, key.target.name,
+              [column.name for column in key.target_columns],
+              key.is_partial)
+             for key in table.foreign_keys])
+
+
+def get_neighbors(table):
+    # Tables referenced by the given table or referring to it.
+    neighbors = set()
+    for foreign_key in table.foreign_keys:
+        neighbors.add(foreign_key.target)
+    for foreign_key in table.referring_foreign_keys:
+        neighbors.add(foreign_key.origin)
+    return sorted(neighbors, key=(lambda table: (table.schema.name,
+                                                 table.name)))
+
+
+def get_configuration(master_app):
+    # The configuration of the master application, which affects
+    # the names of tables and links.
+    configuration = []
+    for addon in master_app.addons:
+        configuration.append((addon.name,
+                              [(parameter.attribute,
+                                repr(getattr(addon, parameter.attribute)))
+                               for parameter in addon.parameters]))
+    return configuration
+
+
+def get_fingerprint():
+    # Identifies the content of the meta database: the structure of
+    # the master database and the configuration of the master application.
+    slave = context.app.tweak.meta.slave
+    master_app = slave.master()
+    configuration = get_configuration(master_app)
+    with master_app, context.env(cache=slave.master_cache()):
+        catalog = introspect()
+        tables = [describe(table) for schema in catalog for table in schema]
+    return hashlib.sha1(repr((META_VERSION, tables, configuration))
+                        .encode('utf-8')).hexdigest()
+
+
+# Change when the structure of the meta database changes.
+META_VERSION = 1
+meta_lock = threading.Lock()
+meta_databases = weakref.WeakValueDictionary()
 
 
 @once
 def build_meta():
-    connection = sqlite3.connect(':memory:', check_same_thread=False)
-    BuildMetaDatabase.__invoke__(connection)
-    connection.commit()
-    return connection
+    # The database is built once per master catalog; new catalogs are
+    # built on top of a database made for a previous catalog.
+    fingerprint = get_fingerprint()
+    cache_file = context.app.tweak.meta.slave.cache_file
+    with meta_lock:
+        if cache_file is not None:
+            uri = "file:%s" % pathname2url(os.path.abspath(cache_file))
+        else:
+            uri = "file:htsql-meta-%s?mode=memory&cache=shared" % fingerprint
+        database = meta_databases.get(uri)
+        if database is None:
+            database = MetaDatabase(uri, cache_file is None)
+            meta_databases[uri] = database
+        base = None
+        # An in-memory database is never updated once it is built.
+        for other in meta_databases.values():
+            if (other is not database and other.is_memory and
+                    other.fingerprint is not None):
+                base = other
+    database.update(fingerprint, base)
+    return database
 
 
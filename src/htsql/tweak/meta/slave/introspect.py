@@ -0,0 +1,18 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql_sqlite.core.introspect import IntrospectSQLite
+
+
+class IntrospectMetaSlave(IntrospectSQLite):
+
+    def __call__(self):
+        catalog = super(IntrospectMetaSlave, self).__call__()
+        # Hide the tables that keep track of the database content.
+        catalog.remove_tables([table
+                               for schema in catalog
+                               for table in schema
+                               if table.name.startswith('!')])
+        return catalog
@@ -9,6 +9,7 @@ from ...core.model import HomeNode, TableNode, TableArc, ColumnArc, ChainArc
 from ...core.classify import (classify, TraceHome, TraceTable,
                             CallTable, CallColumn, CallChain, CallSyntax,
                             OrderTable)
+from .pattern import PatternIndex
 
 
 class ClassCache:
@@ -67,6 +68,16 @@ class FieldCache:
             self.arc_by_signature_by_node[node][signature] = arc
 
 
+class UnlabeledCache:
+
+    def __init__(self):
+        addon = context.app.tweak.override
+        self.tables = PatternIndex([(pattern.path, pattern)
+                                    for pattern in addon.unlabeled_tables])
+        self.columns = PatternIndex([(pattern.path, pattern)
+                                     for pattern in addon.unlabeled_columns])
+
+
 @once
 def class_cache():
     return ClassCache()
@@ -77,11 +88,16 @@ def field_cache():
     return FieldCache()
 
 
+@once
+def unlabeled_cache():
+    return UnlabeledCache()
+
+
 class OverrideTraceHome(TraceHome):
 
     def __call__(self):
-        addon = context.app.tweak.override
         cache = class_cache()
+        unlabeled = unlabeled_cache()
         arcs = []
         arcs.extend(super(OverrideTraceHome, self).__call__())
         for signature in sorted(cache.arc_by_signature, key=(lambda k: (k[0], k[1] if k[1] is not None else -1))):
@@ -89,8 +105,7 @@ class OverrideTraceHome(TraceHome):
             arcs.append(arc)
         for arc in arcs:
             if isinstance(arc, TableArc):
-                if any(pattern.matches(arc.table)
-                       for pattern in addon.unlabeled_tables):
+                if unlabeled.tables.match(arc.table):
                     continue
             yield arc
 
@@ -98,8 +113,8 @@ class OverrideTraceHome(TraceHome):
 class OverrideTraceTable(TraceTable):
 
     def __call__(self):
-        addon = context.app.tweak.override
         cache = field_cache()
+        unlabeled = unlabeled_cache()
         arcs = []
         arcs.extend(super(OverrideTraceTable, self).__call__())
         arc_by_signature = cache.arc_by_signature_by_node.get(self.node, {})
@@ -108,12 +123,10 @@ class OverrideTraceTable(TraceTable):
             arcs.append(arc)
         for arc in arcs:
             if isinstance(arc, ColumnArc):
-                if any(pattern.matches(arc.column)
-                       for pattern in addon.unlabeled_columns):
+                if unlabeled.columns.match(arc.column):
                     continue
             if isinstance(arc, ChainArc):
-                if any(pattern.matches(arc.target.table)
-                       for pattern in addon.unlabeled_tables):
+                if unlabeled.tables.match(arc.target.table):
                     continue
             yield arc
 
@@ -6,6 +6,7 @@
 from ...core.context import context
 from ...core.adapter import rank
 from ...core.introspect import Introspect
+from .pattern import PatternIndex
 import threading
 
 
@@ -30,91 +31,84 @@ class OverrideIntrospect(Introspect):
         unused = set()
 
         if addon.included_tables or addon.excluded_tables:
-            include = addon.included_tables
-            exclude = addon.excluded_tables
-            unused.update(include)
-            unused.update(exclude)
+            include = PatternIndex([(pattern.path, pattern)
+                                    for pattern in addon.included_tables])
+            exclude = PatternIndex([(pattern.path, pattern)
+                                    for pattern in addon.excluded_tables])
+            unused.update(addon.included_tables)
+            unused.update(addon.excluded_tables)
+            removed = []
             for schema in catalog:
-                schema_exclude = [pattern
-                                  for pattern in exclude
-                                  if pattern.matches(schema)]
+                schema_include = include.select(schema)
+                schema_exclude = exclude.select(schema)
                 if not (include or schema_exclude):
                     continue
-                for table in reversed(list(schema)):
-                    include_matches = [pattern
-                                       for pattern in include
-                                       if pattern.matches(table)]
-                    exclude_matches = [pattern
-                                       for pattern in schema_exclude
-                                       if pattern.matches(table)]
+                for table in schema:
+                    include_matches = schema_include.select(table).patterns
+                    exclude_matches = schema_exclude.select(table).patterns
                     if exclude_matches or (include and not include_matches):
-                        table.remove()
+                        removed.append(table)
                     unused.difference_update(include_matches)
                     unused.difference_update(exclude_matches)
+            catalog.remove_tables(removed)
 
         if addon.included_columns or addon.excluded_columns:
-            include = addon.included_columns
-            exclude = addon.excluded_columns
-            unused.update(include)
-            unused.update(exclude)
+            include = PatternIndex([(pattern.path, pattern)
+                                    for pattern in addon.included_columns])
+            exclude = PatternIndex([(pattern.path, pattern)
+                                    for pattern in addon.excluded_columns])
+            unused.update(addon.included_columns)
+            unused.update(addon.excluded_columns)
+            removed = []
             for schema in catalog:
-                schema_exclude = [pattern
-                                  for pattern in exclude
-                                  if pattern.matches(schema)]
+                schema_include = include.select(schema)
+                schema_exclude = exclude.select(schema)
                 if not (include or schema_exclude):
                     continue
                 for table in schema:
-                    table_exclude = [pattern
-                                     for pattern in schema_exclude
-                                     if pattern.matches(table)]
+                    table_include = schema_include.select(table)
+                    table_exclude = schema_exclude.select(table)
                     if not (include or table_exclude):
                         continue
-                    for column in reversed(list(table)):
-                        include_matches = [pattern
-                                           for pattern in include
-                                           if pattern.matches(column)]
-                        exclude_matches = [pattern
-                                           for pattern in table_exclude
-                                           if pattern.matches(column)]
+                    for column in table:
+                        include_matches = \
+                                table_include.select(column).patterns
+                        exclude_matches = \
+                                table_exclude.select(column).patterns
                         if exclude_matches or (include and not include_matches):
-                            column.remove()
+                            removed.append(column)
                         unused.difference_update(include_matches)
                         unused.difference_update(exclude_matches)
+            catalog.remove_columns(removed)
 
         if addon.not_nulls:
+            index = PatternIndex([(pattern.path, pattern)
+                                  for pattern in addon.not_nulls])
             unused.update(addon.not_nulls)
             for schema in catalog:
-                schema_patterns = [pattern
-                                   for pattern in addon.not_nulls
-                                   if pattern.matches(schema)]
-                if not schema_patterns:
+                schema_index = index.select(schema)
+                if not schema_index:
                     continue
                 for table in schema:
-                    table_patterns = [pattern
-                                      for pattern in schema_patterns
-                                      if pattern.matches(table)]
-                    if not table_patterns:
+                    table_index = schema_index.select(table)
+                    if not table_index:
                         continue
-                    for column in reversed(list(table)):
-                        matches = [pattern
-                                   for pattern in table_patterns
-                                   if pattern.matches(column)]
+                    for column in table:
+                        matches = table_index.select(column).patterns
                         if matches:
                             column.set_is_nullable(False)
                             unused.difference_update(matches)
 
         if addon.unique_keys:
+            index = PatternIndex([(pattern.path, pattern)
+                                  for pattern in addon.unique_keys])
             unused.update(addon.unique_keys)
             for schema in catalog:
-                schema_keys = [pattern
-                               for pattern in addon.unique_keys
-                               if pattern.matches(schema)]
-                if not schema_keys:
+                schema_index = index.select(schema)
+                if not schema_index:
                     continue
                 for table in schema:
-                    table_keys = [pattern
-                                  for pattern in schema_keys
-                                  if pattern.matches(table)]
+                    table_keys = schema_index.select(table).patterns
                     for pattern in table_keys:
                         columns = pattern.extract(table)
                         if columns is None:
@@ -129,27 +123,35 @@ class OverrideIntrospect(Introspect):
                         unused.discard(pattern)
 
         if addon.foreign_keys:
+            index = PatternIndex([(pattern.path, pattern)
+                                  for pattern in addon.foreign_keys])
+            target_index = PatternIndex([(pattern.target_path, pattern)
+                                         for pattern in addon.foreign_keys])
             unused.update(addon.foreign_keys)
+            candidates_by_pattern = {}
+            for schema in catalog:
+                schema_index = target_index.select(schema)
+                if not schema_index:
+                    continue
+                for table in schema:
+                    for pattern in schema_index.select(table).patterns:
+                        candidates_by_pattern.setdefault(pattern, [])
+                        candidates_by_pattern[pattern].append(table)
             for schema in catalog:
-                schema_keys = [pattern
-                               for pattern in addon.foreign_keys
-                               if pattern.matches(schema)]
-                if not schema_keys:
+                schema_index = index.select(schema)
+                if not schema_index:
                     continue
                 for table in schema:
-                    table_keys = [pattern
-                                  for pattern in schema_keys
-                                  if pattern.matches(table)]
+                    table_keys = schema_index.select(table).patterns
                     for pattern in table_keys:
                         columns = pattern.extract(table)
                         if columns is None:
                             continue
                         targets = [target_table
-                                   for target_schema in catalog
-                                   if pattern.matches_target(target_schema)
-                                   for target_table in target_schema
-                                   if pattern.matches_target(target_table)
-                                   and pattern.extract_target(target_table)]
+                                   for target_table
+                                        in candidates_by_pattern.get(pattern,
+                                                                     [])
+                                   if pattern.extract_target(target_table)]
                         if len(targets) > 1:
                             targets = [target_table
                                        for target_table in targets
@@ -164,37 +166,31 @@ class OverrideIntrospect(Introspect):
                         unused.discard(pattern)
 
         if addon.unlabeled_tables:
+            index = PatternIndex([(pattern.path, pattern)
+                                  for pattern in addon.unlabeled_tables])
             unused.update(addon.unlabeled_tables)
             for schema in catalog:
-                schema_matches = [pattern
-                                  for pattern in addon.unlabeled_tables
-                                  if pattern.matches(schema)]
-                if not schema_matches:
+                schema_index = index.select(schema)
+                if not schema_index:
                     continue
                 for table in schema:
-                    matches = [pattern
-                               for pattern in schema_matches
-                               if pattern.matches(table)]
+                    matches = schema_index.select(table).patterns
                     unused.difference_update(matches)
 
         if addon.unlabeled_columns:
+            index = PatternIndex([(pattern.path, pattern)
+                                  for pattern in addon.unlabeled_columns])
             unused.update(addon.unlabeled_columns)
             for schema in catalog:
-                schema_matches = [pattern
-                                  for pattern in addon.unlabeled_columns
-                                  if pattern.matches(schema)]
-                if not schema_matches:
+                schema_index = index.select(schema)
+                if not schema_index:
                     continue
                 for table in schema:
-                    table_matches = [pattern
-                                     for pattern in schema_matches
-                                     if pattern.matches(table)]
-                    if not table_matches:
+                    table_index = schema_index.select(table)
+                    if not table_index:
                         continue
                     for column in table:
-                        matches = [pattern
-                                   for pattern in table_matches
-                                   if pattern.matches(column)]
+                        matches = table_index.select(column).patterns
                         unused.difference_update(matches)
 
         for pattern in (addon.included_tables + addon.excluded_tables +
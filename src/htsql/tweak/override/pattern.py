@@ -45,6 +45,117 @@ class Pattern(Printable):
         raise NotImplementedError()
 
 
+class PatternTrie:
+    # A node of the pattern index.  Children are keyed by the name pattern
+    # on the next level of the path: exact names go to a dictionary,
+    # wildcard patterns share one combined regular expression that
+    # rejects most names with a single match.
+
+    __slots__ = ('entries', 'by_name', 'wildcards', 'regexp', 'default')
+
+    def __init__(self, entries):
+        self.entries = []
+        self.by_name = {}
+        self.wildcards = []
+        self.regexp = None
+        self.default = None
+        groups = {}
+        for position, path, pattern in entries:
+            if not path:
+                self.entries.append((position, pattern))
+                continue
+            groups.setdefault(path[0], []).append((position, path[1:],
+                                                   pattern))
+        for key in sorted(groups, key=(lambda k: (k is not None, k))):
+            child = PatternTrie(groups[key])
+            if key is None:
+                self.default = child
+            elif '*' in key or '?' in key:
+                regexp = re.compile(fnmatch.translate(key))
+                self.wildcards.append((regexp, child))
+            else:
+                self.by_name[key] = child
+        if self.wildcards:
+            self.regexp = re.compile("|".join(regexp.pattern
+                                              for regexp, child
+                                                    in self.wildcards))
+
+    def select(self, name):
+        children = []
+        if self.default is not None:
+            children.append(self.default)
+        child = self.by_name.get(name)
+        if child is not None:
+            children.append(child)
+        if self.regexp is not None and self.regexp.match(name):
+            for regexp, child in self.wildcards:
+                if regexp.match(name):
+                    children.append(child)
+        return children
+
+
+class PatternIndex:
+    """
+    Matches catalog entities against a collection of patterns.
+
+    `entries` is a list of pairs ``(path, pattern)``, where `path` is
+    a tuple of schema, table and, possibly, column name patterns
+    (``None`` matches any name).  The index is a trie keyed by schema,
+    then table, then column, so every entity is tested once against
+    all the patterns.
+
+    Use :meth:`select` to descend from a schema to a table and then to
+    a column; :attr:`patterns` lists the patterns matching the full path
+    in their original order.  An index is false when no pattern could
+    match the entities below the current level.
+    """
+
+    def __init__(self, entries):
+        entries = [(position, tuple(path), pattern)
+                   for position, (path, pattern) in enumerate(entries)]
+        self.nodes = [PatternTrie(entries)] if entries else []
+
+    def select(self, entity):
+        """
+        Narrows the index to the patterns matching the given entity.
+        """
+        assert isinstance(entity, NamedEntity)
+        name = normalize(entity.name) if entity.name else ""
+        index = PatternIndex([])
+        for node in self.nodes:
+            index.nodes.extend(node.select(name))
+        return index
+
+    def match(self, entity):
+        """
+        Returns the patterns matching the given table or column.
+        """
+        assert isinstance(entity, (TableEntity, ColumnEntity))
+        if isinstance(entity, TableEntity):
+            path = [entity.schema, entity]
+        else:
+            path = [entity.table.schema, entity.table, entity]
+        index = self
+        for entity in path:
+            if not index:
+                break
+            index = index.select(entity)
+        return index.patterns
+
+    @property
+    def patterns(self):
+        if len(self.nodes) == 1:
+            return [pattern for position, pattern in self.nodes[0].entries]
+        entries = []
+        for node in self.nodes:
+            entries.extend(node.entries)
+        entries.sort(key=(lambda entry: entry[0]))
+        return [pattern for position, pattern in entries]
+
+    def __bool__(self):
+        return bool(self.nodes)
+
+
 class TablePattern(Pattern):
 
     def __init__(self, schema_pattern, table_pattern):
@@ -52,6 +163,7 @@ class TablePattern(Pattern):
         assert isinstance(table_pattern, str)
         self.schema_pattern = schema_pattern
         self.table_pattern = table_pattern
+        self.path = (schema_pattern, table_pattern)
 
     def matches(self, entity):
         assert isinstance(entity, (SchemaEntity, TableEntity))
@@ -75,6 +187,7 @@ class ColumnPattern(Pattern):
         self.schema_pattern = schema_pattern
         self.table_pattern = table_pattern
         self.column_pattern = column_pattern
+        self.path = (schema_pattern, table_pattern, column_pattern)
 
     def matches(self, entity):
         assert isinstance(entity, (SchemaEntity, TableEntity, ColumnEntity))
@@ -113,6 +226,7 @@ class UniqueKeyPattern(Pattern):
         self.column_patterns = column_patterns
         self.is_primary = is_primary
         self.is_partial = is_partial
+        self.path = (schema_pattern, table_pattern)
 
     def matches(self, entity):
         assert isinstance(entity, (SchemaEntity, TableEntity))
@@ -172,6 +286,8 @@ class ForeignKeyPattern(Pattern):
         self.target_table_pattern = target_table_pattern
         self.target_column_patterns = target_column_patterns
         self.is_partial = is_partial
+        self.path = (schema_pattern, table_pattern)
+        self.target_path = (target_schema_pattern, target_table_pattern)
 
     def matches(self, entity):
         assert isinstance(entity, (SchemaEntity, TableEntity))
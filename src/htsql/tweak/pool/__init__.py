@@ -15,11 +15,14 @@ class TweakPoolAddon(Addon):
     help = """
     This addon caches database connections so that a single
     connection could be used to execute more than one query.
+    A request prefers the connection last used by the same thread.
     """
 
     def __init__(self, app, attributes):
         super(TweakPoolAddon, self).__init__(app, attributes)
         self.lock = threading.Lock()
         self.items = []
+        # The thread that last used each connection.
+        self.threads = {}
 
 
@@ -6,6 +6,7 @@
 from ...core.adapter import rank
 from ...core.context import context
 from ...core.connect import Connect
+import threading
 
 
 class PoolConnect(Connect):
@@ -16,16 +17,26 @@ class PoolConnect(Connect):
         if self.with_autocommit:
             return super(PoolConnect, self).__call__()
         addon = context.app.tweak.pool
+        # Prefer the idle connection last used by the same thread.
+        thread = threading.get_ident()
         with addon.lock:
             for connection in addon.items[:]:
                 if not connection.is_valid:
                     addon.items.remove(connection)
-            for connection in addon.items:
-                if not connection.is_busy:
-                    connection.acquire()
-                    return connection
-            connection = super(PoolConnect, self).__call__()
-            addon.items.append(connection)
+                    del addon.threads[connection]
+            idle = [connection for connection in addon.items
+                    if not connection.is_busy]
+            for connection in idle:
+                if addon.threads[connection] == thread:
+                    break
+            else:
+                connection = idle[0] if idle else None
+            if connection is not None:
+                connection.acquire()
+            else:
+                connection = super(PoolConnect, self).__call__()
+                addon.items.append(connection)
+            addon.threads[connection] = thread
             return connection
 
 
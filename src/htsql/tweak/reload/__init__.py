@@ -0,0 +1,59 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.addon import Addon, Parameter
+from ...core.validator import PIntVal
+import threading
+import weakref
+
+
+def watch(app_ref, interval, stop):
+    # Periodically reloads the catalog until the application is gone.
+    while not stop.wait(interval):
+        app = app_ref()
+        if app is None:
+            break
+        try:
+            app.reload()
+        except Exception:
+            # Keep serving requests with the current catalog.
+            pass
+        del app
+
+
+class TweakReloadAddon(Addon):
+
+    name = 'tweak.reload'
+    hint = """reload the catalog without restart"""
+    help = """
+    This addon periodically introspects the database and, when
+    the database structure has changed, replaces the catalog used
+    by the application.  Requests that are already running are
+    completed with the old catalog; cached query plans are kept
+    for queries that do not depend on modified tables.
+
+    Parameter `interval` sets the time between two checks (the
+    default is 60 seconds).
+    """
+
+    parameters = [
+            Parameter('interval', PIntVal(), default=60,
+                      value_name="SEC",
+                      hint="""time between checks, in sec (default: 60)"""),
+    ]
+
+    def __init__(self, app, attributes):
+        super(TweakReloadAddon, self).__init__(app, attributes)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=watch,
+                                       args=(weakref.ref(app),
+                                             self.interval, self.stop))
+        self.thread.daemon = True
+
+    def validate(self):
+        if not self.thread.is_alive():
+            self.thread.start()
+
+
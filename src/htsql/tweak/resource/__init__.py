@@ -20,6 +20,8 @@ class TweakResourceAddon(Addon):
 
     Normally, static files are served under HTTP prefix `/-/`.  Use
     parameter `indicator` to change the prefix.
+
+    Static files are loaded into memory when the application starts.
     """
 
     parameters = [
@@ -31,5 +33,9 @@ class TweakResourceAddon(Addon):
     def __init__(self, app, attributes):
         super(TweakResourceAddon, self).__init__(app, attributes)
         self.lock = threading.Lock()
+        self.index = {}
+
+    def validate(self):
+        self.index = locate.index_resources()
 
 
@@ -7,6 +7,7 @@ from ...core.context import context
 from ...core.util import maybe
 from ...core.adapter import Protocol
 import mimetypes
+import gzip
 import hashlib
 import os, os.path
 import io
@@ -16,24 +17,79 @@ import pkg_resources
 
 
 class Resource:
+    """
+    Represents a static resource.
 
-    def __init__(self, name, data, mimetype=None, disposition='inline',
-                 etag=None):
+    `name`
+        The file name of the resource.
+
+    `data`
+        The content of the resource; could be ``None`` when `filename`
+        is provided, in which case the content is read from the file
+        on demand.
+
+    `mimetype`
+        The MIME type of the resource; guessed from the name if not set.
+
+    `disposition`
+        The value of the ``Content-Disposition`` header: ``'inline'``
+        or ``'attachment'``.
+
+    `etag`
+        The entity tag of the resource; generated from the content
+        if not set.
+
+    `filename`
+        The path to the file with the content of the resource.
+    """
+
+    # MIME types worth compressing.
+    compressible_types = ['application/javascript', 'application/json',
+                          'application/xml', 'image/svg+xml']
+
+    def __init__(self, name, data=None, mimetype=None, disposition='inline',
+                 etag=None, filename=None):
         assert isinstance(name, str) and '/' not in name
-        assert isinstance(data, bytes)
+        assert isinstance(data, maybe(bytes))
         assert isinstance(mimetype, maybe(str))
         assert disposition in ['inline', 'attachment']
         assert isinstance(etag, maybe(str))
+        assert isinstance(filename, maybe(str))
+        assert data is not None or filename is not None
         if mimetype is None:
             mimetype = (mimetypes.guess_type(name)[0] or
                         'application/octet-stream')
         if etag is None:
+            assert data is not None
             etag = hashlib.md5(data).hexdigest()
+        if data is not None:
+            size = len(data)
+        else:
+            size = os.stat(filename).st_size
         self.name = name
         self.data = data
         self.mimetype = mimetype
         self.disposition = disposition
         self.etag = etag
+        self.filename = filename
+        self.size = size
+        # The compressed variant of the resource.
+        self.gzip_data = None
+        self.gzip_etag = None
+        if data is not None and (mimetype.startswith('text/') or
+                                 mimetype in self.compressible_types):
+            gzip_data = gzip.compress(data, mtime=0)
+            if len(gzip_data) < len(data):
+                self.gzip_data = gzip_data
+                self.gzip_etag = etag+'-gzip'
+
+    def open(self):
+        """
+        Returns a file-like object with the content of the resource.
+        """
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return open(self.filename, 'rb')
 
 
 class Locate(Protocol):
@@ -66,11 +122,19 @@ class Locate(Protocol):
     def __call__(self):
         return None
 
+    def walk(self):
+        """
+        Generates paths of all resources available under the prefix.
+        """
+        return iter([])
+
 
 class LocatePackage(Locate):
 
     package = None
     directory = None
+    # Files larger than that are not kept in memory.
+    max_cached_size = 1024*1024
 
     def __call__(self):
         filename = pkg_resources.resource_filename(self.package,
@@ -78,14 +142,55 @@ class LocatePackage(Locate):
         if not os.path.isfile(filename):
             return super(LocatePackage, self).__call__()
         name = os.path.basename(filename)
-        stream = open(filename, 'rb')
-        data = stream.read()
-        stream.close()
         stat = os.stat(filename)
         etag = "%s-%s" % (int(stat.st_mtime), stat.st_size)
-        return Resource(name, data, etag=etag)
-
-
-locate = Locate.__invoke__
+        data = None
+        if stat.st_size <= self.max_cached_size:
+            with open(filename, 'rb') as stream:
+                data = stream.read()
+        return Resource(name, data, etag=etag, filename=filename)
+
+    def walk(self):
+        root = pkg_resources.resource_filename(self.package, self.directory)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(dirname for dirname in dirnames
+                                 if not dirname.startswith('.'))
+            directory = os.path.relpath(dirpath, root)
+            for filename in sorted(filenames):
+                if filename.startswith('.'):
+                    continue
+                if directory != os.curdir:
+                    filename = os.path.join(directory, filename)
+                yield self.prefix+filename.replace(os.sep, '/')
+
+
+def index_resources():
+    """
+    Locates all available static resources.
+
+    Returns a dictionary mapping resource paths to :class:`Resource`
+    objects.
+    """
+    index = {}
+    for prefix in Locate.__catalogue__():
+        for path in Locate.__prepare__(prefix).walk():
+            if path in index:
+                continue
+            resource = Locate.__invoke__(path)
+            if resource is not None:
+                index[path] = resource
+    return index
+
+
+def locate(path):
+    """
+    Finds a static resource by path.
+
+    Returns a :class:`Resource` object or ``None``.
+    """
+    resource = context.app.tweak.resource.index.get(path)
+    if resource is None:
+        resource = Locate.__invoke__(path)
+    return resource
 
 
@@ -5,7 +5,7 @@
 
 from ...core.context import context
 from ...core.adapter import rank
-from ...core.wsgi import WSGI
+from ...core.wsgi import WSGI, accept_encodings
 from .locate import locate
 
 
@@ -13,6 +13,9 @@ class ResourceWSGI(WSGI):
 
     rank(100.0)
 
+    # The size of blocks for streaming large files.
+    block_size = 64*1024
+
     def __call__(self):
         path = self.environ.get('PATH_INFO')
         indicator = context.app.tweak.resource.indicator
@@ -31,22 +34,68 @@ class ResourceWSGI(WSGI):
             self.start_response("404 Not Found",
                                 [('Content-Type', 'text/plain')])
             return [("Resourse does not exist: %r.\n" % path).encode('utf-8')]
-        request_etag = self.environ.get('HTTP_IF_NONE_MATCH')
-        if resource.etag == request_etag:
-            self.start_response("304 Not Modified",
-                                [('ETag', resource.etag)])
+        if (resource.gzip_data is not None and
+                'gzip' in accept_encodings(self.environ)):
+            data = resource.gzip_data
+            size = len(data)
+            etag = resource.gzip_etag
+        else:
+            data = resource.data
+            size = resource.size
+            etag = resource.etag
+        request_etags = self.if_none_match()
+        if etag in request_etags or '*' in request_etags:
+            headers = [('ETag', etag)]
+            if resource.gzip_data is not None:
+                headers.append(('Vary', 'Accept-Encoding'))
+            self.start_response("304 Not Modified", headers)
             return []
         status = "200 OK"
         headers = [('Content-Type', resource.mimetype),
-                   ('Content-Length', str(len(resource.data))),
-                   ('ETag', resource.etag),
+                   ('Content-Length', str(size)),
+                   ('ETag', etag),
                    ('Content-Disposition', '%s; filename="%s"'
                        % (resource.disposition,
                           resource.name.replace('\\', '\\\\')
                                        .replace('"', '\\"')))]
+        if resource.gzip_data is not None:
+            headers.append(('Vary', 'Accept-Encoding'))
+            if data is resource.gzip_data:
+                headers.append(('Content-Encoding', 'gzip'))
         self.start_response(status, headers)
         if method == 'HEAD':
             return []
-        return [resource.data]
+        if data is not None:
+            return [data]
+        # Large files are not kept in memory; let the server stream them.
+        stream = resource.open()
+        file_wrapper = self.environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(stream, self.block_size)
+        return self.iterate(stream)
+
+    def if_none_match(self):
+        # Parse the `If-None-Match` header; return a list of entity tags.
+        header = self.environ.get('HTTP_IF_NONE_MATCH', '')
+        etags = []
+        for etag in header.split(','):
+            etag = etag.strip()
+            if etag.startswith('W/'):
+                etag = etag[2:]
+            if len(etag) >= 2 and etag.startswith('"') and etag.endswith('"'):
+                etag = etag[1:-1]
+            if etag:
+                etags.append(etag)
+        return etags
+
+    def iterate(self, stream):
+        try:
+            while True:
+                block = stream.read(self.block_size)
+                if not block:
+                    break
+                yield block
+        finally:
+            stream.close()
 
 
@@ -3,6 +3,7 @@
 #
 
 
+from . import connect
 from ...core.validator import PIntVal
 from ...core.addon import Addon, Parameter, addon_registry
 
@@ -19,7 +20,9 @@ class TweakTimeoutAddon(Addon):
     Parameter `timeout` sets the timeout value (the default is 60
     seconds).
 
-    Currently, only PostgreSQL backend is supported.
+    PostgreSQL and MySQL limit execution time on the server side,
+    SQLite interrupts long statements with a progress handler,
+    MS SQL Server and Oracle cancel them through the driver.
     """
 
     parameters = [
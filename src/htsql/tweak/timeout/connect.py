@@ -0,0 +1,95 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from ...core.context import context
+from ...core.connect import ConnectionProxy, CursorProxy
+from ...core.error import Error
+import threading
+
+
+class Watchdog:
+    """
+    Cancels a statement that runs longer than the given timeout.
+
+    Use it with engines that cannot limit the execution time of
+    a statement on the server side.
+
+    `connection` (:class:`htsql.core.connect.ConnectionProxy`)
+        The connection executing the statement.
+
+    `timeout` (an integer)
+        The timeout value, in seconds.
+    """
+
+    def __init__(self, connection, timeout):
+        self.app = context.app
+        self.connection = connection
+        self.timer = threading.Timer(timeout, self.expire)
+        self.timer.daemon = True
+
+    def expire(self):
+        with self.app:
+            try:
+                self.connection.cancel()
+            except Error:
+                pass
+
+    def __enter__(self):
+        self.timer.start()
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.timer.cancel()
+
+
+class WatchdogConnectionProxy(ConnectionProxy):
+    """
+    Wraps a DBAPI connection; each statement is limited in time.
+    """
+
+    def __init__(self, connection, guard, timeout):
+        super(WatchdogConnectionProxy, self).__init__(connection, guard)
+        self.timeout = timeout
+
+    def cursor(self):
+        with self.guard:
+            cursor = self.connection.cursor()
+            return WatchdogCursorProxy(cursor, self.guard, self)
+
+
+class WatchdogCursorProxy(CursorProxy):
+    """
+    Wraps a DBAPI cursor; each statement is limited in time.
+    """
+
+    def __init__(self, cursor, guard, connection):
+        super(WatchdogCursorProxy, self).__init__(cursor, guard)
+        self.connection = connection
+
+    def execute(self, statement, *parameters):
+        with Watchdog(self.connection, self.connection.timeout):
+            return super(WatchdogCursorProxy, self).execute(
+                    statement, *parameters)
+
+    def executemany(self, statement, parameters_set):
+        with Watchdog(self.connection, self.connection.timeout):
+            return super(WatchdogCursorProxy, self).executemany(
+                    statement, parameters_set)
+
+
+def watch(connection):
+    """
+    Limits execution time of statements executed over the connection.
+
+    Takes a :class:`htsql.core.connect.ConnectionProxy` instance;
+    returns a proxy which cancels any statement running longer than
+    `tweak.timeout.timeout` seconds.
+    """
+    timeout = context.app.tweak.timeout.timeout
+    if timeout is None:
+        return connection
+    return WatchdogConnectionProxy(connection.connection,
+                                   connection.guard, timeout)
+
+
@@ -3,9 +3,11 @@
 #
 
 
-from htsql.core.connect import Connect, Scramble, Unscramble, UnscrambleError
+from htsql.core.connect import (Connect, Cancel, Scramble, Unscramble,
+        UnscrambleError)
 from htsql.core.adapter import adapt
 from htsql.core.context import context
+from htsql.core.error import Error
 from htsql.core.domain import (BooleanDomain, TextDomain, DateDomain,
         TimeDomain)
 import datetime
@@ -36,6 +38,20 @@ class ConnectMSSQL(Connect):
         return connection
 
 
+class CancelMSSQL(Cancel):
+
+    def __call__(self):
+        # `pymssql` has no public API to cancel a statement; we call
+        # `cancel()` of the private low-level connection object `_conn`,
+        # which is not present in every version.
+        connection = getattr(self.connection, '_conn', None)
+        cancel = getattr(connection, 'cancel', None)
+        if cancel is None:
+            raise Error("Cannot cancel a statement with this version"
+                        " of pymssql")
+        cancel()
+
+
 class UnscrambleMSSQLError(UnscrambleError):
 
     def __call__(self):
@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakTimeoutMSSQLAddon(Addon):
+
+    name = 'tweak.timeout.mssql'
+    hint = """implement `tweak.timeout` for MS SQL Server"""
+    prerequisites = ['engine.mssql']
+
+
@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.timeout.connect import watch
+from htsql_mssql.core.connect import ConnectMSSQL
+
+
+class TimeoutConnectMSSQL(ConnectMSSQL):
+
+    def __call__(self):
+        connection = super(TimeoutConnectMSSQL, self).__call__()
+        return watch(connection)
+
+
@@ -3,7 +3,8 @@
 #
 
 
-from htsql.core.connect import Connect, Scramble, Unscramble, UnscrambleError
+from htsql.core.connect import (Connect, Cancel, Scramble, Unscramble,
+        UnscrambleColumn, UnscrambleError, connect, unscramble, cache_column)
 from htsql.core.adapter import adapt
 from htsql.core.context import context
 from htsql.core.domain import (BooleanDomain, TextDomain, EnumDomain,
@@ -41,6 +42,22 @@ class ConnectMySQL(Connect):
         return connection
 
 
+class CancelMySQL(Cancel):
+
+    def __call__(self):
+        # MySQL cannot interrupt a query from the same connection;
+        # we have to open another one and kill the query from there.
+        thread_id = self.connection.thread_id()
+        connection = connect(with_autocommit=True)
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                KILL QUERY %s
+            """ % thread_id)
+        finally:
+            connection.close()
+
+
 class UnscrambleMySQLError(UnscrambleError):
 
     def __call__(self):
@@ -87,3 +104,11 @@ class UnscrambleMySQLTime(Unscramble):
         return value
 
 
+class UnscrambleMySQLTimeColumn(UnscrambleColumn):
+
+    adapt(TimeDomain)
+
+    def __call__(self):
+        return cache_column(unscramble(self.domain), (datetime.timedelta,))
+
+
@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakBatchMySQLAddon(Addon):
+
+    name = 'tweak.batch.mysql'
+    hint = """implement `tweak.batch` for MySQL"""
+    prerequisites = ['engine.mysql']
+
+
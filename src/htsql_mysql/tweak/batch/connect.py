@@ -0,0 +1,17 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.batch.connect import BeginSnapshot
+
+
+class BeginSnapshotMySQL(BeginSnapshot):
+
+    def __call__(self):
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY
+        """)
+
+
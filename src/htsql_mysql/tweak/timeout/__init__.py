@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakTimeoutMySQLAddon(Addon):
+
+    name = 'tweak.timeout.mysql'
+    hint = """implement `tweak.timeout` for MySQL"""
+    prerequisites = ['engine.mysql']
+
+
@@ -0,0 +1,23 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.core.context import context
+from htsql_mysql.core.connect import ConnectMySQL
+
+
+class TimeoutConnectMySQL(ConnectMySQL):
+
+    def open(self):
+        connection = super(TimeoutConnectMySQL, self).open()
+        timeout = context.app.tweak.timeout.timeout
+        if timeout is not None:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SET SESSION MAX_EXECUTION_TIME = %s
+            """ % (timeout*1000))
+            cursor.close()
+        return connection
+
+
@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakBatchOracleAddon(Addon):
+
+    name = 'tweak.batch.oracle'
+    hint = """implement `tweak.batch` for Oracle"""
+    prerequisites = ['engine.oracle']
+
+
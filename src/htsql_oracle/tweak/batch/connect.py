@@ -0,0 +1,19 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.batch.connect import BeginSnapshot
+
+
+class BeginSnapshotOracle(BeginSnapshot):
+
+    def __call__(self):
+        # `SET TRANSACTION` must be the first statement of a transaction.
+        self.connection.commit()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SET TRANSACTION READ ONLY
+        """)
+
+
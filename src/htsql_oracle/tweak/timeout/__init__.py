@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakTimeoutOracleAddon(Addon):
+
+    name = 'tweak.timeout.oracle'
+    hint = """implement `tweak.timeout` for Oracle"""
+    prerequisites = ['engine.oracle']
+
+
@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.timeout.connect import watch
+from htsql_oracle.core.connect import ConnectOracle
+
+
+class TimeoutConnectOracle(ConnectOracle):
+
+    def __call__(self):
+        connection = super(TimeoutConnectOracle, self).__call__()
+        return watch(connection)
+
+
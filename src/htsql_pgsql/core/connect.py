@@ -4,11 +4,14 @@
 
 
 from htsql.core.adapter import adapt
-from htsql.core.domain import TextDomain, EnumDomain
+from htsql.core.domain import (TextDomain, EnumDomain, DecimalDomain,
+        FloatDomain, DateDomain, TimeDomain, DateTimeDomain, ListDomain)
 from htsql.core.connect import (Connect, UnscrambleError, Unscramble,
-        Scramble)
+        Scramble, unscramble)
 from htsql.core.context import context
 import psycopg2, psycopg2.extensions
+import json
+import decimal
 
 
 class ConnectPGSQL(Connect):
@@ -62,3 +65,52 @@ class UnscramblePGSQLError(UnscrambleError):
         return super(UnscramblePGSQLError, self).__call__()
 
 
+class UnscramblePGSQLList(Unscramble):
+
+    # Decodes the JSON aggregate of a folded segment.  The entries
+    # are objects with fields `f1`, `f2`, ... in the order of the columns.
+
+    adapt(ListDomain)
+
+    # Converts JSON values to values produced by the driver.  PostgreSQL
+    # drops trailing zeros of fractional seconds, which is not accepted
+    # by `fromisoformat()` in older versions of Python, so we use
+    # the parsers of the domains.
+    json_converts = [
+            (DecimalDomain, decimal.Decimal),
+            (FloatDomain, float),
+            (DateDomain, DateDomain.parse),
+            (TimeDomain, TimeDomain.parse),
+            (DateTimeDomain, DateTimeDomain.parse),
+    ]
+
+    def __call__(self):
+        converts = []
+        for field in self.domain.item_domain.fields:
+            if isinstance(field.domain, ListDomain):
+                convert = unscramble(field.domain)
+            else:
+                convert = None
+                for domain_class, json_convert in self.json_converts:
+                    if isinstance(field.domain, domain_class):
+                        convert = (lambda value, json_convert=json_convert:
+                                        json_convert(value)
+                                        if value is not None else None)
+                        break
+            converts.append(convert)
+        converts = list(enumerate(converts))
+        def convert(value):
+            if value is None:
+                return []
+            if isinstance(value, str):
+                value = json.loads(value, parse_float=decimal.Decimal)
+            rows = []
+            for item in value:
+                item = list(item.values())
+                rows.append(tuple([convert(item[idx])
+                                   if convert is not None else item[idx]
+                                   for idx, convert in converts]))
+            return rows
+        return convert
+
+
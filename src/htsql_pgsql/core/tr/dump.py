@@ -3,8 +3,9 @@
 #
 
 
-from htsql.core.domain import IntegerDomain
-from htsql.core.tr.dump import (FormatLiteral, FormatPlaceholder,
+from htsql.core.domain import IntegerDomain, ListDomain
+from htsql.core.tr.dump import (SerializeSegment, DumpFold,
+                                FormatLiteral, FormatPlaceholder,
                                 DumpFloat, DumpDecimal, DumpDate,
                                 DumpTime, DumpDateTime, DumpToDecimal,
                                 DumpToFloat, DumpToText, DumpSortDirection)
@@ -173,3 +174,48 @@ class PGSQLDumpSum(DumpSum):
             return super(PGSQLDumpSum, self).__call__()
 
 
+class PGSQLSerializeSegment(SerializeSegment):
+
+    with_json_folding = True
+
+
+class PGSQLDumpFold(DumpFold):
+
+    def dump_aggregate(self):
+        # Dump:
+        #   CAST(JSON_AGG(ROW(<column>, ...)
+        #                 ORDER BY <alias>.<ordinal>) AS TEXT)
+        # `ROW()` is not limited in the number of columns like
+        # `JSON_BUILD_ARRAY()`.  The result is cast to `TEXT` so that
+        # the driver does not decode it; numbers are decoded without
+        # losing precision by `UnscramblePGSQLList`.
+        self.write("CAST(JSON_AGG(ROW(")
+        self.indent()
+        fields = self.phrase.domain.item_domain.fields
+        for index, (column, field) in enumerate(zip(self.phrase.aliases,
+                                                    fields)):
+            if index > 0:
+                self.write(",")
+                self.newline()
+            # A nested aggregate must be embedded as JSON, not as text.
+            if isinstance(field.domain, ListDomain):
+                self.format("CAST({alias:name}.{column:name} AS JSON)",
+                            alias=self.alias, column=column)
+            else:
+                self.format("{alias:name}.{column:name}",
+                            alias=self.alias, column=column)
+        self.write(")")
+        if self.phrase.ordinal is not None:
+            self.newline()
+            self.format("ORDER BY {alias:name}.{ordinal:name}",
+                        alias=self.alias, ordinal=self.phrase.ordinal)
+        self.dedent()
+        self.write(") AS TEXT)")
+
+    def dump_condition(self, phrase, column):
+        if not phrase.is_nullable:
+            return super(PGSQLDumpFold, self).dump_condition(phrase, column)
+        self.format("{alias:name}.{column:name} IS NOT DISTINCT FROM {phrase}",
+                    alias=self.alias, column=column, phrase=phrase)
+
+
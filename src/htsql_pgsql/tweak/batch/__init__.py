@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakBatchPGSQLAddon(Addon):
+
+    name = 'tweak.batch.pgsql'
+    hint = """implement `tweak.batch` for PostgreSQL"""
+    prerequisites = ['engine.pgsql']
+
+
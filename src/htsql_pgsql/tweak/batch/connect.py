@@ -0,0 +1,37 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.batch.connect import (BeginSnapshot, SaveSnapshot,
+        RestoreSnapshot)
+
+
+class BeginSnapshotPGSQL(BeginSnapshot):
+
+    def __call__(self):
+        # Complete the transaction started by the connection setup,
+        # if any, since the isolation level must be set first.
+        self.connection.commit()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY
+        """)
+
+
+class SaveSnapshotPGSQL(SaveSnapshot):
+
+    def __call__(self):
+        # An error aborts the transaction up to the last savepoint.
+        cursor = self.connection.cursor()
+        cursor.execute("""SAVEPOINT batch_query""")
+
+
+class RestoreSnapshotPGSQL(RestoreSnapshot):
+
+    def __call__(self):
+        cursor = self.connection.cursor()
+        cursor.execute("""ROLLBACK TO SAVEPOINT batch_query""")
+        cursor.execute("""RELEASE SAVEPOINT batch_query""")
+
+
@@ -4,7 +4,9 @@
 
 
 from . import connect, introspect, split_sql, tr
-from htsql.core.addon import Addon
+from htsql.core.addon import Addon, Parameter
+from htsql.core.validator import BoolVal, ChoiceVal, IntVal, UIntVal
+import threading
 
 
 class EngineSQLiteAddon(Addon):
@@ -16,12 +18,61 @@ class EngineSQLiteAddon(Addon):
 
     This extension is loaded automatically when the engine of the
     database URI is set to `sqlite`.
+
+    Parameters `read_only` and `immutable` open the database file
+    in read-only mode; an immutable database is assumed to never
+    change, so SQLite does not lock it.
+
+    Parameters `journal_mode`, `mmap_size`, `cache_size` and
+    `temp_store` set the respective pragmas on each new connection.
+
+    Parameter `connection_cache_size` specifies the number of
+    connections that are kept open and reused between requests.
+    A request prefers the connection last used by the same thread.
+    The default value is 0, which disables the cache.  The cache is
+    not used when addon `tweak.pool` is enabled.
     """
     packages = ['.', '.tr']
 
+    parameters = [
+            Parameter('read_only', BoolVal(), default=False,
+                      hint="""open the database in read-only mode"""),
+            Parameter('immutable', BoolVal(), default=False,
+                      hint="""assume the database never changes"""),
+            Parameter('journal_mode',
+                      ChoiceVal(['delete', 'truncate', 'persist',
+                                 'memory', 'wal', 'off'], is_nullable=True),
+                      default=None,
+                      value_name="""mode""",
+                      hint="""the journal mode"""),
+            Parameter('mmap_size', UIntVal(is_nullable=True), default=None,
+                      value_name="""size""",
+                      hint="""max size of memory-mapped I/O, in bytes"""),
+            Parameter('cache_size', IntVal(is_nullable=True), default=None,
+                      value_name="""size""",
+                      hint="""page cache size, in pages or -KiB"""),
+            Parameter('temp_store',
+                      ChoiceVal(['default', 'file', 'memory'],
+                                is_nullable=True),
+                      default=None,
+                      value_name="""store""",
+                      hint="""where to keep temporary tables"""),
+            Parameter('connection_cache_size', UIntVal(), default=0,
+                      value_name="""size""",
+                      hint="""number of reused connections"""),
+    ]
+
     def __init__(self, app, attributes):
         if app.htsql.db.engine != 'sqlite':
             raise ImportError("sqlite engine is expected")
         super(EngineSQLiteAddon, self).__init__(app, attributes)
+        self.lock = threading.Lock()
+        self.connections = []
+
+    def validate(self):
+        if self.journal_mode is not None and (self.read_only or
+                                              self.immutable):
+            raise ValueError("journal mode cannot be set"
+                             " for a read-only database")
 
 
@@ -3,13 +3,18 @@
 #
 
 
-from htsql.core.connect import Connect, Scramble, Unscramble, UnscrambleError
+from htsql.core.connect import (Connect, Cancel, Scramble, Unscramble,
+        UnscrambleColumn, UnscrambleError, unscramble, cache_column)
 from htsql.core.adapter import adapt
 from htsql.core.error import Error
 from htsql.core.context import context
 from htsql.core.domain import (BooleanDomain, TextDomain, IntegerDomain,
-        DecimalDomain, FloatDomain, DateDomain, TimeDomain, DateTimeDomain)
+        DecimalDomain, FloatDomain, DateDomain, TimeDomain, DateTimeDomain,
+        ListDomain)
+from urllib.request import pathname2url
 import sqlite3
+import threading
+import json
 import datetime
 import os.path
 import decimal
@@ -35,25 +40,95 @@ class ConnectSQLite(Connect):
     Implementation of the connection adapter for SQLite.
     """
 
+    def __call__(self):
+        addon = context.app.engine.sqlite
+        # With `tweak.pool`, connections are reused by the pool.
+        if (self.with_autocommit or not addon.connection_cache_size or
+                hasattr(getattr(context.app, 'tweak', None), 'pool')):
+            return super(ConnectSQLite, self).__call__()
+        # Reuse an idle connection, preferably the one last used by
+        # the same thread.  A connection is never used by two threads
+        # at once; connections broken by an error are discarded.
+        thread = threading.get_ident()
+        with addon.lock:
+            addon.connections = [item for item in addon.connections
+                                 if item[0].is_valid]
+            idle = [item for item in addon.connections
+                    if not item[0].is_busy]
+            for item in idle:
+                if item[1] == thread:
+                    break
+            else:
+                item = idle[-1] if idle else None
+            if item is not None:
+                connection = item[0]
+                connection.acquire()
+                item[1] = thread
+                return connection
+        connection = super(ConnectSQLite, self).__call__()
+        with addon.lock:
+            if len(addon.connections) < addon.connection_cache_size:
+                addon.connections.append([connection, thread])
+        return connection
+
     def open(self):
         # FIXME: should we complain if the database address or
         # authentications parameters are not `None`?
         # Get the path to the database file.
         db = context.app.htsql.db
+        addon = context.app.engine.sqlite
         # Check if the database file exists.
-        if not ((db.database.startswith(":") and db.database.endswith(":")) or
-                os.path.exists(db.database)):
+        is_special = (db.database.startswith(":") and
+                      db.database.endswith(":"))
+        if not (is_special or os.path.exists(db.database)):
             raise Error("file does not exist: %s" % db.database)
-        # Generate and return the DBAPI connection.
-        connection = sqlite3.connect(db.database)
+        # Generate and return the DBAPI connection.  A connection is never
+        # used by two threads at once, but a pooled connection could be
+        # reused by a different thread.
+        options = []
+        if addon.read_only:
+            options.append("mode=ro")
+        if addon.immutable:
+            options.append("immutable=1")
+        if options and not is_special:
+            uri = "file:%s?%s" % (pathname2url(os.path.abspath(db.database)),
+                                  "&".join(options))
+            connection = sqlite3.connect(uri, uri=True,
+                                         check_same_thread=False)
+        else:
+            connection = sqlite3.connect(db.database,
+                                         check_same_thread=False)
         self.create_functions(connection)
+        self.set_pragmas(connection)
         if self.with_autocommit:
             connection.isolation_level = None
         return connection
 
     def create_functions(self, connection):
-        connection.create_function('POWER', 2, sqlite3_power)
-        connection.create_function('SQRT', 1, sqlite3_sqrt)
+        connection.create_function('POWER', 2, sqlite3_power,
+                                   deterministic=True)
+        connection.create_function('SQRT', 1, sqlite3_sqrt,
+                                   deterministic=True)
+
+    def set_pragmas(self, connection):
+        addon = context.app.engine.sqlite
+        pragmas = []
+        if addon.journal_mode is not None:
+            pragmas.append(("journal_mode", addon.journal_mode.upper()))
+        if addon.mmap_size is not None:
+            pragmas.append(("mmap_size", addon.mmap_size))
+        if addon.cache_size is not None:
+            pragmas.append(("cache_size", addon.cache_size))
+        if addon.temp_store is not None:
+            pragmas.append(("temp_store", addon.temp_store.upper()))
+        for name, value in pragmas:
+            connection.execute("PRAGMA %s = %s" % (name, value)).fetchall()
+
+
+class CancelSQLite(Cancel):
+
+    def __call__(self):
+        self.connection.interrupt()
 
 
 class UnscrambleSQLiteError(UnscrambleError):
@@ -197,3 +272,98 @@ class UnscrambleSQLiteDateTime(Unscramble):
         return value
 
 
+class UnscrambleSQLiteDecimalColumn(UnscrambleColumn):
+
+    adapt(DecimalDomain)
+
+    def __call__(self):
+        return cache_column(unscramble(self.domain), (float,))
+
+
+class UnscrambleSQLiteDateColumn(UnscrambleColumn):
+
+    adapt(DateDomain)
+
+    def __call__(self):
+        def convert(value, convert=unscramble(self.domain),
+                    fromisoformat=datetime.date.fromisoformat):
+            # Fast path for `YYYY-MM-DD`.
+            if (type(value) is str and len(value) == 10 and
+                    value[4] == '-' and value[7] == '-'):
+                try:
+                    return fromisoformat(value)
+                except ValueError:
+                    pass
+            return convert(value)
+        return cache_column(convert)
+
+
+class UnscrambleSQLiteTimeColumn(UnscrambleColumn):
+
+    adapt(TimeDomain)
+
+    def __call__(self):
+        def convert(value, convert=unscramble(self.domain),
+                    fromisoformat=datetime.time.fromisoformat):
+            # Fast path for `HH:MM:SS` and `HH:MM:SS.ffffff`.
+            if (type(value) is str and len(value) in (8, 15) and
+                    value[2] == ':' and value[5] == ':'):
+                try:
+                    item = fromisoformat(value)
+                except ValueError:
+                    pass
+                else:
+                    if item.tzinfo is None:
+                        return item
+            return convert(value)
+        return cache_column(convert)
+
+
+class UnscrambleSQLiteDateTimeColumn(UnscrambleColumn):
+
+    adapt(DateTimeDomain)
+
+    def __call__(self):
+        def convert(value, convert=unscramble(self.domain),
+                    fromisoformat=datetime.datetime.fromisoformat):
+            # Fast path for `YYYY-MM-DD HH:MM:SS[.ffffff]`.
+            if (type(value) is str and len(value) in (19, 26) and
+                    value[10] == ' '):
+                try:
+                    item = fromisoformat(value)
+                except ValueError:
+                    pass
+                else:
+                    if item.tzinfo is None:
+                        return item
+            return convert(value)
+        return cache_column(convert)
+
+
+class UnscrambleSQLiteList(Unscramble):
+
+    # Decodes the JSON aggregate of a folded segment.
+
+    adapt(ListDomain)
+
+    def __call__(self):
+        converts = []
+        for field in self.domain.item_domain.fields:
+            convert = unscramble(field.domain)
+            # `REAL` values are encoded as text to keep their precision.
+            if isinstance(field.domain, (FloatDomain, DecimalDomain)):
+                convert = (lambda value, convert=convert:
+                                convert(float(value)
+                                        if value is not None else None))
+            converts.append(convert)
+        converts = list(enumerate(converts))
+        def convert(value):
+            if value is None:
+                return []
+            if isinstance(value, str):
+                value = json.loads(value)
+            return [tuple([convert(item[idx]) for idx, convert in converts])
+                    for item in value]
+        return convert
+
+
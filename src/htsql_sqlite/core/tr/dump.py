@@ -5,9 +5,11 @@
 
 from htsql.core.adapter import adapt
 from htsql.core.error import Error
-from htsql.core.domain import BooleanDomain, TextDomain
+from htsql.core.domain import (BooleanDomain, TextDomain, DecimalDomain,
+        FloatDomain, ListDomain)
 from htsql.core.tr.frame import LiteralPhrase
-from htsql.core.tr.dump import (DumpBoolean, DumpDecimal, DumpDate, DumpTime,
+from htsql.core.tr.dump import (SerializeSegment, DumpFold,
+        DumpBoolean, DumpDecimal, DumpDate, DumpTime,
         DumpDateTime, DumpToFloat, DumpToDecimal, DumpToText, DumpToDate,
         DumpToTime, DumpToDateTime, DumpIsTotallyEqual)
 from htsql.core.tr.fn.dump import (DumpRoundTo, DumpTrunc, DumpTruncTo,
@@ -20,6 +22,77 @@ from htsql.core.tr.fn.dump import (DumpRoundTo, DumpTrunc, DumpTruncTo,
 from .signature import IsAnySig
 
 
+class SQLiteSerializeSegment(SerializeSegment):
+
+    with_json_folding = True
+
+
+class SQLiteDumpFold(DumpFold):
+
+    def __call__(self):
+        if self.phrase.ordinal is None:
+            return super(SQLiteDumpFold, self).__call__()
+        # SQLite cannot order the input of an aggregate function, but it
+        # aggregates the rows of a sorted `SELECT` in order.  Dump:
+        #   (SELECT <aggregate>
+        #    FROM (SELECT *
+        #          FROM (<segment>) AS <alias>
+        #          WHERE <alias>.<column> = <key>
+        #          ORDER BY <alias>.<ordinal>) AS <alias>)
+        self.write("(")
+        self.indent()
+        self.write("SELECT ")
+        self.dump_aggregate()
+        self.newline()
+        self.write("FROM (")
+        self.indent()
+        self.write("SELECT *")
+        self.newline()
+        self.dump_from()
+        self.dump_where()
+        self.newline()
+        self.format("ORDER BY {alias:name}.{ordinal:name}",
+                    alias=self.alias, ordinal=self.phrase.ordinal)
+        self.dedent()
+        self.format(") AS {alias:name}", alias=self.alias)
+        self.dedent()
+        self.write(")")
+
+    def dump_aggregate(self):
+        # Dump:
+        #   JSON_GROUP_ARRAY(JSON_ARRAY(<column>, ...))
+        self.write("JSON_GROUP_ARRAY(JSON_ARRAY(")
+        self.indent()
+        fields = self.phrase.domain.item_domain.fields
+        for index, (column, field) in enumerate(zip(self.phrase.aliases,
+                                                    fields)):
+            if index > 0:
+                self.write(",")
+                self.newline()
+            # JSON keeps 15 significant digits of a `REAL` value; 17
+            # digits are needed to restore it exactly.
+            if isinstance(field.domain, (FloatDomain, DecimalDomain)):
+                self.format("CASE WHEN {alias:name}.{column:name} IS NULL"
+                            " THEN NULL ELSE PRINTF('%!.17g',"
+                            " {alias:name}.{column:name}) END",
+                            alias=self.alias, column=column)
+            # A nested aggregate must be embedded as JSON, not as text.
+            elif isinstance(field.domain, ListDomain):
+                self.format("JSON({alias:name}.{column:name})",
+                            alias=self.alias, column=column)
+            else:
+                self.format("{alias:name}.{column:name}",
+                            alias=self.alias, column=column)
+        self.dedent()
+        self.write("))")
+
+    def dump_condition(self, phrase, column):
+        if not phrase.is_nullable:
+            return super(SQLiteDumpFold, self).dump_condition(phrase, column)
+        self.format("{alias:name}.{column:name} IS {phrase}",
+                    alias=self.alias, column=column, phrase=phrase)
+
+
 class SQLiteDumpBoolean(DumpBoolean):
 
     def __call__(self):
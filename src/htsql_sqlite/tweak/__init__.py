@@ -0,0 +1,3 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
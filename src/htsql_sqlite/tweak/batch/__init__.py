@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakBatchSQLiteAddon(Addon):
+
+    name = 'tweak.batch.sqlite'
+    hint = """implement `tweak.batch` for SQLite"""
+    prerequisites = ['engine.sqlite']
+
+
@@ -0,0 +1,18 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.tweak.batch.connect import BeginSnapshot
+
+
+class BeginSnapshotSQLite(BeginSnapshot):
+
+    def __call__(self):
+        # `sqlite3` does not start a transaction before a `SELECT`
+        # statement, so each statement would see its own state of
+        # the database.
+        cursor = self.connection.cursor()
+        cursor.execute("""BEGIN""")
+
+
@@ -0,0 +1,16 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from . import connect
+from htsql.core.addon import Addon
+
+
+class TweakTimeoutSQLiteAddon(Addon):
+
+    name = 'tweak.timeout.sqlite'
+    hint = """implement `tweak.timeout` for SQLite"""
+    prerequisites = ['engine.sqlite']
+
+
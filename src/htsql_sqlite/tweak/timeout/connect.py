@@ -0,0 +1,33 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+
+from htsql.core.context import context
+from htsql_sqlite.core.connect import ConnectSQLite
+import time
+
+
+class TimeoutConnectSQLite(ConnectSQLite):
+
+    # The number of virtual machine instructions between checks.
+    period = 10000
+
+    def open(self):
+        connection = super(TimeoutConnectSQLite, self).open()
+        timeout = context.app.tweak.timeout.timeout
+        if timeout is not None:
+            # The trace callback is called when a statement starts;
+            # the progress handler interrupts the statement when
+            # it runs past the deadline.
+            deadline = [None]
+            def start(statement):
+                deadline[0] = time.monotonic()+timeout
+            def check():
+                return (deadline[0] is not None and
+                        time.monotonic() > deadline[0])
+            connection.set_trace_callback(start)
+            connection.set_progress_handler(check, self.period)
+        return connection
+
+
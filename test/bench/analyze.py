@@ -0,0 +1,58 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for translating queries to SQL without executing them.
+#
+# Usage:
+#   python test/bench/analyze.py [<path-to-htsql_demo.sqlite>]
+#
+# The script translates a mix of queries against the demo database (by
+# default, the one created by the regression tests in
+# `build/regress/sqlite`) with full translation, which also builds the
+# pipes that execute the query, and with SQL-only translation used by
+# `/:sql` and `HTSQL.analyze()`.  Each query is translated with a new
+# literal, so that cached plans are not reused, and then with the same
+# literal.  For each mode, it reports the number of queries per second.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.embed import embed
+from htsql.core.tr.translate import translate, translate_sql
+import sys, time
+
+
+def run(app, translate, queries, count, is_fresh):
+    with app:
+        start = time.time()
+        for idx in range(count):
+            query = queries[idx % len(queries)]
+            query = query % (idx if is_fresh else 0)
+            translate(query, embed(None))
+        return count/(time.time()-start)
+
+
+def main():
+    path = (sys.argv[1] if len(sys.argv) > 1
+            else 'build/regress/sqlite/htsql_demo.sqlite')
+    queries = [
+        "/school{name, count(department)}?count(program)>%s",
+        "/department{name, school.name, /course{title}}"
+            ".filter(count(course)>%s)",
+        "/course.filter(credits>%s).sort(title).limit(50)",
+        "/program{title, count(student)}"
+            ".filter(count(student)>%s){title, /student.limit(3){name}}",
+    ]
+    modes = [('full', translate), ('sql-only', translate_sql)]
+    for name, translate_mode in modes:
+        # Each mode starts with an empty plan cache.
+        app = HTSQL('sqlite:%s' % path)
+        run(app, translate_mode, queries, 40, True)
+        fresh = run(app, translate_mode, queries, 400, True)
+        cached = run(app, translate_mode, queries, 400, False)
+        print("%-10s fresh %7.1f q/s  cached %7.1f q/s"
+              % (name, fresh, cached))
+
+
+if __name__ == '__main__':
+    main()
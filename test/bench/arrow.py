@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for the Arrow output format.
+#
+# Usage:
+#   python test/bench/arrow.py [<number-of-rows>]
+#
+# The script generates a SQLite database with a table of the given number
+# of rows (100000 by default), renders it as CSV, compact JSON and Arrow,
+# and measures the time it takes the server to serialize the result and
+# the client to parse it back.  Requires `pyarrow`.
+
+
+from htsql import HTSQL
+from htsql.core.fmt.format import CSVFormat, JSONFormat
+from htsql.core.fmt.emit import emit
+from htsql.tweak.arrow.format import ArrowFormat
+import pyarrow, pyarrow.ipc
+import sys, os, os.path, tempfile, sqlite3, time, csv, io, json
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL,
+            quantity INTEGER,
+            weight FLOAT,
+            created DATE NOT NULL,
+            is_active BOOLEAN NOT NULL
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?, ?, ?, ?)
+    """, [(idx, "Item #%s" % idx, idx % 1000 if idx % 7 else None,
+           idx / 3.0, "2013-%02d-%02d" % (idx % 12 + 1, idx % 28 + 1),
+           idx % 2)
+          for idx in range(size)])
+    connection.commit()
+    connection.close()
+
+
+def parse_csv(data):
+    return list(csv.reader(io.StringIO(data.decode('utf-8'))))
+
+
+def parse_json(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def parse_arrow(data):
+    return pyarrow.ipc.open_stream(data).read_all()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'arrow.sqlite')
+    try:
+        print("generating %s rows..." % size)
+        generate(path, size)
+        app = HTSQL('sqlite:%s' % path, 'tweak.arrow')
+        product = app.produce("/item")
+        for title, format, parse in [
+                ("csv", CSVFormat(), parse_csv),
+                ("json/compact", JSONFormat(with_indent=False), parse_json),
+                ("arrow", ArrowFormat(), parse_arrow)]:
+            start = time.time()
+            with app:
+                data = b"".join(emit(format, product))
+            emit_time = time.time()-start
+            start = time.time()
+            parse(data)
+            parse_time = time.time()-start
+            print("%-16s %10d bytes %8.2f sec emit %8.2f sec parse"
+                  % (title, len(data), emit_time, parse_time))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
+
+
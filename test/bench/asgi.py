@@ -0,0 +1,181 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A load test comparing the threaded WSGI server and the ASGI interface.
+#
+# Usage:
+#   python test/bench/asgi.py [<number-of-clients>]
+#
+# The script generates a SQLite database, starts an HTSQL server in
+# a separate process, first the threaded `wsgiref` server used by
+# `htsql-ctl server`, then `uvicorn` with `htsql.core.asgi.ASGI`, and
+# runs the same load against both: slow clients that read a large
+# response a little at a time, and fast clients (16 by default) that
+# repeatedly send a small query.  It reports the throughput, the latency
+# and the number of failed requests of the fast clients, and the peak
+# number of threads in the server process.  Requires `uvicorn`.
+
+
+from htsql import HTSQL
+from htsql.ctl.server import HTSQLServer, HTSQLRequestHandler
+import sys, os, os.path, tempfile, sqlite3, time, socket, threading
+import subprocess, http.client
+
+
+def generate(path):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL,
+            weight FLOAT
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?)
+    """, [(idx, "Item #%s" % idx, idx / 3.0) for idx in range(100000)])
+    connection.commit()
+    connection.close()
+
+
+class QuietHandler(HTSQLRequestHandler):
+
+    def get_stderr(self):
+        return sys.stderr
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Routine:
+    # Mimics `ServerRoutine` for `HTSQLServer`.
+
+    def __init__(self, port):
+        self.host = '127.0.0.1'
+        self.port = port
+        self.quiet = True
+
+
+def serve(mode, port, path):
+    app = HTSQL('sqlite:%s' % path)
+    if mode == 'wsgi':
+        httpd = HTSQLServer(Routine(port))
+        httpd.RequestHandlerClass = QuietHandler
+        httpd.daemon_threads = True
+        httpd.set_app(app)
+        httpd.serve_forever()
+    else:
+        import uvicorn
+        from htsql.core.asgi import ASGI
+        uvicorn.run(ASGI(app), host='127.0.0.1', port=port,
+                    log_level='warning')
+
+
+def wait(port):
+    for attempt in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def count_threads(pid):
+    with open('/proc/%s/status' % pid) as stream:
+        for line in stream:
+            if line.startswith('Threads:'):
+                return int(line.split()[1])
+    return 0
+
+
+def slow_client(port, stop):
+    # Requests a large result and reads it slowly.
+    while not stop.is_set():
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        try:
+            connection.request('GET', '/item/:csv')
+            response = connection.getresponse()
+            while not stop.is_set() and response.read(4096):
+                time.sleep(0.05)
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.1)
+        connection.close()
+
+
+def fast_client(port, count, latencies, errors):
+    for idx in range(count):
+        start = time.time()
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        try:
+            connection.request('GET', '/item?id=%s{id,title}/:json' % idx)
+            connection.getresponse().read()
+        except OSError:
+            errors.append(idx)
+        else:
+            latencies.append(time.time()-start)
+        connection.close()
+
+
+def load(mode, port, path, clients):
+    process = subprocess.Popen([sys.executable, __file__, '--serve',
+                                mode, str(port), path])
+    try:
+        wait(port)
+        stop = threading.Event()
+        slow = [threading.Thread(target=slow_client, args=(port, stop))
+                for idx in range(8)]
+        for thread in slow:
+            thread.start()
+        time.sleep(1.0)
+        latencies = []
+        errors = []
+        fast = [threading.Thread(target=fast_client,
+                                 args=(port, 20, latencies, errors))
+                for idx in range(clients)]
+        peak = 0
+        start = time.time()
+        for thread in fast:
+            thread.start()
+        while any(thread.is_alive() for thread in fast):
+            peak = max(peak, count_threads(process.pid))
+            time.sleep(0.1)
+        elapsed = time.time()-start
+        stop.set()
+        for thread in slow:
+            thread.join()
+        latencies.sort()
+        print("%-6s %8.1f req/s  p50 %7.1f ms  p99 %7.1f ms"
+              "  %4d errors  %4d threads"
+              % (mode, len(latencies)/elapsed,
+                 latencies[len(latencies)//2]*1000,
+                 latencies[len(latencies)*99//100]*1000,
+                 len(errors), peak))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    if sys.argv[1:2] == ['--serve']:
+        mode, port, path = sys.argv[2:5]
+        return serve(mode, int(port), path)
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'asgi.sqlite')
+    try:
+        generate(path)
+        load('wsgi', 8765, path, clients)
+        load('asgi', 8766, path, clients)
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
+
+
@@ -0,0 +1,101 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for the batch endpoint.
+#
+# Usage:
+#   python test/bench/batch.py [<number-of-rows>]
+#
+# The script generates a SQLite database with a table of the given number
+# of rows (200000 by default), then runs 15 aggregate queries, first as
+# separate GET requests, then as a single POST request to the batch
+# endpoint, with and without the `snapshot` option, and reports the time
+# in the fastest of 3 rounds.  Concurrent execution pays off only when
+# the machine has several cores.
+
+
+from htsql import HTSQL
+import sys, os, os.path, tempfile, sqlite3, time, io, json
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            category INTEGER NOT NULL,
+            weight FLOAT
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?)
+    """, [(idx, idx % 15, idx / 7.0) for idx in range(size)])
+    connection.commit()
+    connection.close()
+
+
+def request(app, method, path, body=None):
+    environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'wsgi.url_scheme': 'http',
+    }
+    if body is not None:
+        environ['CONTENT_TYPE'] = 'application/json'
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['wsgi.input'] = io.BytesIO(body)
+    def start_response(status, headers, exc_info=None):
+        assert status.startswith('200'), status
+    return b"".join(app(environ, start_response))
+
+
+def measure(run):
+    best = None
+    for round in range(3):
+        start = time.time()
+        run()
+        elapsed = time.time()-start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'batch.sqlite')
+    try:
+        generate(path, size)
+        app = HTSQL('sqlite:%s' % path, 'tweak.batch')
+        queries = ["/{count(item?category=%s&weight>%s),"
+                   " sum((item?category=%s).weight)}" % (idx, idx, idx)
+                   for idx in range(15)]
+        body = json.dumps(queries).encode('utf-8')
+        snapshot_body = json.dumps({'queries': queries, 'snapshot': True})
+        snapshot_body = snapshot_body.encode('utf-8')
+        def separate():
+            for query in queries:
+                request(app, 'GET', query+"/:json")
+        def batch():
+            request(app, 'POST', '/', body)
+        def snapshot():
+            request(app, 'POST', '/', snapshot_body)
+        print("separate: %8.1f ms" % (measure(separate)*1000))
+        print("batch:    %8.1f ms" % (measure(batch)*1000))
+        print("snapshot: %8.1f ms" % (measure(snapshot)*1000))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
+
+
@@ -0,0 +1,81 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for name resolution in the binder.
+#
+# Usage:
+#   python test/bench/binder.py [<number-of-columns>]
+#
+# The script generates a SQLite database with a table of the given number
+# of columns (500 by default) and a few tables linked to it, and measures
+# how long it takes to bind a query that refers to 50 columns of the wide
+# table and to the linked tables.  The catalog is classified before the
+# measurement, so only name resolution is timed.
+
+
+from htsql import HTSQL
+from htsql.core.syn.parse import parse
+from htsql.core.tr.bind import bind
+import sys, os, os.path, tempfile, sqlite3, time
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    for idx in range(10):
+        cursor.execute("""
+            CREATE TABLE hub_%02d (
+                id INTEGER PRIMARY KEY NOT NULL,
+                name TEXT NOT NULL
+            )
+        """ % idx)
+    columns = ["c%04d TEXT" % idx for idx in range(size)]
+    links = ["hub_%02d_id INTEGER REFERENCES hub_%02d(id)" % (idx, idx)
+             for idx in range(10)]
+    cursor.execute("""
+        CREATE TABLE wide (
+            id INTEGER PRIMARY KEY NOT NULL,
+            %s
+        )
+    """ % ",\n".join(columns+links))
+    connection.commit()
+    connection.close()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'binder.sqlite')
+    try:
+        generate(path, size)
+        app = HTSQL('sqlite:%s' % path)
+        step = max(1, size//50)
+        selectors = ["c%04d" % idx for idx in range(0, size, step)]
+        selectors += ["hub_%02d.name" % idx for idx in range(10)]
+        filters = ["c%04d!=null" % idx for idx in range(0, size, step*5)]
+        query = "/wide{%s}?%s" % (", ".join(selectors), "&".join(filters))
+        count = 20
+        with app:
+            syntax = parse(query)
+            bind(syntax)
+            best = None
+            for round in range(5):
+                start = time.time()
+                for idx in range(count):
+                    bind(syntax)
+                elapsed = time.time()-start
+                if best is None or elapsed < best:
+                    best = elapsed
+        print("%s columns, %s identifiers: %.3f ms/query"
+              % (size, len(selectors)+len(filters), best*1000/count))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
+
+
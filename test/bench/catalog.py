@@ -0,0 +1,84 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for catalog construction on a database with many tables.
+#
+# Usage:
+#   python test/bench/catalog.py [<number-of-tables>]
+#
+# The script generates a SQLite database with the given number of tables
+# (20000 by default), each with a primary key, a redundant unique key and
+# a link to one of a few shared tables, and measures how long it takes
+# to introspect and clean up the catalog with and without the `override`
+# addon removing every other table, using a few patterns or one pattern
+# for every ten tables.
+
+
+from htsql import HTSQL
+from htsql.core.introspect import introspect
+import sys, os, os.path, tempfile, sqlite3, time
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    for idx in range(10):
+        cursor.execute("""
+            CREATE TABLE hub_%02d (
+                id INTEGER PRIMARY KEY NOT NULL,
+                name TEXT NOT NULL
+            )
+        """ % idx)
+    for idx in range(size):
+        cursor.execute("""
+            CREATE TABLE t%05d_%s (
+                id INTEGER PRIMARY KEY NOT NULL,
+                code TEXT NOT NULL UNIQUE,
+                title TEXT,
+                hub_id INTEGER REFERENCES hub_%02d(id),
+                UNIQUE (id)
+            )
+        """ % (idx, "keep" if idx % 2 else "skip", idx % 10))
+    connection.commit()
+    connection.close()
+
+
+def measure(db, extensions):
+    start = time.time()
+    app = HTSQL(db, extensions)
+    with app:
+        catalog = introspect()
+        size = sum(len(schema) for schema in catalog)
+    return time.time()-start, size
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'catalog.sqlite')
+    try:
+        print("generating %s tables..." % size)
+        generate(path, size)
+        db = 'sqlite:%s' % path
+        for title, extensions in [
+                ("plain", {}),
+                ("exclude half", {'tweak.override':
+                                    {'excluded-tables': ['*_skip']}}),
+                ("include half", {'tweak.override':
+                                    {'included-tables':
+                                        ['hub_*', '*_keep']}}),
+                ("many patterns", {'tweak.override':
+                                    {'excluded-tables':
+                                        ['t%04d?_skip' % idx
+                                         for idx in range(size//10)]}})]:
+            elapsed, count = measure(db, extensions)
+            print("%-16s %8d tables %8.2f sec" % (title, count, elapsed))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
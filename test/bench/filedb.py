@@ -0,0 +1,79 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for loading CSV files with `tweak.filedb`.
+#
+# Usage:
+#   python test/bench/filedb.py [<size-in-megabytes>]
+#
+# The script generates a CSV file of the given size (2048 MB by default)
+# with integer, float, date, Boolean and text columns, builds a filedb
+# database from it in a cache file, and reports the load time and
+# the peak memory usage of the process.  Then it runs a few queries
+# that filter and sort by the typed columns and reports the average
+# time per query in the fastest of 3 rounds.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.act import produce
+import sys, os, os.path, tempfile, shutil, csv, datetime, resource, time
+
+
+def generate(path, size):
+    start = datetime.date(2000, 1, 1)
+    with open(path, 'w', newline='') as stream:
+        writer = csv.writer(stream)
+        writer.writerow(['id', 'weight', 'price', 'created', 'active',
+                         'title'])
+        idx = 0
+        while stream.tell() < size:
+            rows = []
+            for k in range(10000):
+                rows.append([idx, (idx*7919) % 100000 / 4.0,
+                             (idx*104729) % 1000000 / 100.0,
+                             start+datetime.timedelta(days=idx % 7000),
+                             'true' if idx % 3 else 'false',
+                             "Item #%s" % idx])
+                idx += 1
+            writer.writerows(rows)
+    return idx
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, 'item.csv')
+    cache = os.path.join(directory, 'item.sqlite')
+    try:
+        count = generate(source, size*1024*1024)
+        print("%s rows, %.1f MB" % (count, os.path.getsize(source)/1048576.0))
+        # The database is built when the application is created.
+        start = time.time()
+        app = HTSQL(None, {'tweak.filedb': {'sources': [{'file': source}],
+                                            'cache_file': cache}})
+        elapsed = time.time()-start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print("load: %.1f s, peak memory: %.1f MB" % (elapsed, peak/1024.0))
+        queries = [
+            "/count(item.filter(weight>24000))",
+            "/item.sort(price-).limit(10){id, price}",
+            "/count(item.filter(created>='2010-01-01'&active))",
+            "/item.filter(id>%s).limit(10){title}" % (count//2),
+        ]
+        with app:
+            for query in queries:
+                best = None
+                for round in range(3):
+                    start = time.time()
+                    produce(query)
+                    elapsed = time.time()-start
+                    if best is None or elapsed < best:
+                        best = elapsed
+                print("%-50s %10.1f ms" % (query, best*1000))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for key detection in `tweak.filedb`.
+#
+# Usage:
+#   python test/bench/filedb_keys.py [<number-of-items>]
+#
+# The script generates CSV files with categories and items (200000 by
+# default) and builds two filedb databases: one with the keys declared
+# by `tweak.override`, so the tables are linked but not indexed, and one
+# with `detect-keys`, which finds the same keys and indexes the key
+# columns.  It reports the time to build each database and the average
+# time of a few queries that join and filter the tables in the fastest
+# of 3 rounds.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.act import produce
+import sys, os, os.path, tempfile, shutil, csv, time
+
+
+def generate(directory, size):
+    with open(os.path.join(directory, 'category.csv'), 'w',
+              newline='') as stream:
+        writer = csv.writer(stream)
+        writer.writerow(['code', 'title'])
+        writer.writerows([("c%05d" % idx, "Category #%s" % idx)
+                          for idx in range(size//20)])
+    with open(os.path.join(directory, 'item.csv'), 'w',
+              newline='') as stream:
+        writer = csv.writer(stream)
+        writer.writerow(['id', 'category', 'title', 'weight'])
+        writer.writerows([(idx, "c%05d" % (idx*7 % (size//20)),
+                           "Item #%s" % idx, idx / 3.0)
+                          for idx in range(size)])
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    directory = tempfile.mkdtemp()
+    try:
+        generate(directory, size)
+        sources = [{'file': os.path.join(directory, 'category.csv')},
+                   {'file': os.path.join(directory, 'item.csv')}]
+        configurations = [
+            ('declared', {'tweak.filedb': {'sources': sources},
+                          'tweak.override': {
+                              'unique_keys': ['category(code)!',
+                                              'item(id)!'],
+                              'foreign_keys': ['item(category)'
+                                               ' -> category']}}),
+            ('detected', {'tweak.filedb': {'sources': sources,
+                                           'detect_keys': True}}),
+        ]
+        queries = [
+            "/category.limit(100){title, count(item)}",
+            "/item.filter(category.title='Category #7'){id, title}",
+            "/category.filter(code='c00042'){title, /item{title}}",
+            "/item.filter(id=%s){title, category.title}" % (size//2),
+        ]
+        outputs = {}
+        for name, extensions in configurations:
+            start = time.time()
+            app = HTSQL(None, extensions)
+            print("%-10s build: %.1f s" % (name, time.time()-start))
+            with app:
+                for query in queries:
+                    best = None
+                    for round in range(3):
+                        start = time.time()
+                        product = produce(query)
+                        elapsed = time.time()-start
+                        if best is None or elapsed < best:
+                            best = elapsed
+                    outputs.setdefault(query, []).append(product.data)
+                    print("  %-56s %10.1f ms" % (query, best*1000))
+        for query in queries:
+            assert outputs[query][0] == outputs[query][1]
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
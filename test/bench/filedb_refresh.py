@@ -0,0 +1,84 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for loading several CSV files with `tweak.filedb` and
+# refreshing the database when the files grow.
+#
+# Usage:
+#   python test/bench/filedb_refresh.py [<number-of-files> [<size-in-megabytes>]]
+#
+# The script generates CSV files (8 files of 16 MB by default) and builds
+# a filedb database from them in a cache file, with one process and with
+# a process per CPU (at least 2).  Then it appends 1% of new rows to every
+# file and reports the time to refresh the database, which loads only
+# the new rows, and the time to build it from scratch.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.act import produce
+import sys, os, os.path, tempfile, shutil, csv, time
+
+
+def generate(path, size, start=0):
+    with open(path, 'a', newline='') as stream:
+        writer = csv.writer(stream)
+        if not start:
+            writer.writerow(['id', 'weight', 'title'])
+        idx = start
+        while stream.tell() < size:
+            rows = []
+            for k in range(1000):
+                rows.append([idx, (idx*7919) % 100000 / 4.0,
+                             "Item #%s" % idx])
+                idx += 1
+            writer.writerows(rows)
+    return idx
+
+
+def build(sources, cache, processes):
+    start = time.time()
+    app = HTSQL(None, {'tweak.filedb': {'sources': sources,
+                                        'cache_file': cache,
+                                        'processes': processes}})
+    elapsed = time.time()-start
+    query = "/{%s}" % ", ".join("count(item_%s), sum(item_%s.weight)"
+                                % (idx+1, idx+1)
+                                for idx in range(len(sources)))
+    with app:
+        data = produce(query).data
+    return elapsed, data
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    directory = tempfile.mkdtemp()
+    try:
+        sources = []
+        counts = []
+        for idx in range(number):
+            path = os.path.join(directory, 'item_%s.csv' % (idx+1))
+            counts.append(generate(path, size*1024*1024))
+            sources.append({'file': path})
+        print("%s files, %.1f MB" % (number, number*size))
+        for processes in [1, max(os.cpu_count() or 1, 2)]:
+            cache = os.path.join(directory, 'cache-%s.sqlite' % processes)
+            elapsed, data = build(sources, cache, processes)
+            print("build with %2d processes: %6.1f s" % (processes, elapsed))
+        for idx, source in enumerate(sources):
+            generate(source['file'], os.path.getsize(source['file'])*1.01,
+                     counts[idx])
+        cache = os.path.join(directory, 'cache-1.sqlite')
+        elapsed, refreshed = build(sources, cache, 1)
+        print("refresh:                  %6.1f s" % elapsed)
+        os.unlink(cache)
+        elapsed, rebuilt = build(sources, cache, 1)
+        print("rebuild:                  %6.1f s" % elapsed)
+        assert refreshed == rebuilt
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
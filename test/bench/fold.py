@@ -0,0 +1,136 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for folding nested segments into JSON aggregates.
+#
+# Usage:
+#   python test/bench/fold.py [<number-of-items>]
+#
+# The script generates a SQLite database with categories, items (20000
+# by default) and parts, and runs queries with nested segments with and
+# without the `fold_segments` option.  For each query, it reports the
+# number of SQL statements executed per request and the average time
+# per request in the fastest of 5 rounds.
+
+
+from htsql import HTSQL
+from htsql.core.context import context
+from htsql.core.connect import connect
+from htsql.core.cmd.act import produce
+import sys, os, os.path, tempfile, sqlite3, time
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE category (
+            code TEXT PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO category VALUES (?, ?)
+    """, [("c%03d" % idx, "Category #%s" % idx) for idx in range(100)])
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL,
+            weight FLOAT,
+            category TEXT NOT NULL REFERENCES category(code)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX item_category_idx ON item(category)
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?, ?)
+    """, [(idx, "Item #%s" % idx, idx / 3.0, "c%03d" % (idx % 100))
+          for idx in range(size)])
+    cursor.execute("""
+        CREATE TABLE part (
+            item_id INTEGER NOT NULL REFERENCES item(id),
+            no INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            PRIMARY KEY (item_id, no)
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO part VALUES (?, ?, ?)
+    """, [(idx, no, "Part #%s.%s" % (idx, no))
+          for idx in range(size) for no in range(3)])
+    connection.commit()
+    connection.close()
+
+
+def request(app, path):
+    environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'wsgi.url_scheme': 'http',
+    }
+    def start_response(status, headers, exc_info=None):
+        assert status.startswith('200'), status
+    return b"".join(app(environ, start_response))
+
+
+def count_statements(app, query):
+    # Runs the query on a connection that counts executed statements.
+    statements = []
+    with app:
+        connection = connect()
+        connection.connection.set_trace_callback(statements.append)
+        with context.env(connection=connection):
+            product = produce(query)
+        connection.release()
+    return len(statements), product.data
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'fold.sqlite')
+    try:
+        generate(path, size)
+        apps = [
+            ('separate', HTSQL('sqlite:%s' % path)),
+            ('folded', HTSQL('sqlite:%s' % path,
+                             {'htsql': {'fold_segments': True}})),
+        ]
+        queries = [
+            "/category?code='c007'{title, /item{title, weight}}",
+            "/category.limit(10){title, /item{title, /part{no, title}}}",
+            "/category{title, /item?weight>%s{title}}" % (size / 3.0 - 10),
+            "/item?id<500{title, /part{title}, count(part)}",
+        ]
+        for query in queries:
+            print(query)
+            outputs = []
+            for name, app in apps:
+                count, output = count_statements(app, query)
+                outputs.append(output)
+                uri = query+"/:json"
+                best = None
+                for round in range(5):
+                    start = time.time()
+                    for idx in range(10):
+                        request(app, uri)
+                    elapsed = time.time()-start
+                    if best is None or elapsed < best:
+                        best = elapsed
+                print("  %-8s %3d statements %10.3f ms/request"
+                      % (name, count, best*1000/10))
+            assert outputs[0] == outputs[1]
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
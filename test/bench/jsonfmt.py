@@ -0,0 +1,106 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for the JSON renderer.
+#
+# Usage:
+#   python test/bench/jsonfmt.py [<number-of-rows>]
+#
+# The script generates a SQLite database with a table of the given number
+# of rows (100000 by default) of text, number, date and null values,
+# fetches the table with nested records, and measures how long it takes
+# to render the result as JSON using the token stream (`to_json()` and
+# `dump_json()`) and using compiled encoders, with and without indentation.
+
+
+from htsql import HTSQL
+from htsql.core.fmt.json import (to_json, dump_json, purge_null_keys,
+        JS_MAP, JS_END)
+from htsql.core.fmt.format import JSONFormat
+from htsql.core.fmt.emit import emit
+import sys, os, os.path, tempfile, sqlite3, time
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE category (
+            code TEXT PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO category VALUES (?, ?)
+    """, [("c%02d" % idx, "Category \"%s\"" % idx) for idx in range(50)])
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL,
+            price NUMERIC(10,2),
+            weight FLOAT,
+            created DATE NOT NULL,
+            category TEXT NOT NULL REFERENCES category(code)
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?, ?, ?, ?)
+    """, [(idx, "Item #%s" % idx,
+           "%s.%02d" % (idx % 1000, idx % 99 + 1) if idx % 7 else None,
+           idx / 3.0, "2013-%02d-%02d" % (idx % 12 + 1, idx % 28 + 1),
+           "c%02d" % (idx % 50))
+          for idx in range(size)])
+    connection.commit()
+    connection.close()
+
+
+def dump_tokens(product):
+    # The token stream renderer.
+    def emit_tokens():
+        yield JS_MAP
+        yield product.meta.tag or "0"
+        for token in to_json(product.meta.domain)(product.data):
+            yield token
+        yield JS_END
+    return dump_json(purge_null_keys(emit_tokens()))
+
+
+def measure(app, product, render):
+    start = time.time()
+    with app:
+        size = 0
+        for chunk in render(product):
+            size += len(chunk)
+    return time.time()-start, size
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'json.sqlite')
+    try:
+        print("generating %s rows..." % size)
+        generate(path, size)
+        app = HTSQL('sqlite:%s' % path)
+        product = app.produce("/item{id, title, price, weight, created,"
+                              " category{code, title}}")
+        for title, render in [
+                ("tokens", dump_tokens),
+                ("encoder", (lambda product:
+                                emit(JSONFormat(), product))),
+                ("encoder/compact", (lambda product:
+                                emit(JSONFormat(with_indent=False),
+                                     product)))]:
+            elapsed, length = measure(app, product, render)
+            print("%-16s %10d chars %8.2f sec" % (title, length, elapsed))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
+
+
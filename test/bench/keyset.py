@@ -0,0 +1,93 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for fetching nested segments by the keys of the parent rows.
+#
+# Usage:
+#   python test/bench/keyset.py [<number-of-items>]
+#
+# The script generates a SQLite database with items (100000 by default)
+# and parts, and runs queries with nested segments under a parent
+# segment with `limit()`, with the default `key_set_size` and with the
+# option disabled.  For each query, it reports the average time per
+# request in the fastest of 5 rounds.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.act import produce
+import sys, os, os.path, tempfile, sqlite3, time
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL,
+            weight FLOAT
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?)
+    """, [(idx, "Item #%s" % idx, (idx*7919 % size) / 3.0)
+          for idx in range(size)])
+    cursor.execute("""
+        CREATE TABLE part (
+            item_id INTEGER NOT NULL REFERENCES item(id),
+            no INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            PRIMARY KEY (item_id, no)
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO part VALUES (?, ?, ?)
+    """, [(idx, no, "Part #%s.%s" % (idx, no))
+          for idx in range(size) for no in range(3)])
+    connection.commit()
+    connection.close()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'keyset.sqlite')
+    try:
+        generate(path, size)
+        apps = [
+            ('keyed', HTSQL('sqlite:%s' % path)),
+            ('joined', HTSQL('sqlite:%s' % path,
+                             {'htsql': {'key_set_size': 0}})),
+        ]
+        queries = [
+            "/item.sort(weight-).limit(20){title, /part{title}}",
+            "/item.sort(weight).limit(10,%s){title, /part{no, title}}"
+                % (size//2),
+            "/item.filter(title~'7').sort(title).limit(50)"
+                "{title, /part{title}}",
+        ]
+        for query in queries:
+            print(query)
+            outputs = []
+            for name, app in apps:
+                with app:
+                    outputs.append(produce(query).data)
+                    best = None
+                    for round in range(5):
+                        start = time.time()
+                        for idx in range(10):
+                            produce(query)
+                        elapsed = time.time()-start
+                        if best is None or elapsed < best:
+                            best = elapsed
+                print("  %-8s %10.3f ms/request" % (name, best*1000/10))
+            assert outputs[0] == outputs[1]
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for building the meta database of `tweak.meta`.
+#
+# Usage:
+#   python test/bench/meta.py [<number-of-tables>]
+#
+# The script generates a SQLite database with many linked tables (500
+# by default) and reports the time of the first query against the meta
+# database after the application has served a regular query: for a new
+# application, for another application with the same catalog, and for
+# an application with the meta database kept in a cache file, when the
+# file is created, when it is reused, and when one table is added.  Then
+# it reports the average time of a few meta queries in the fastest of
+# 3 rounds.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.act import produce
+import sys, os, os.path, tempfile, shutil, sqlite3, time
+
+
+def generate(path, size):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    for idx in range(size):
+        cursor.execute("""
+            CREATE TABLE t%04d (
+                id INTEGER PRIMARY KEY NOT NULL,
+                title TEXT NOT NULL,
+                weight FLOAT,
+                parent_id INTEGER %s
+            )
+        """ % (idx, "REFERENCES t%04d(id)" % (idx-1) if idx else ""))
+    connection.commit()
+    connection.close()
+
+
+def first(name, app):
+    with app:
+        # Warm up the master application.
+        produce("/count(t0000)")
+        start = time.time()
+        produce("/meta(/table)")
+    print("%-36s %10.1f ms" % (name, (time.time()-start)*1000))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'meta.sqlite')
+    cache = os.path.join(directory, 'meta-cache.sqlite')
+    try:
+        generate(path, size)
+        db = 'sqlite:%s' % path
+        first("in memory, new catalog", HTSQL(db, {'tweak.meta': {}}))
+        first("in memory, same catalog", HTSQL(db, {'tweak.meta': {}}))
+        extensions = {'tweak.meta': {'cache_file': cache}}
+        first("cache file, created", HTSQL(db, extensions))
+        first("cache file, reused", HTSQL(db, extensions))
+        connection = sqlite3.connect(path)
+        connection.execute("""
+            CREATE TABLE extra (
+                id INTEGER PRIMARY KEY NOT NULL,
+                t0000_id INTEGER REFERENCES t0000(id)
+            )
+        """)
+        connection.commit()
+        connection.close()
+        app = HTSQL(db, extensions)
+        first("cache file, one table added", app)
+        queries = [
+            "/meta(/table)",
+            "/meta(/column.filter(table_name='t0042'))",
+            "/meta(/link.filter(target_name='t0000'))",
+            "/meta(/count(field))",
+        ]
+        with app:
+            for query in queries:
+                best = None
+                for round in range(3):
+                    start = time.time()
+                    for idx in range(10):
+                        produce(query)
+                    elapsed = time.time()-start
+                    if best is None or elapsed < best:
+                        best = elapsed
+                print("%-36s %10.1f ms" % (query, best*1000/10))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
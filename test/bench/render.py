@@ -0,0 +1,95 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# An end-to-end benchmark for small repeated requests.
+#
+# Usage:
+#   python test/bench/render.py [<number-of-requests>]
+#
+# The script generates a small SQLite database, then sends the same
+# request to the WSGI application repeatedly (1000 times by default)
+# in every output format and reports the average time per request
+# in the fastest of 10 rounds.
+
+
+from htsql import HTSQL
+import sys, os, os.path, tempfile, sqlite3, time
+
+
+def generate(path):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE category (
+            code TEXT PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO category VALUES (?, ?)
+    """, [("c%02d" % idx, "Category #%s" % idx) for idx in range(5)])
+    cursor.execute("""
+        CREATE TABLE item (
+            id INTEGER PRIMARY KEY NOT NULL,
+            title TEXT NOT NULL,
+            weight FLOAT,
+            created DATE NOT NULL,
+            category TEXT NOT NULL REFERENCES category(code)
+        )
+    """)
+    cursor.executemany("""
+        INSERT INTO item VALUES (?, ?, ?, ?, ?)
+    """, [(idx, "Item #%s" % idx, idx / 3.0,
+           "2013-%02d-%02d" % (idx % 12 + 1, idx % 28 + 1),
+           "c%02d" % (idx % 5))
+          for idx in range(20)])
+    connection.commit()
+    connection.close()
+
+
+def request(app, path):
+    environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'wsgi.url_scheme': 'http',
+    }
+    def start_response(status, headers, exc_info=None):
+        assert status.startswith('200'), status
+    return b"".join(app(environ, start_response))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'render.sqlite')
+    try:
+        generate(path)
+        app = HTSQL('sqlite:%s' % path)
+        query = "/category{code, title, /item{id, title, weight, created}}"
+        for format in ['txt', 'html', 'csv', 'raw', 'json', 'xml']:
+            uri = "%s/:%s" % (query, format)
+            request(app, uri)
+            best = None
+            for round in range(10):
+                start = time.time()
+                for idx in range(count//10):
+                    request(app, uri)
+                elapsed = time.time()-start
+                if best is None or elapsed < best:
+                    best = elapsed
+            print("%-8s %8.3f ms/request" % (format, best*1000/(count//10)))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
+
+
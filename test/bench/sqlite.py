@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for the options of the SQLite engine.
+#
+# Usage:
+#   python test/bench/sqlite.py [<path-to-htsql_demo.sqlite>]
+#
+# The script copies the demo database (by default, the one created by
+# the regression tests in `build/regress/sqlite`) to a temporary
+# directory and runs a mix of queries from 1, 4 and 16 threads against
+# applications with different `engine.sqlite` options: the defaults,
+# WAL with memory-mapped I/O, a larger page cache and cached connections,
+# and the same with an immutable database.  Each request runs in a new
+# thread, as with `htsql-ctl server`.  For each configuration, it reports
+# the number of queries per second.
+
+
+from htsql import HTSQL
+import sys, os, os.path, tempfile, shutil, threading, time
+
+
+def request(app, path):
+    environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'wsgi.url_scheme': 'http',
+    }
+    def start_response(status, headers, exc_info=None):
+        assert status.startswith('200'), status
+    return b"".join(app(environ, start_response))
+
+
+def run(app, queries, threads, count):
+    # Starts `threads` clients; each client sends `count` requests,
+    # every request is served by a fresh thread.
+    def client():
+        for idx in range(count):
+            query = queries[idx % len(queries)]
+            worker = threading.Thread(target=request, args=(app, query))
+            worker.start()
+            worker.join()
+    clients = [threading.Thread(target=client) for idx in range(threads)]
+    start = time.time()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return threads*count/(time.time()-start)
+
+
+def main():
+    source = (sys.argv[1] if len(sys.argv) > 1
+              else 'build/regress/sqlite/htsql_demo.sqlite')
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'htsql_demo.sqlite')
+    try:
+        shutil.copy(source, path)
+        tuned = {
+                'mmap_size': 256*1024*1024,
+                'cache_size': -65536,
+                'temp_store': 'memory',
+                'connection_cache_size': 16,
+        }
+        configurations = [
+                ('default', {}),
+                ('wal', dict(tuned, journal_mode='wal')),
+                ('immutable', dict(tuned, immutable=True)),
+        ]
+        queries = [
+                "/school{name, count(department)}/:json",
+                "/department{name, school.name}.sort(name)/:json",
+                "/course.filter(credits>3).sort(title).limit(50)/:json",
+                "/program{title, count(student)}.filter(count(student)>0)"
+                    "/:json",
+                "/student.limit(100){name, dob, program.title}/:json",
+        ]
+        for name, options in configurations:
+            app = HTSQL('sqlite:%s' % path, {'engine.sqlite': options})
+            for query in queries:
+                request(app, query)
+            line = []
+            for threads in [1, 4, 16]:
+                rate = run(app, queries, threads, 160//threads)
+                line.append("%2d threads %7.1f q/s" % (threads, rate))
+            print("%-10s %s" % (name, "  ".join(line)))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
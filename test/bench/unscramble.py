@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2006-2013, Prometheus Research, LLC
+#
+
+# A benchmark for converting fetched values to Python objects.
+#
+# Usage:
+#   python test/bench/unscramble.py [<number-of-rows>]
+#
+# The script generates a SQLite database with an event table (200000
+# rows by default) with date, time, timestamp and decimal columns, and
+# runs queries that export each kind of column, fetching all rows at
+# once and in batches of 10000 rows.  For each query, it reports the
+# time per request in the fastest of 3 rounds.
+
+
+from htsql import HTSQL
+from htsql.core.cmd.embed import embed
+from htsql.core.cmd.act import ProduceAction, act
+import sys, os, os.path, tempfile, sqlite3, datetime, time
+
+
+def generate(path, size):
+    start = datetime.datetime(2000, 1, 1)
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE event (
+            id INTEGER PRIMARY KEY NOT NULL,
+            day DATE NOT NULL,
+            hour TIME NOT NULL,
+            created TIMESTAMP NOT NULL,
+            amount NUMERIC(12,2) NOT NULL
+        )
+    """)
+    rows = []
+    for idx in range(size):
+        moment = start+datetime.timedelta(minutes=idx*37)
+        rows.append((idx, str(moment.date()),
+                     str(moment.time().replace(minute=0)),
+                     str(moment), (idx*7919 % 100000)/100.0+0.001))
+    cursor.executemany("""
+        INSERT INTO event VALUES (?, ?, ?, ?, ?)
+    """, rows)
+    connection.commit()
+    connection.close()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'unscramble.sqlite')
+    try:
+        generate(path, size)
+        app = HTSQL('sqlite:%s' % path)
+        batches = [('all', None), ('batched', 10000)]
+        queries = [
+            "/event{id, day}",
+            "/event{id, hour}",
+            "/event{id, created}",
+            "/event{id, amount}",
+            "/event{day, hour, created, amount}",
+        ]
+        for query in queries:
+            print(query)
+            for name, batch in batches:
+                with app:
+                    best = None
+                    for round in range(3):
+                        start = time.time()
+                        action = ProduceAction(embed(None), batch=batch)
+                        product = act(query, action)
+                        list(product.data)
+                        elapsed = time.time()-start
+                        if best is None or elapsed < best:
+                            best = elapsed
+                print("  %-10s %10.1f ms" % (name, best*1000))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,14 @@
 
-import random, csv, datetime, math
+import random, csv, datetime, math, sqlite3
 import os, sys
+import yaml
 
 RANDOM_SEED = 0
 INSTRUCTOR_NAME_SEED = 100
 STUDENT_NAME_SEED = 200
 
+DEMO_DATA_FILE = "../demo-data.yaml"
+
 CURDATE = datetime.datetime.strptime('2011-06-01', '%Y-%m-%d').date()
 
 
@@ -300,21 +303,26 @@ class InstructorGenerator(BaseDataGenerator):
     CONFIDENTIAL_COLUMNS = ["instructor_code", "SSN", "pay_grade", "home_phone"]
     APPOINTMENT_COLUMNS = ["instructor_code", "department_code", "fraction"]
 
-    def __init__(self, name_generator, dictionary):
+    def __init__(self, name_generator, dictionary, seed=RANDOM_SEED,
+                 instructors=None):
         self.name_generator = name_generator
         self.dictionary = dictionary
-        self.instructors = set()
+        # codes taken by instructors of other copies of the dataset
+        if instructors is None:
+            instructors = set()
+        self.instructors = instructors
+        self.seed = seed
         self.dep_app = {}
         self.instructor_data = []
         self.confidential_data = []
         self.appointment_data = []
-        self.gender_gen = LegacyRandom(RANDOM_SEED)
-        self.title_gen = LegacyRandom(RANDOM_SEED)
-        self.phone_gen = LegacyRandom(RANDOM_SEED)
-        self.email_gen = LegacyRandom(RANDOM_SEED)
-        self.ssn_gen = LegacyRandom(RANDOM_SEED)
-        self.paygrade_gen = LegacyRandom(RANDOM_SEED)
-        self.fraction_gen = LegacyRandom(RANDOM_SEED)
+        self.gender_gen = LegacyRandom(seed)
+        self.title_gen = LegacyRandom(seed)
+        self.phone_gen = LegacyRandom(seed)
+        self.email_gen = LegacyRandom(seed)
+        self.ssn_gen = LegacyRandom(seed)
+        self.paygrade_gen = LegacyRandom(seed)
+        self.fraction_gen = LegacyRandom(seed)
 
     def generate_phone(self):
         if self.phone_gen.randint(1,100) <= self.NULL_PERCENT:
@@ -386,7 +394,7 @@ class InstructorGenerator(BaseDataGenerator):
         ]
 
     def generate_content(self):
-        load_gen = LegacyRandom(RANDOM_SEED)
+        load_gen = LegacyRandom(self.seed)
         for depcode in sorted(self.dictionary.departments):
             load = load_gen.uniform(self.COURSES_PER_INSTRUCTOR[0], self.COURSES_PER_INSTRUCTOR[1])
             total_courses = self.dictionary.departments[depcode]
@@ -422,15 +430,18 @@ class ClassGenerator(BaseDataGenerator):
     CLASS_COLUMNS = ['department_code', 'course_no', 'year', 'season', 'section', 'instructor_code', 'class_seq']
     CLASS_SEQ_OFFSET = 1000
 
-    def __init__(self, meta, dep_app):
+    def __init__(self, meta, dep_app, seed=RANDOM_SEED, class_seq=None):
         self.dictionary = meta
         self.dep_app = dep_app
         self.class_data = []
         self.class_fill_map = {}
-        self.class_seq = self.CLASS_SEQ_OFFSET
-        self.instructor_gen = LegacyRandom(RANDOM_SEED)
-        self.course_gen = LegacyRandom(RANDOM_SEED)
-        self.class_gen = LegacyRandom(RANDOM_SEED)
+        # the last class_seq taken by other copies of the dataset
+        if class_seq is None:
+            class_seq = self.CLASS_SEQ_OFFSET
+        self.class_seq = class_seq
+        self.instructor_gen = LegacyRandom(seed)
+        self.course_gen = LegacyRandom(seed)
+        self.class_gen = LegacyRandom(seed)
 
     def get_class_fill(self, class_seq):
         if class_seq in self.class_fill_map:
@@ -535,8 +546,9 @@ class EnrollmentGenerator(BaseDataGenerator):
     ENROLLMENT_TABLE = 'ed.enrollment'
     ENROLLMENT_COLUMNS = ['class_seq', 'student_id', 'status', 'grade']
 
-    def __init__(self, dictionary, student, classgen, rand):
+    def __init__(self, dictionary, student, classgen, rand, seed=RANDOM_SEED):
         self.dictionary = dictionary
+        self.seed = seed
         # make a student map
         self.student = {}
         for (name, val) in zip(StudentGenerator.STUDENT_COLUMNS, student):
@@ -727,7 +739,7 @@ class EnrollmentGenerator(BaseDataGenerator):
         self.distribute_courses()
         self.get_semester_classes()
         level = 0
-        credits_gen = LegacyRandom(RANDOM_SEED)
+        credits_gen = LegacyRandom(self.seed)
         for semester in self.dictionary.semesters:
             study_time = (semester["end_date"] - self.student["start_date"]).days
             if study_time > 0 and study_time < 4 * 356 \
@@ -737,7 +749,11 @@ class EnrollmentGenerator(BaseDataGenerator):
                 classes_by_semester = self.semester_classes[semester['year'], semester['season']].copy()
                 credits_taken = 0
                 while credits_taken < credits:
-                    (class_seq, course_key) = self.choose_class(level, semester, classes_by_semester)
+                    choice = self.choose_class(level, semester, classes_by_semester)
+                    # with other seeds, no class could be found
+                    if choice is None:
+                        break
+                    (class_seq, course_key) = choice
                     credits_taken = credits_taken + self.dictionary.courses[course_key]
                     # make enrollment
                     enr = self.generate_enrollment(class_seq, semester)
@@ -764,19 +780,22 @@ class StudentGenerator(BaseDataGenerator):
     STUDENT_TABLE = "ed.student"
     STUDENT_COLUMNS = ["id", "name", "gender", "dob", "school_code", "program_code", "start_date", "is_active"]
 
-    def __init__(self, name_generator, dictionary):
+    def __init__(self, name_generator, dictionary, seed=RANDOM_SEED,
+                 student_counter=0):
         self.name_generator = name_generator
         self.dictionary = dictionary
-        self.student_counter = 0
+        self.seed = seed
+        # the number of students in other copies of the dataset
+        self.student_counter = student_counter
         self.cur_year = datetime.datetime.now().year
         self.student_data = []
-        self.gender_gen = LegacyRandom(RANDOM_SEED)
-        self.dob_gen = LegacyRandom(RANDOM_SEED)
-        self.active_gen = LegacyRandom(RANDOM_SEED)
-        self.school_gen = LegacyRandom(RANDOM_SEED)
+        self.gender_gen = LegacyRandom(seed)
+        self.dob_gen = LegacyRandom(seed)
+        self.active_gen = LegacyRandom(seed)
+        self.school_gen = LegacyRandom(seed)
         self.program_gen = {}
         for school_code in sorted(self.dictionary.school_programs):
-            self.program_gen[school_code] = LegacyRandom(RANDOM_SEED)
+            self.program_gen[school_code] = LegacyRandom(seed)
 
     def generate_student(self, semester):
         gender = self.generate_gender(self.gender_gen)
@@ -803,7 +822,7 @@ class StudentGenerator(BaseDataGenerator):
         ]
 
     def generate_content(self):
-        admission_gen = LegacyRandom(RANDOM_SEED)
+        admission_gen = LegacyRandom(self.seed)
         for semester in self.dictionary.semesters:
             if semester["season"] == 'fall' and semester["begin_date"] <= CURDATE:
                 # make admission
@@ -818,32 +837,230 @@ class StudentGenerator(BaseDataGenerator):
         ]
 
 
-def generate(content):
+
+
+class GeneratorState(object):
+
+    """ Keys taken by the copies of the dataset generated so far """
+
+    def __init__(self):
+        self.instructors = set()
+        self.class_seq = ClassGenerator.CLASS_SEQ_OFFSET
+        self.student_counter = 0
+
+
+def generate(content, seed=RANDOM_SEED, state=None):
+    if state is None:
+        state = GeneratorState()
     dictionary = CollectionDictionaryLoader().load(content)
-    random.seed(RANDOM_SEED)
+    random.seed(seed)
     name_data = StatNameData()
-    inst_namegen = StatNameGenerator(name_data, INSTRUCTOR_NAME_SEED)
+    inst_namegen = StatNameGenerator(name_data, INSTRUCTOR_NAME_SEED + seed)
 
-    instgen = InstructorGenerator(inst_namegen, dictionary)
+    instgen = InstructorGenerator(inst_namegen, dictionary, seed,
+                                  state.instructors)
     instgen.generate_content()
     result = instgen.get_content()
 
-    classgen = ClassGenerator(dictionary, instgen.dep_app)
+    classgen = ClassGenerator(dictionary, instgen.dep_app, seed,
+                              state.class_seq)
     classgen.generate_content()
 
-    stud_namegen = StatNameGenerator(name_data, STUDENT_NAME_SEED)
-    studgen = StudentGenerator(stud_namegen, dictionary)
+    stud_namegen = StatNameGenerator(name_data, STUDENT_NAME_SEED + seed)
+    studgen = StudentGenerator(stud_namegen, dictionary, seed,
+                               state.student_counter)
     studgen.generate_content()
     result.extend(studgen.get_content())
 
-    r = LegacyRandom(RANDOM_SEED)
+    r = LegacyRandom(seed)
     enr_result = []
     for student in studgen.student_data:
-        enrgen = EnrollmentGenerator(dictionary, student, classgen, r)
+        enrgen = EnrollmentGenerator(dictionary, student, classgen, r, seed)
         enrgen.generate_content()
         enr_result.extend(enrgen.get_content())
 
     classgen.drop_empty_classes()
     result.extend(classgen.get_content())
     result.extend(enr_result)
+    state.class_seq = classgen.class_seq
+    state.student_counter = studgen.student_counter
+    return result
+
+
+""" Scaling: the dataset for scale factor N is made of N copies of the
+demo dataset.  Each copy has its own departments, courses, instructors,
+classes, students and enrollments; schools, programs, semesters and
+classifications are shared.  The first copy is the demo dataset itself,
+the others get a suffix added to the department codes and to the names
+that must be unique. """
+SEED_STEP = 1000                        # distance between seeds of copies
+REPLICATED_COLUMNS = {
+    'ad.department': ['code'],
+    'ad.course': ['department_code'],
+    'rd.prerequisite': ['of_department_code', 'on_department_code'],
+    'rd.course_classification': ['department_code'],
+}
+UNIQUE_COLUMNS = {
+    'ad.department': 'name',
+    'ad.course': 'title',
+}
+
+
+def replicate(content, copy):
+    result = []
+    for table_content in content:
+        table = table_content['table']
+        if table not in REPLICATED_COLUMNS:
+            continue
+        columns = table_content['columns']
+        code_indexes = [columns.index(colname)
+                        for colname in REPLICATED_COLUMNS[table]]
+        unique_index = None
+        if table in UNIQUE_COLUMNS:
+            unique_index = columns.index(UNIQUE_COLUMNS[table])
+        data = []
+        for record in table_content['data']:
+            record = list(record)
+            for idx in code_indexes:
+                record[idx] = "%s_%s" % (record[idx], copy + 1)
+            if unique_index is not None:
+                record[unique_index] = "%s #%s" % (record[unique_index],
+                                                   copy + 1)
+            data.append(record)
+        result.append({
+            "table": table,
+            "columns": columns,
+            "data": data
+        })
     return result
+
+
+def generate_scaled(content, scale=1, seed=RANDOM_SEED):
+    # The copies are generated one by one, so the memory usage does not
+    # depend on the scale factor.
+    for table_content in content:
+        yield table_content
+    shared = [table_content for table_content in content
+              if table_content['table'] not in REPLICATED_COLUMNS]
+    state = GeneratorState()
+    for copy in range(scale):
+        copy_content = content
+        if copy > 0:
+            replica = replicate(content, copy)
+            for table_content in replica:
+                yield table_content
+            copy_content = shared + replica
+        for table_content in generate(copy_content, seed + copy * SEED_STEP,
+                                      state):
+            yield table_content
+
+
+class SQLiteWriter(object):
+
+    """ Stream the rows into a new SQLite database """
+    SCHEMA_FILE = "../demo-sqlite.sql"
+
+    def __init__(self, path):
+        basedir = os.path.dirname(__file__)
+        self.connection = sqlite3.connect(path)
+        with open(os.path.join(basedir, self.SCHEMA_FILE)) as stream:
+            self.connection.executescript(stream.read())
+
+    def convert(self, val):
+        if isinstance(val, (datetime.datetime, datetime.date)):
+            return str(val)
+        return val
+
+    def write(self, table_content):
+        table = table_content['table']
+        table = table[table.find('.')+1:]
+        columns = table_content['columns']
+        sql = "INSERT INTO %s (%s) VALUES (%s)" \
+              % (table, ", ".join(columns), ", ".join(["?"]*len(columns)))
+        data = [[self.convert(val) for val in record]
+                for record in table_content['data']]
+        self.connection.executemany(sql, data)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class PGCopyWriter(object):
+
+    """ Write the rows to files in the PostgreSQL COPY format """
+    LOAD_FILE = "load.sql"
+
+    def __init__(self, directory):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.tables = []
+        self.streams = {}
+
+    def quote(self, val):
+        if val is None:
+            return "\\N"
+        if val is True:
+            return "t"
+        if val is False:
+            return "f"
+        val = str(val)
+        return val.replace("\\", "\\\\").replace("\t", "\\t") \
+                  .replace("\n", "\\n").replace("\r", "\\r")
+
+    def write(self, table_content):
+        table = table_content['table']
+        if table not in self.streams:
+            path = os.path.join(self.directory, table + ".copy")
+            self.streams[table] = open(path, 'w', encoding='utf-8')
+            self.tables.append((table, table_content['columns'], path))
+        stream = self.streams[table]
+        for record in table_content['data']:
+            stream.write("\t".join(self.quote(val) for val in record) + "\n")
+
+    def close(self):
+        # tables are loaded in the order they first appear, so that
+        # the rows referenced by foreign keys are loaded first
+        for stream in self.streams.values():
+            stream.close()
+        path = os.path.join(self.directory, self.LOAD_FILE)
+        with open(path, 'w') as stream:
+            for table, columns, copy_path in self.tables:
+                stream.write("\\copy %s (%s) FROM '%s'\n"
+                             % (table, ", ".join(columns),
+                                os.path.abspath(copy_path)))
+
+
+def main():
+    """
+    Usage:
+      python test/sql/datagen/data_generator.py <scale> <output> [<seed>]
+
+    Generates the regression dataset for the given scale factor (1 makes
+    the demo dataset of ~450 students and ~15000 enrollments, 100 makes
+    a dataset 100 times larger).  If <output> ends with `.sqlite`, the rows
+    are written to a new SQLite database with the demo schema; otherwise
+    <output> is a directory for PostgreSQL COPY files and a `load.sql`
+    script to run with `psql` after `test/sql/demo-pgsql.sql`.  The data
+    depends only on the scale factor and the seed (0 by default).
+    """
+    if len(sys.argv) not in [3, 4]:
+        sys.exit(main.__doc__)
+    scale = int(sys.argv[1])
+    output = sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else RANDOM_SEED
+    basedir = os.path.dirname(__file__)
+    with open(os.path.join(basedir, DEMO_DATA_FILE)) as stream:
+        content = yaml.safe_load(stream)
+    if output.endswith('.sqlite'):
+        writer = SQLiteWriter(output)
+    else:
+        writer = PGCopyWriter(output)
+    for table_content in generate_scaled(content, scale, seed):
+        writer.write(table_content)
+    writer.close()
+
+
+if __name__ == '__main__':
+    main()